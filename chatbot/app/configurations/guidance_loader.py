@@ -1,9 +1,17 @@
+import hashlib
+import logging
 import os
+from logging.config import dictConfig
 from typing import Dict, List, Tuple
 
+from app.configurations.logging_config import LOGGING_CONFIG
 from app.util.json_loader import load_from_file
 
+dictConfig(LOGGING_CONFIG)
+
 PLATFORM_GUIDANCE_JSON = "platform_guidance_v2.0.json"
+# Key of the guidance file in the seed state kept next to the vector data.
+GUIDANCE_SEED_NAME = "platform_guidance"
 
 
 def seed_data() -> Tuple[List[str], List[str]]:
@@ -22,10 +30,31 @@ def seed_data() -> Tuple[List[str], List[str]]:
 
         return texts, infos
     except Exception as e:
-        print(f"Error parsiong platform guidance file: {e}")
+        logging.error(f"Error parsing platform guidance file: {e}")
         return [], []
 
 
+def guidance_file_hash() -> str:
+    """
+    SHA-256 of the guidance file, used to skip seeding when it has not changed.
+    """
+    file_path = os.path.join(os.path.dirname(__file__), PLATFORM_GUIDANCE_JSON)
+    with open(file_path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def content_hash(model_name: str, text: str, info: str) -> str:
+    """
+    Hash of one guidance entry together with the model that embeds it, so a
+    model change re-embeds every entry.
+    """
+    digest = hashlib.sha256()
+    for part in (model_name, text, info):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
 def get_topics() -> List[str]:
     try:
         file_path = os.path.join(os.path.dirname(__file__), PLATFORM_GUIDANCE_JSON)
@@ -33,7 +62,7 @@ def get_topics() -> List[str]:
         return [guidance["topic"] for guidance in data["guidance"]]
 
     except Exception as e:
-        print(f"Error parsiong platform guidance file: {e}")
+        logging.error(f"Error parsing platform guidance file: {e}")
         return []
 
 
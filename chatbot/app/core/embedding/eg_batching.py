@@ -0,0 +1,181 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, List, Union
+
+import numpy as np
+
+from app.core.embedding.embeddings_generator_abstract import EmbeddingGenerator
+
+
+@dataclass
+class _PendingRequest:
+    texts: List[str]
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class _Stop:
+    pass
+
+
+class BatchingEmbeddingGenerator(EmbeddingGenerator):
+    """
+    Dynamic batching layer in front of an EmbeddingGenerator.
+
+    Concurrent callers are collected for up to `max_wait_ms` or `max_batch_size`
+    texts, encoded in one forward pass by a background worker, and each caller
+    receives its own rows. When every waiting caller is already in the batch the
+    worker dispatches immediately, so a lone request pays no extra latency.
+    """
+
+    def __init__(
+        self,
+        generator: EmbeddingGenerator,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        """
+        Args:
+            generator (EmbeddingGenerator): The generator encoding each batch.
+            max_batch_size (int): Maximum number of texts encoded in one pass.
+            max_wait_ms (float): Maximum time the first request waits for others.
+        """
+        self.generator = generator
+        self.model_name = generator.model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue[Union[_PendingRequest, _Stop]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self.batches = 0
+        self.items = 0
+        self.queue_wait_seconds = 0.0
+        self.encode_seconds = 0.0
+        self._worker = threading.Thread(
+            target=self._run, name="embedding-batcher", daemon=True
+        )
+        self._worker.start()
+
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings, sharing a forward pass with concurrent callers.
+
+        Args:
+            texts (List[str]): The list of texts to embed.
+
+        Returns:
+            np.ndarray: A NumPy array of embeddings.
+        """
+        return self.submit(texts).result()
+
+    async def agenerate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Awaitable variant of `generate_embeddings`; the caller waits on the event
+        loop instead of holding an executor thread while its batch is collected.
+
+        Args:
+            texts (List[str]): The list of texts to embed.
+
+        Returns:
+            np.ndarray: A NumPy array of embeddings.
+        """
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def submit(self, texts: List[str]) -> Future:
+        """
+        Queue texts for the next batch without waiting for it.
+
+        Args:
+            texts (List[str]): The list of texts to embed.
+
+        Returns:
+            Future: Resolves to the embeddings of `texts` once their batch is encoded.
+        """
+        if not texts:
+            future: Future = Future()
+            future.set_result(self.generator.generate_embeddings(texts))
+            return future
+
+        request = _PendingRequest(list(texts))
+        with self._lock:
+            self._waiting += 1
+        self._queue.put(request)
+        return request.future
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Batching counters for monitoring.
+        """
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+                "queue_wait_seconds": self.queue_wait_seconds,
+                "encode_seconds": self.encode_seconds,
+            }
+
+    def close(self) -> None:
+        self._queue.put(_Stop())
+        self._worker.join()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if isinstance(first, _Stop):
+                return
+            batch = [first]
+            size = len(first.texts)
+            stop = False
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+            while size < self.max_batch_size:
+                with self._lock:
+                    everyone_collected = len(batch) >= self._waiting
+                remaining = deadline - time.monotonic()
+                if everyone_collected or remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if isinstance(request, _Stop):
+                    stop = True
+                    break
+                batch.append(request)
+                size += len(request.texts)
+
+            self._encode(batch)
+            if stop:
+                return
+
+    def _encode(self, batch: List[_PendingRequest]) -> None:
+        started = time.monotonic()
+        texts = [text for request in batch for text in request.texts]
+        try:
+            embeddings = self.generator.generate_embeddings(texts)
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+        else:
+            offset = 0
+            for request in batch:
+                request.future.set_result(
+                    embeddings[offset : offset + len(request.texts)]
+                )
+                offset += len(request.texts)
+        finally:
+            finished = time.monotonic()
+            with self._lock:
+                self._waiting -= len(batch)
+                self.batches += 1
+                self.items += len(texts)
+                self.queue_wait_seconds += sum(
+                    started - request.enqueued_at for request in batch
+                )
+                self.encode_seconds += finished - started
@@ -0,0 +1,128 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.core.embedding.embeddings_generator_abstract import EmbeddingGenerator
+
+
+class CachedEmbeddingGenerator(EmbeddingGenerator):
+    """
+    Size-bounded LRU cache in front of any EmbeddingGenerator.
+
+    Texts are keyed on their normalized form (case-folded, whitespace collapsed),
+    and only the cache misses of a batch are sent to the wrapped generator.
+    """
+
+    def __init__(self, generator: EmbeddingGenerator, max_size: int = 1024):
+        """
+        Args:
+            generator (EmbeddingGenerator): The generator computing cache misses.
+            max_size (int): Maximum number of cached embeddings.
+        """
+        self.generator = generator
+        self.model_name = generator.model_name
+        self.max_size = max_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split()).casefold()
+
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings, encoding only texts that are not cached yet.
+
+        Args:
+            texts (List[str]): The list of texts to embed.
+
+        Returns:
+            np.ndarray: A NumPy array of embeddings, one row per text.
+        """
+        if not texts:
+            return self.generator.generate_embeddings(texts)
+
+        keys, rows, missing = self._lookup(texts)
+        if missing:
+            embeddings = self.generator.generate_embeddings(list(missing.values()))
+            self._store(missing, embeddings, rows)
+        return np.stack([rows[key] for key in keys])
+
+    async def agenerate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Awaitable variant of `generate_embeddings`; cache misses are awaited on
+        the wrapped generator, so hits never leave the event loop.
+
+        Args:
+            texts (List[str]): The list of texts to embed.
+
+        Returns:
+            np.ndarray: A NumPy array of embeddings, one row per text.
+        """
+        if not texts:
+            return await self.generator.agenerate_embeddings(texts)
+
+        keys, rows, missing = self._lookup(texts)
+        if missing:
+            embeddings = await self.generator.agenerate_embeddings(
+                list(missing.values())
+            )
+            self._store(missing, embeddings, rows)
+        return np.stack([rows[key] for key in keys])
+
+    def _lookup(
+        self, texts: List[str]
+    ) -> Tuple[List[str], Dict[str, np.ndarray], Dict[str, str]]:
+        keys = [self.normalize(text) for text in texts]
+        rows: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}  # normalized key -> first original text
+        with self._lock:
+            for key, text in zip(keys, texts):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    rows[key] = cached
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, text)
+                    self.misses += 1
+        return keys, rows, missing
+
+    def _store(
+        self,
+        missing: Dict[str, str],
+        embeddings: np.ndarray,
+        rows: Dict[str, np.ndarray],
+    ) -> None:
+        with self._lock:
+            for key, embedding in zip(missing, embeddings):
+                embedding = np.array(embedding)
+                embedding.setflags(write=False)
+                rows[key] = embedding
+                self._cache[key] = embedding
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Cache counters for monitoring.
+        """
+        with self._lock:
+            return {
+                "size": len(self._cache),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
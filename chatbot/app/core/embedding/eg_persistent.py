@@ -0,0 +1,81 @@
+import logging
+import threading
+from logging.config import dictConfig
+from typing import Dict, List, Optional, cast
+
+import numpy as np
+
+from app.configurations.logging_config import LOGGING_CONFIG
+from app.core.embedding.embedding_store import EmbeddingStore
+from app.core.embedding.embeddings_generator_abstract import EmbeddingGenerator
+
+dictConfig(LOGGING_CONFIG)
+
+
+class PersistentEmbeddingGenerator(EmbeddingGenerator):
+    """
+    Reads embeddings from an on-disk EmbeddingStore and stores the ones it computes.
+
+    Seeding, ingestion and replayed messages then reuse embeddings across
+    restarts and worker processes. Store failures fall back to the model.
+    """
+
+    def __init__(self, generator: EmbeddingGenerator, store: EmbeddingStore):
+        """
+        Args:
+            generator (EmbeddingGenerator): The generator computing missing embeddings.
+            store (EmbeddingStore): The store of the generator's model.
+        """
+        self.generator = generator
+        self.model_name = generator.model_name
+        self.store = store
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings, encoding only texts missing from the store.
+
+        Args:
+            texts (List[str]): The list of texts to embed.
+
+        Returns:
+            np.ndarray: A NumPy array of embeddings, one row per text.
+        """
+        if not texts:
+            return self.generator.generate_embeddings(texts)
+
+        try:
+            rows: List[Optional[np.ndarray]] = self.store.get_many(texts)
+        except Exception as e:
+            logging.error(f"Error reading the embedding store: {e}")
+            rows = [None] * len(texts)
+
+        missing = [index for index, row in enumerate(rows) if row is None]
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            missing_texts = [texts[index] for index in missing]
+            embeddings = np.asarray(
+                self.generator.generate_embeddings(missing_texts), dtype=np.float32
+            )
+            try:
+                self.store.put_many(missing_texts, embeddings)
+            except Exception as e:
+                logging.error(f"Error writing to the embedding store: {e}")
+            for index, embedding in zip(missing, embeddings):
+                rows[index] = embedding
+
+        # Every missing row has been filled in above.
+        return np.stack(cast(List[np.ndarray], rows))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Store counters for monitoring.
+        """
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {"hits": hits, "misses": misses, "rows": len(self.store)}
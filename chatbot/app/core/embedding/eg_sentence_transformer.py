@@ -4,17 +4,23 @@ import numpy as np
 from sentence_transformers import SentenceTransformer
 
 from app.core.embedding.embeddings_generator_abstract import EmbeddingGenerator
+from app.core.model_registry import get_or_load
 
 
 class SentenceTransformerEmbeddingGenerator(EmbeddingGenerator):
     def __init__(self, model_name: str = "multi-qa-mpnet-base-cos-v1"):
         """
-        Initializes the SentenceTransformer model.
+        Initializes the SentenceTransformer model, shared with every other
+        generator of the same model in this process.
 
         Args:
             model_name (str): The name of the model to load.
         """
-        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.model = get_or_load(
+            f"sentence_transformer:{model_name}",
+            lambda: SentenceTransformer(model_name),
+        )
 
     def generate_embeddings(self, texts: List[str]) -> np.ndarray:
         """
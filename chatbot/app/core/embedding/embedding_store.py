@@ -0,0 +1,174 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from logging.config import dictConfig
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from app.configurations.logging_config import LOGGING_CONFIG
+
+dictConfig(LOGGING_CONFIG)
+
+# One index record per stored row: the SHA-1 hex digest of the text and a newline.
+_INDEX_RECORD_SIZE = 41
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Append-only on-disk embedding store for one model.
+
+    Vectors are appended to a raw float32 file that readers memory-map, so every
+    worker process shares the same pages instead of holding its own copy. A
+    parallel index file holds one fixed-size text hash per row. Writers append
+    under an exclusive `flock`, vectors first and index entries last, so readers
+    never see an index entry whose vector is not fully written.
+    """
+
+    def __init__(self, directory: str, model_name: str, max_rows: int = 100_000):
+        """
+        Args:
+            directory (str): Directory holding the store files.
+            model_name (str): Embedding model; each model gets its own files.
+            max_rows (int): Rows after which new embeddings are no longer stored.
+        """
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, re.sub(r"[^\w.-]+", "_", model_name))
+        self.model_name = model_name
+        self.max_rows = max_rows
+        self._vectors_path = f"{base}.f32"
+        self._index_path = f"{base}.idx"
+        self._meta_path = f"{base}.json"
+        self._lock_path = f"{base}.lock"
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._row_count = 0
+        self._dimension: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self._full_logged = False
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Stored embeddings of the texts, None for texts that are not stored.
+        The returned rows are read-only views of the shared mapping.
+        """
+        keys = [text_key(text) for text in texts]
+        with self._lock:
+            if any(key not in self._rows for key in keys):
+                self._refresh()
+            vectors = self._vectors
+            rows = [self._rows.get(key) for key in keys]
+        if vectors is None:
+            return [None] * len(texts)
+        return [vectors[row] if row is not None else None for row in rows]
+
+    def put_many(self, texts: List[str], embeddings: np.ndarray) -> None:
+        """
+        Append the embeddings of texts that are not stored yet.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if not texts:
+            return
+        with self._exclusive_file_lock(), self._lock:
+            # Pick up rows appended by other processes before deduplicating.
+            self._refresh()
+            if self._dimension is None:
+                self._write_meta(embeddings.shape[1])
+            if embeddings.shape[1] != self._dimension:
+                logging.error(
+                    f"Embedding store for {self.model_name} holds "
+                    f"{self._dimension}-dimensional vectors, got {embeddings.shape[1]}."
+                )
+                return
+
+            new_rows: Dict[str, np.ndarray] = {}
+            for text, embedding in zip(texts, embeddings):
+                key = text_key(text)
+                if key not in self._rows and key not in new_rows:
+                    new_rows[key] = embedding
+            room = self.max_rows - self._row_count
+            if len(new_rows) > room:
+                if not self._full_logged:
+                    logging.warning(
+                        f"Embedding store for {self.model_name} is full "
+                        f"({self.max_rows} rows); new embeddings are not stored."
+                    )
+                    self._full_logged = True
+                new_rows = dict(list(new_rows.items())[: max(room, 0)])
+            if not new_rows:
+                return
+
+            row_bytes = embeddings.shape[1] * 4
+            with open(self._vectors_path, "ab") as vectors_file:
+                # Drop bytes of an append interrupted before its index entries.
+                vectors_file.truncate(self._row_count * row_bytes)
+                vectors_file.write(np.stack(list(new_rows.values())).tobytes())
+            with open(self._index_path, "ab") as index_file:
+                index_file.truncate(self._row_count * _INDEX_RECORD_SIZE)
+                index_file.write(
+                    "".join(f"{key}\n" for key in new_rows).encode("ascii")
+                )
+            self._refresh()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._row_count
+
+    @contextmanager
+    def _exclusive_file_lock(self) -> Iterator[None]:
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_meta(self, dimension: int) -> None:
+        # Caller holds the file lock.
+        tmp_path = f"{self._meta_path}.tmp"
+        with open(tmp_path, "w") as meta_file:
+            json.dump(
+                {"model_name": self.model_name, "dimension": dimension}, meta_file
+            )
+        os.replace(tmp_path, self._meta_path)
+        self._dimension = dimension
+
+    def _refresh(self) -> None:
+        # Caller holds self._lock. Reads index entries appended since the last call.
+        if self._dimension is None:
+            if not os.path.exists(self._meta_path):
+                return
+            with open(self._meta_path) as meta_file:
+                self._dimension = int(json.load(meta_file)["dimension"])
+        if not os.path.exists(self._index_path):
+            return
+
+        with open(self._index_path, "rb") as index_file:
+            index_file.seek(self._row_count * _INDEX_RECORD_SIZE)
+            data = index_file.read()
+        complete = len(data) - len(data) % _INDEX_RECORD_SIZE
+        for offset in range(0, complete, _INDEX_RECORD_SIZE):
+            key = data[offset : offset + _INDEX_RECORD_SIZE - 1].decode("ascii")
+            self._rows.setdefault(key, self._row_count)
+            self._row_count += 1
+
+        if self._row_count and (
+            self._vectors is None or len(self._vectors) < self._row_count
+        ):
+            # Remapped only when it grew; views handed out earlier stay valid.
+            self._vectors = np.memmap(
+                self._vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(self._row_count, self._dimension),
+            )
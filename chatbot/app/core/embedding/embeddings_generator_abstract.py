@@ -3,12 +3,18 @@ from typing import List
 
 import numpy as np
 
+from app.util.concurrency import run_cpu_bound
+
 
 class EmbeddingGenerator(ABC):
     """
     Abstract base class for embedding generation.
     """
 
+    # Identifies the underlying model, e.g. to tell whether stored embeddings are
+    # compatible with the ones this generator produces.
+    model_name: str = "unknown"
+
     @abstractmethod
     def generate_embeddings(self, texts: List[str]) -> np.ndarray:
         """
@@ -21,3 +27,18 @@ class EmbeddingGenerator(ABC):
             np.ndarray: A NumPy array of embeddings.
         """
         pass
+
+    async def agenerate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Awaitable variant of `generate_embeddings` for use inside the event loop.
+
+        The default implementation runs the blocking `generate_embeddings` on the
+        CPU executor.
+
+        Args:
+            texts (List[str]): The list of texts to embed.
+
+        Returns:
+            np.ndarray: A NumPy array of embeddings.
+        """
+        return await run_cpu_bound(self.generate_embeddings, texts)
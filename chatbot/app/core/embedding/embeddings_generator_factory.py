@@ -1,21 +1,100 @@
+import os
+
+from dotenv import load_dotenv
+
+from app.core.embedding.eg_batching import BatchingEmbeddingGenerator
+from app.core.embedding.eg_cached import CachedEmbeddingGenerator
+from app.core.embedding.eg_persistent import PersistentEmbeddingGenerator
 from app.core.embedding.eg_sentence_transformer import (
     SentenceTransformerEmbeddingGenerator,
 )
+from app.core.embedding.embedding_store import EmbeddingStore
 from app.core.embedding.embeddings_generator_abstract import EmbeddingGenerator
 
+load_dotenv()
+
+# Number of query embeddings kept in the LRU cache; 0 disables caching.
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 1024))
+# Texts encoded together by the micro-batching layer; 1 or less disables batching.
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", 32))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", 5))
+# Directory of the persistent on-disk embedding store; unset disables it.
+EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR")
+EMBEDDING_STORE_MAX_ROWS = int(os.getenv("EMBEDDING_STORE_MAX_ROWS", 100_000))
+# Ingestion is not latency sensitive, so its batcher waits longer to fill batches.
+INGESTION_EMBEDDING_BATCH_MAX_WAIT_MS = float(
+    os.getenv("INGESTION_EMBEDDING_BATCH_MAX_WAIT_MS", 50)
+)
+
 
-def get_generator(generator_type: str = "sentence_transformer") -> EmbeddingGenerator:
+def get_generator(
+    generator_type: str = "sentence_transformer",
+    batch_max_size: int = EMBEDDING_BATCH_MAX_SIZE,
+    batch_max_wait_ms: float = EMBEDDING_BATCH_MAX_WAIT_MS,
+    cache_size: int = EMBEDDING_CACHE_SIZE,
+    persistent: bool = False,
+) -> EmbeddingGenerator:
     """
     Factory function to get the embedding generator.
 
     Args:
         generator_type (str): The type of embedding generator to use.
                               Options: "sentence_transformer"...
+        batch_max_size (int): Texts per forward pass; 1 or less disables batching.
+        batch_max_wait_ms (float): Longest a request waits for others to join.
+        cache_size (int): Embeddings kept in the LRU cache; 0 disables it.
+        persistent (bool): Read and write the on-disk store of EMBEDDING_STORE_DIR.
+                           Meant for seeding and ingestion, whose texts repeat
+                           across restarts; chat queries stay in the LRU cache.
 
     Returns:
         EmbeddingGenerator: The embedding generator instance.
     """
+    generator: EmbeddingGenerator
     if generator_type == "sentence_transformer":
-        return SentenceTransformerEmbeddingGenerator()
+        generator = SentenceTransformerEmbeddingGenerator()
     else:
         raise ValueError(f"Unknown embedding generator type: {generator_type}")
+
+    # Cache outermost so hits never wait in the batching queue; the store sits
+    # below the batcher so a whole batch is looked up at once.
+    if persistent and EMBEDDING_STORE_DIR:
+        generator = PersistentEmbeddingGenerator(
+            generator,
+            EmbeddingStore(
+                EMBEDDING_STORE_DIR,
+                generator.model_name,
+                max_rows=EMBEDDING_STORE_MAX_ROWS,
+            ),
+        )
+    if batch_max_size > 1:
+        generator = BatchingEmbeddingGenerator(
+            generator,
+            max_batch_size=batch_max_size,
+            max_wait_ms=batch_max_wait_ms,
+        )
+    if cache_size > 0:
+        generator = CachedEmbeddingGenerator(generator, max_size=cache_size)
+    return generator
+
+
+def get_ingestion_generator(
+    generator_type: str = "sentence_transformer",
+) -> EmbeddingGenerator:
+    """
+    Embedding generator for queue ingestion and seeding, sharing the model with
+    the chat generator but batching separately so ingestion bursts do not queue
+    in front of chat queries. It uses the on-disk store when one is configured.
+
+    Args:
+        generator_type (str): The type of embedding generator to use.
+
+    Returns:
+        EmbeddingGenerator: The embedding generator instance.
+    """
+    return get_generator(
+        generator_type,
+        batch_max_wait_ms=INGESTION_EMBEDDING_BATCH_MAX_WAIT_MS,
+        cache_size=0,
+        persistent=True,
+    )
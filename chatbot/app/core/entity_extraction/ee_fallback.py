@@ -0,0 +1,21 @@
+from app.core.entity_extraction.entity_extractor_abstract import (
+    EntityExtractor,
+    ExtractionResult,
+)
+
+
+class FallbackEntityExtractor(EntityExtractor):
+    """
+    Runs a fast extractor first and a slower one only when the first is inconclusive.
+    """
+
+    def __init__(self, primary: EntityExtractor, fallback: EntityExtractor) -> None:
+        super().__init__(primary.game_index)
+        self.primary = primary
+        self.fallback = fallback
+
+    def extract_games(self, query: str) -> ExtractionResult:
+        result = self.primary.extract_games(query)
+        if result.conclusive:
+            return result
+        return self.fallback.extract_games(query)
@@ -0,0 +1,25 @@
+import re
+
+from app.core.entity_extraction.entity_extractor_abstract import (
+    EntityExtractor,
+    ExtractionResult,
+)
+
+# Spans that look like a title: quoted text, or a capitalized word that does not
+# start the query. Without such a span there is nothing a NER model could add.
+_CANDIDATE_NAME_PATTERN = re.compile(
+    r"[\"'“‘][^\"'”’]+[\"'”’]|(?<!^)(?<![.?!]\s)\b[A-Z]\w+"
+)
+
+
+class GazetteerEntityExtractor(EntityExtractor):
+    """
+    Matches the query against the in-memory game name index.
+
+    One pass over the query tokens finds every known single- or multi-word name.
+    """
+
+    def extract_games(self, query: str) -> ExtractionResult:
+        games = self.game_index.find_games(query)
+        conclusive = bool(games) or not _CANDIDATE_NAME_PATTERN.search(query.strip())
+        return ExtractionResult(games=games, conclusive=conclusive)
@@ -0,0 +1,50 @@
+import threading
+from typing import Any, Optional
+
+from app.core.entity_extraction.entity_extractor_abstract import (
+    EntityExtractor,
+    ExtractionResult,
+)
+from app.core.model_registry import get_or_load
+from app.services.game_index import GameNameIndex
+
+
+class StanzaEntityExtractor(EntityExtractor):
+    """
+    Neural NER backend. The Stanza pipeline is only loaded on first use.
+    """
+
+    def __init__(self, game_index: GameNameIndex, lang: str = "en") -> None:
+        super().__init__(game_index)
+        self.lang = lang
+        self._nlp: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    def extract_games(self, query: str) -> ExtractionResult:
+        doc = self._get_pipeline()(query.lower())
+        tokens = {word.text for sentence in doc.sentences for word in sentence.words}
+        entities = {ent.text for ent in doc.ents}
+
+        games = set()
+        for entity in entities:
+            games |= self.game_index.find_games(entity)
+        for term in tokens | entities:
+            game = self.game_index.lookup(term)
+            if game is not None:
+                games.add(game)
+        return ExtractionResult(games=games, conclusive=True)
+
+    def _get_pipeline(self) -> Any:
+        if self._nlp is None:
+            with self._lock:
+                if self._nlp is None:
+                    # Imported lazily: stanza and its models are only needed for this backend.
+                    import stanza
+
+                    self._nlp = get_or_load(
+                        f"stanza:{self.lang}:tokenize,ner",
+                        lambda: stanza.Pipeline(
+                            lang=self.lang, processors="tokenize,ner"
+                        ),
+                    )
+        return self._nlp
@@ -0,0 +1,37 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Set
+
+from app.services.game_index import GameNameIndex
+
+
+@dataclass
+class ExtractionResult:
+    """
+    Known games found in a query.
+
+    `conclusive` is False when the extractor could not rule out a mention of a
+    known game, so a slower extractor may be worth consulting.
+    """
+
+    games: Set[str] = field(default_factory=set)
+    conclusive: bool = True
+
+
+class EntityExtractor(ABC):
+    """
+    Abstract base class for finding known game names in a query.
+    """
+
+    def __init__(self, game_index: GameNameIndex) -> None:
+        self.game_index = game_index
+
+    @abstractmethod
+    def extract_games(self, query: str) -> ExtractionResult:
+        """
+        Find the known games mentioned in a query.
+
+        :param query: The user query.
+        :return: The known games found and whether the result is conclusive.
+        """
+        pass
@@ -0,0 +1,31 @@
+from app.core.entity_extraction.ee_fallback import FallbackEntityExtractor
+from app.core.entity_extraction.ee_gazetteer import GazetteerEntityExtractor
+from app.core.entity_extraction.ee_stanza import StanzaEntityExtractor
+from app.core.entity_extraction.entity_extractor_abstract import EntityExtractor
+from app.services.game_index import GameNameIndex
+
+
+def get_entity_extractor(
+    extractor_type: str, game_index: GameNameIndex
+) -> EntityExtractor:
+    """
+    Factory function to get the entity extractor.
+
+    Args:
+        extractor_type (str): The type of entity extractor to use.
+                              Options: "gazetteer", "stanza", "gazetteer+stanza".
+        game_index (GameNameIndex): Index of the known game names.
+
+    Returns:
+        EntityExtractor: The entity extractor instance.
+    """
+    if extractor_type == "gazetteer":
+        return GazetteerEntityExtractor(game_index)
+    if extractor_type == "stanza":
+        return StanzaEntityExtractor(game_index)
+    if extractor_type == "gazetteer+stanza":
+        return FallbackEntityExtractor(
+            GazetteerEntityExtractor(game_index), StanzaEntityExtractor(game_index)
+        )
+    else:
+        raise ValueError(f"Unknown entity extractor type: {extractor_type}")
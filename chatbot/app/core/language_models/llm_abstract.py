@@ -1,4 +1,29 @@
+import math
+import os
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, Iterator
+
+from dotenv import load_dotenv
+
+from app.util.concurrency import iterate_io_bound, run_io_bound
+
+load_dotenv()
+
+# Generations sent to the model server at once; further requests queue.
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", 4))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", 5))
+# Longest gap between two bytes of a response, not the whole generation.
+LLM_READ_TIMEOUT_SECONDS = float(os.getenv("LLM_READ_TIMEOUT_SECONDS", 120))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+LLM_RETRY_BACKOFF_SECONDS = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", 0.5))
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Conservative token estimate from the text length (about 3.5 characters per
+    token for English with BPE tokenizers), for models without a local tokenizer.
+    """
+    return math.ceil(len(text) / 3.5)
 
 
 class BaseLLM(ABC):
@@ -6,6 +31,9 @@ class BaseLLM(ABC):
     Abstract base class for LLM implementations.
     """
 
+    # Tokens the model attends to, prompt and response together.
+    context_window: int = 4096
+
     @abstractmethod
     def generate(self, prompt: str, **kwargs) -> str:
         """
@@ -16,3 +44,63 @@ class BaseLLM(ABC):
         :return: The generated response as a string.
         """
         pass
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Number of tokens the model sees for the text.
+
+        The default implementation estimates it from the text length.
+
+        :param text: The text to count.
+        :return: The (estimated) token count.
+        """
+        return estimate_tokens(text)
+
+    def stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        """
+        Generate a response token by token, yielding text chunks as they are produced.
+
+        The default implementation yields the complete response as a single chunk.
+
+        :param prompt: The input prompt to the LLM.
+        :param kwargs: Additional arguments for customization (e.g., max tokens, temperature).
+        :return: An iterator over response text chunks.
+        """
+        yield self.generate(prompt, **kwargs)
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        """
+        Awaitable variant of `generate` for use inside the event loop.
+
+        The default implementation runs the blocking `generate` on the I/O executor.
+
+        :param prompt: The input prompt to the LLM.
+        :param kwargs: Additional arguments for customization (e.g., max tokens, temperature).
+        :return: The generated response as a string.
+        """
+        return await run_io_bound(self.generate, prompt, **kwargs)
+
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """
+        Async variant of `stream` for use inside the event loop.
+
+        The default implementation consumes the blocking `stream` on the I/O executor.
+
+        :param prompt: The input prompt to the LLM.
+        :param kwargs: Additional arguments for customization (e.g., max tokens, temperature).
+        :return: An async iterator over response text chunks.
+        """
+        async for chunk in iterate_io_bound(self.stream, prompt, **kwargs):
+            yield chunk
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Counters for monitoring (e.g. in-flight generations and queue wait).
+        """
+        return {}
+
+    async def aclose(self) -> None:
+        """
+        Release the clients held by the implementation.
+        """
+        pass
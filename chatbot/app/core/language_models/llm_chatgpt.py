@@ -1,33 +1,132 @@
-from uu import Error
-from openai import OpenAI
-from typing import Any, Iterable
-from app.core.language_models.llm_abstract import BaseLLM
-import os
+from typing import Any, AsyncIterator, Dict, Iterator, List
 
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+from app.core.language_models.llm_abstract import (
+    LLM_CONNECT_TIMEOUT_SECONDS,
+    LLM_MAX_IN_FLIGHT,
+    LLM_MAX_RETRIES,
+    LLM_READ_TIMEOUT_SECONDS,
+    LLM_RETRY_BACKOFF_SECONDS,
+    BaseLLM,
+)
 from app.services.secrets.retriever_local import BaseRetriever
+from app.util.concurrency import InFlightLimiter, retry_with_backoff
+
+try:
+    import tiktoken
+except ImportError:  # Optional: token counts fall back to the BaseLLM estimate.
+    tiktoken = None
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Connection problems, timeouts, rate limiting and server errors are worth retrying.
+    """
+    return isinstance(
+        error,
+        (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError),
+    )
+
 
 class ChatGPTLLM(BaseLLM):
+    context_window = 128000
+
     def __init__(self, secrets_retriever: BaseRetriever):
         self.api_key = secrets_retriever.get("OPENAI_API_KEY")
         self.model = "gpt-4o-mini"
-        self.client = OpenAI(api_key=self.api_key)
+        # Retries are done here, under the in-flight limit, not by the SDK.
+        timeout = httpx.Timeout(
+            LLM_READ_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS
+        )
+        self.client = OpenAI(api_key=self.api_key, timeout=timeout, max_retries=0)
+        self.async_client = AsyncOpenAI(
+            api_key=self.api_key, timeout=timeout, max_retries=0
+        )
+        self.limiter = InFlightLimiter(LLM_MAX_IN_FLIGHT)
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("o200k_base")
+
+    def count_tokens(self, text: str) -> int:
+        if self._encoding is None:
+            return super().count_tokens(text)
+        return len(self._encoding.encode(text, disallowed_special=()))
 
     def generate(self, prompt: str, **kwargs) -> str:
-        query = kwargs.get("query", None)
-        messages: Iterable[Any] = [{"role": "system", "content": prompt}]
+        messages = self._build_messages(prompt, kwargs.get("query", None))
 
-        if query:
-            messages.append({"role": "user", "content": query})
+        completion = self.client.chat.completions.create(
+            model=self.model, messages=messages
+        )
+        return self._response_text(completion)
+
+    def stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        messages = self._build_messages(prompt, kwargs.get("query", None))
+
+        chunks = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+        )
+        for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
 
-        try:
-            # Call the OpenAI API
-            completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        messages = self._build_messages(prompt, kwargs.get("query", None))
+
+        async with self.limiter.slot():
+            completion = await retry_with_backoff(
+                lambda: self.async_client.chat.completions.create(
+                    model=self.model, messages=messages
+                ),
+                LLM_MAX_RETRIES,
+                LLM_RETRY_BACKOFF_SECONDS,
+                is_transient_error,
+            )
+        return self._response_text(completion)
+
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        messages = self._build_messages(prompt, kwargs.get("query", None))
+
+        async with self.limiter.slot():
+            # Only opening the stream is retried; once text was sent to the client
+            # a retry would repeat it.
+            chunks = await retry_with_backoff(
+                lambda: self.async_client.chat.completions.create(
+                    model=self.model, messages=messages, stream=True
+                ),
+                LLM_MAX_RETRIES,
+                LLM_RETRY_BACKOFF_SECONDS,
+                is_transient_error,
             )
-            response = completion.choices[0].message.content
-            if not response:
-                raise Error("Error no response text from chatGPT")
-            return response
-        except Exception as e:
-            return f"Error: {e}"
\ No newline at end of file
+            async for chunk in chunks:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    def stats(self) -> Dict[str, float]:
+        return self.limiter.stats()
+
+    async def aclose(self) -> None:
+        await self.async_client.close()
+
+    @staticmethod
+    def _response_text(completion: Any) -> str:
+        response = completion.choices[0].message.content
+        if not response:
+            raise ValueError("Error no response text from chatGPT")
+        return response
+
+    @staticmethod
+    def _build_messages(prompt: str, query) -> List[Any]:
+        messages: List[Any] = [{"role": "system", "content": prompt}]
+
+        if query:
+            messages.append({"role": "user", "content": query})
+        return messages
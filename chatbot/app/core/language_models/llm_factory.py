@@ -1,13 +1,14 @@
 from app.core.language_models.llm_abstract import BaseLLM
-from app.core.language_models.llm_ollama import OllamaLLM
 from app.core.language_models.llm_chatgpt import ChatGPTLLM
+from app.core.language_models.llm_ollama import OllamaLLM
+from app.core.language_models.llm_router import create_routing_llm
 
 
 def get_llm_instance(llm_type: str, **kwargs) -> BaseLLM:
     """
     Factory function to create an instance of the requested LLM implementation.
 
-    :param llm_type: The type of LLM to instantiate (e.g., "openai", "ollama").
+    :param llm_type: The type of LLM to instantiate (e.g., "openai", "ollama", "router").
 
     :return: An instance of a class that implements BaseLLM.
     """
@@ -15,7 +16,11 @@ def get_llm_instance(llm_type: str, **kwargs) -> BaseLLM:
         return OllamaLLM()
     if llm_type == "openai":
         secrets_retriever = kwargs.get("secrets_retriever", None)
+        if secrets_retriever is None:
+            raise ValueError("The openai LLM needs a secrets_retriever")
         return ChatGPTLLM(secrets_retriever)
+    if llm_type == "router":
+        return create_routing_llm(lambda backend: get_llm_instance(backend, **kwargs))
     else:
         raise ValueError(f"Unsupported LLM type: {llm_type}")
 
@@ -1,25 +1,123 @@
+from typing import Any, AsyncIterator, Dict, Iterator, List
+
+import httpx
 import ollama
 
-from app.core.language_models.llm_abstract import BaseLLM
+from app.core.language_models.llm_abstract import (
+    LLM_CONNECT_TIMEOUT_SECONDS,
+    LLM_MAX_IN_FLIGHT,
+    LLM_MAX_RETRIES,
+    LLM_READ_TIMEOUT_SECONDS,
+    LLM_RETRY_BACKOFF_SECONDS,
+    BaseLLM,
+)
+from app.util.concurrency import InFlightLimiter, retry_with_backoff
 
 OLLAMA_MODEL = "llama2"
 
 
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Connection problems, timeouts, overload and server errors are worth retrying.
+    """
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, ollama.ResponseError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
 class OllamaLLM(BaseLLM):
+    # llama2 is trained with a 4k context; its tokenizer is not available locally,
+    # so prompt sizes use the length-based estimate of BaseLLM.
+    context_window = 4096
 
     def __init__(self):
         self.model = OLLAMA_MODEL
+        # Persistent clients reuse their HTTP connections across requests; the host
+        # comes from OLLAMA_HOST like for the module-level functions.
+        timeout = httpx.Timeout(
+            LLM_READ_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS
+        )
+        self.client = ollama.Client(timeout=timeout)
+        self.async_client = ollama.AsyncClient(timeout=timeout)
+        self.limiter = InFlightLimiter(LLM_MAX_IN_FLIGHT)
 
     def generate(self, prompt: str, **kwargs) -> str:
-        query = kwargs.get("query", None)
-        messages = [{"role": "user", "content": prompt}]
+        messages = self._build_messages(prompt, kwargs.get("query", None))
 
-        if query:
-            messages.append({"role": "user", "content": query})
+        response = self.client.chat(model=self.model, messages=messages)
+        return self._response_text(response)
+
+    def stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        messages = self._build_messages(prompt, kwargs.get("query", None))
+
+        for chunk in self.client.chat(model=self.model, messages=messages, stream=True):
+            if self._chunk_text(chunk):
+                yield self._chunk_text(chunk)
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        messages = self._build_messages(prompt, kwargs.get("query", None))
+
+        async with self.limiter.slot():
+            response = await retry_with_backoff(
+                lambda: self.async_client.chat(model=self.model, messages=messages),
+                LLM_MAX_RETRIES,
+                LLM_RETRY_BACKOFF_SECONDS,
+                is_transient_error,
+            )
+        return self._response_text(response)
 
-        response = ollama.chat(model=OLLAMA_MODEL, messages=messages)
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        messages = self._build_messages(prompt, kwargs.get("query", None))
 
+        async def open_stream():
+            # The request is only sent once the first chunk is awaited.
+            chunks = await self.async_client.chat(
+                model=self.model, messages=messages, stream=True
+            )
+            first = await anext(chunks, None)
+            return first, chunks
+
+        async with self.limiter.slot():
+            # Only opening the stream is retried; once text was sent to the client
+            # a retry would repeat it.
+            first, chunks = await retry_with_backoff(
+                open_stream,
+                LLM_MAX_RETRIES,
+                LLM_RETRY_BACKOFF_SECONDS,
+                is_transient_error,
+            )
+            if first is None:
+                return
+            if self._chunk_text(first):
+                yield self._chunk_text(first)
+            async for chunk in chunks:
+                if self._chunk_text(chunk):
+                    yield self._chunk_text(chunk)
+
+    def stats(self) -> Dict[str, float]:
+        return self.limiter.stats()
+
+    async def aclose(self) -> None:
+        await self.async_client.close()
+
+    @staticmethod
+    def _response_text(response: Any) -> str:
         if "message" in response and "content" in response["message"]:
             return response["message"]["content"]
-        else:
-            return "Sorry, I couldn't retrieve a valid response from the model."
+        raise ValueError("Error no response text from Ollama")
+
+    @staticmethod
+    def _chunk_text(chunk: Any) -> str:
+        if "message" in chunk and chunk["message"]["content"]:
+            return chunk["message"]["content"]
+        return ""
+
+    @staticmethod
+    def _build_messages(prompt: str, query) -> List[Dict[str, str]]:
+        messages = [{"role": "user", "content": prompt}]
+
+        if query:
+            messages.append({"role": "user", "content": query})
+        return messages
@@ -0,0 +1,372 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from collections.abc import AsyncGenerator
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from dotenv import load_dotenv
+
+from app.core.language_models.llm_abstract import BaseLLM
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# Backends of the "router" model type, in order of preference: primary first.
+LLM_ROUTER_BACKENDS = os.getenv("LLM_ROUTER_BACKENDS", "ollama,openai")
+# Hedge deadline used until the primary has LLM_ROUTER_MIN_SAMPLES latencies.
+LLM_ROUTER_HEDGE_DELAY_SECONDS = float(os.getenv("LLM_ROUTER_HEDGE_DELAY_SECONDS", 5))
+# Percentile of the primary's recent latencies used as hedge deadline; 0 keeps
+# the fixed LLM_ROUTER_HEDGE_DELAY_SECONDS.
+LLM_ROUTER_HEDGE_PERCENTILE = float(os.getenv("LLM_ROUTER_HEDGE_PERCENTILE", 95))
+LLM_ROUTER_HEDGE_MIN_DELAY_SECONDS = float(
+    os.getenv("LLM_ROUTER_HEDGE_MIN_DELAY_SECONDS", 0.5)
+)
+# Largest share of recent requests allowed to send a hedged request.
+LLM_ROUTER_HEDGE_BUDGET = float(os.getenv("LLM_ROUTER_HEDGE_BUDGET", 0.1))
+# Recent requests the latency, error and hedge statistics are computed over.
+LLM_ROUTER_WINDOW = int(os.getenv("LLM_ROUTER_WINDOW", 200))
+LLM_ROUTER_MIN_SAMPLES = int(os.getenv("LLM_ROUTER_MIN_SAMPLES", 20))
+# Error rate above which the primary is demoted behind a healthier backend.
+LLM_ROUTER_MAX_ERROR_RATE = float(os.getenv("LLM_ROUTER_MAX_ERROR_RATE", 0.5))
+
+# Latencies are tracked separately for whole responses and for the first chunk
+# of a stream, which is what a streaming hedge races on.
+_GENERATE = "generate"
+_FIRST_CHUNK = "first_chunk"
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Nearest-rank percentile of the values (0 for no values).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def _close(chunks: AsyncIterator[str]) -> None:
+    # Streams are async generators releasing their connection when closed.
+    if isinstance(chunks, AsyncGenerator):
+        await chunks.aclose()
+
+
+class _BackendStats:
+    """
+    Rolling latency and error statistics of one backend.
+    """
+
+    def __init__(self, window: int) -> None:
+        self.latencies: Dict[str, Deque[float]] = {
+            _GENERATE: deque(maxlen=window),
+            _FIRST_CHUNK: deque(maxlen=window),
+        }
+        self.outcomes: Deque[bool] = deque(maxlen=window)  # True for an error
+        self.requests = 0
+        self.errors = 0
+        self.wins = 0
+
+    def record(self, kind: str, seconds: float) -> None:
+        self.latencies[kind].append(seconds)
+
+    def record_outcome(self, error: bool) -> None:
+        self.requests += 1
+        self.errors += error
+        self.outcomes.append(error)
+
+    def error_rate(self) -> float:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+
+class RoutingLLM(BaseLLM):
+    """
+    Routes generations across several backends by their recent latency and errors.
+
+    Requests go to the primary backend. When it has not answered (or, for streams,
+    produced its first chunk) within a deadline derived from its recent latency
+    percentile, the same request is also sent to the next backend and the first
+    answer wins; the other request is cancelled. Hedges are capped to a share of
+    recent requests so a slow primary cannot double the load. A backend that fails
+    falls back to the next one, and a primary whose recent error rate is too high
+    is demoted behind a healthier backend until it recovers.
+    """
+
+    def __init__(
+        self,
+        backends: List[Tuple[str, BaseLLM]],
+        hedge_delay_seconds: float = LLM_ROUTER_HEDGE_DELAY_SECONDS,
+        hedge_percentile: float = LLM_ROUTER_HEDGE_PERCENTILE,
+        hedge_min_delay_seconds: float = LLM_ROUTER_HEDGE_MIN_DELAY_SECONDS,
+        hedge_budget: float = LLM_ROUTER_HEDGE_BUDGET,
+        window: int = LLM_ROUTER_WINDOW,
+        min_samples: int = LLM_ROUTER_MIN_SAMPLES,
+        max_error_rate: float = LLM_ROUTER_MAX_ERROR_RATE,
+    ):
+        """
+        :param backends: (name, model) pairs in order of preference.
+        :param hedge_delay_seconds: Hedge deadline until enough latencies are known.
+        :param hedge_percentile: Latency percentile used as hedge deadline, 0 for fixed.
+        :param hedge_min_delay_seconds: Lower bound of the learned deadline.
+        :param hedge_budget: Largest share of recent requests that may be hedged.
+        :param window: Recent requests the statistics are computed over.
+        :param min_samples: Samples needed before learned values are used.
+        :param max_error_rate: Error rate above which the primary is demoted.
+        """
+        if not backends:
+            raise ValueError("RoutingLLM needs at least one backend")
+        self.backends = backends
+        self.hedge_delay_seconds = hedge_delay_seconds
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay_seconds = hedge_min_delay_seconds
+        self.hedge_budget = hedge_budget
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self._stats = {name: _BackendStats(window) for name, _ in backends}
+        self._recent_hedges: Deque[bool] = deque(maxlen=window)
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+        # The prompt is sized once before routing, so it has to fit every backend.
+        self.context_window = min(model.context_window for _, model in backends)
+
+    def count_tokens(self, text: str) -> int:
+        return max(model.count_tokens(text) for _, model in self.backends)
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        # Blocking callers get fallback only; hedging needs the event loop.
+        error: Optional[Exception] = None
+        for name, model in self._order():
+            started = time.monotonic()
+            try:
+                response = model.generate(prompt, **kwargs)
+            except Exception as e:
+                self._stats[name].record_outcome(True)
+                logging.warning(f"LLM backend {name} failed: {e}")
+                error = error or e
+                continue
+            self._stats[name].record(_GENERATE, time.monotonic() - started)
+            self._stats[name].record_outcome(False)
+            self._stats[name].wins += 1
+            return response
+        # There is at least one backend, so reaching this point means one failed.
+        assert error is not None
+        raise error
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        async def start(model: BaseLLM) -> str:
+            return await model.agenerate(prompt, **kwargs)
+
+        _, response = await self._race(_GENERATE, start)
+        return response
+
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        async def start(model: BaseLLM) -> Tuple[Optional[str], AsyncIterator[str]]:
+            chunks = model.astream(prompt, **kwargs)
+            first = await anext(chunks, None)
+            return first, chunks
+
+        async def discard(opened: Tuple[Optional[str], AsyncIterator[str]]) -> None:
+            await _close(opened[1])
+
+        # The race is on the first chunk; the rest comes from the winner alone,
+        # since switching backends midway would repeat or garble text.
+        _, (first, chunks) = await self._race(_FIRST_CHUNK, start, discard)
+        try:
+            if first is None:
+                return
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await _close(chunks)
+
+    def hedge_delay(self, name: str, kind: str = _GENERATE) -> float:
+        """
+        Seconds to wait for the backend before hedging a request to the next one.
+        """
+        latencies = self._stats[name].latencies[kind]
+        if self.hedge_percentile <= 0 or len(latencies) < self.min_samples:
+            return self.hedge_delay_seconds
+        return max(
+            self.hedge_min_delay_seconds,
+            percentile(list(latencies), self.hedge_percentile),
+        )
+
+    def stats(self) -> Dict[str, float]:
+        stats: Dict[str, float] = {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "fallbacks": self.fallbacks,
+            "recent_hedge_rate": (
+                sum(self._recent_hedges) / len(self._recent_hedges)
+                if self._recent_hedges
+                else 0.0
+            ),
+        }
+        for name, model in self.backends:
+            backend_stats = self._stats[name]
+            for kind, latencies in backend_stats.latencies.items():
+                stats[f"{name}_{kind}_p50_seconds"] = percentile(list(latencies), 50)
+                stats[f"{name}_{kind}_p95_seconds"] = percentile(list(latencies), 95)
+            stats[f"{name}_requests"] = backend_stats.requests
+            stats[f"{name}_errors"] = backend_stats.errors
+            stats[f"{name}_wins"] = backend_stats.wins
+            stats[f"{name}_error_rate"] = backend_stats.error_rate()
+            for key, value in model.stats().items():
+                stats[f"{name}_{key}"] = value
+        return stats
+
+    async def aclose(self) -> None:
+        for _, model in self.backends:
+            await model.aclose()
+
+    def _order(self) -> List[Tuple[str, BaseLLM]]:
+        """
+        Backends in order of preference, the primary demoted while it is failing.
+        """
+        primary_name = self.backends[0][0]
+        primary_stats = self._stats[primary_name]
+        if (
+            len(self.backends) > 1
+            and len(primary_stats.outcomes) >= self.min_samples
+            and primary_stats.error_rate() > self.max_error_rate
+        ):
+            healthier = [
+                backend
+                for backend in self.backends[1:]
+                if self._stats[backend[0]].error_rate() < primary_stats.error_rate()
+            ]
+            if healthier:
+                return healthier + [
+                    backend for backend in self.backends if backend not in healthier
+                ]
+        return list(self.backends)
+
+    def _may_hedge(self) -> bool:
+        if not self._recent_hedges:
+            return self.hedge_budget > 0
+        return sum(self._recent_hedges) / len(self._recent_hedges) < self.hedge_budget
+
+    async def _race(
+        self,
+        kind: str,
+        start: Callable[[BaseLLM], Awaitable[T]],
+        discard: Optional[Callable[[T], Awaitable[None]]] = None,
+    ) -> Tuple[str, T]:
+        """
+        Run `start` on the preferred backend, hedging to and falling back on the next.
+
+        :param kind: Latency series the deadline is taken from and recorded into.
+        :param start: Starts the operation on a backend.
+        :param discard: Releases the result of a backend that finished but lost.
+        :return: Name of the winning backend and its result.
+        """
+        order = self._order()
+        remaining = list(order)
+        tasks: Dict[asyncio.Future, str] = {}
+        first_error: Optional[BaseException] = None
+        hedged = False
+
+        def launch() -> None:
+            name, model = remaining.pop(0)
+            tasks[asyncio.ensure_future(self._timed(name, kind, start(model)))] = name
+
+        launch()
+        pending = set(tasks)
+        try:
+            while pending:
+                deadline = None
+                if not hedged and remaining and len(pending) == 1 and self._may_hedge():
+                    deadline = self.hedge_delay(order[0][0], kind)
+                done, pending = await asyncio.wait(
+                    pending, timeout=deadline, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedged = True
+                    self.hedges += 1
+                    logging.info(
+                        f"LLM backend {order[0][0]} slower than {deadline:.2f}s, "
+                        f"hedging to {remaining[0][0]}"
+                    )
+                    launch()
+                    pending = {task for task in tasks if not task.done()}
+                    continue
+
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is not None:
+                    for task in done:
+                        if task is not winner and task.exception() is None and discard:
+                            await discard(task.result())
+                    name = tasks[winner]
+                    self._stats[name].wins += 1
+                    if hedged and name != order[0][0]:
+                        self.hedge_wins += 1
+                    return name, winner.result()
+
+                for task in done:
+                    logging.warning(
+                        f"LLM backend {tasks[task]} failed: {task.exception()}"
+                    )
+                    first_error = first_error or task.exception()
+                if not pending and remaining:
+                    self.fallbacks += 1
+                    launch()
+                    pending = {task for task in tasks if not task.done()}
+            # The loop only ends once every launched backend has failed.
+            assert first_error is not None
+            raise first_error
+        finally:
+            self._recent_hedges.append(hedged)
+            for task in pending:
+                task.cancel()
+            if pending:
+                results = await asyncio.gather(*pending, return_exceptions=True)
+                if discard:
+                    for result in results:
+                        if not isinstance(result, BaseException):
+                            await discard(result)
+
+    async def _timed(self, name: str, kind: str, operation: Awaitable[T]) -> T:
+        stats = self._stats[name]
+        started = time.monotonic()
+        try:
+            result = await operation
+        except asyncio.CancelledError:
+            # A cancelled loser took at least this long; leaving it out would bias
+            # the percentile towards the fast requests and hedge ever earlier.
+            stats.record(kind, time.monotonic() - started)
+            raise
+        except Exception:
+            stats.record_outcome(True)
+            raise
+        stats.record(kind, time.monotonic() - started)
+        stats.record_outcome(False)
+        return result
+
+
+def create_routing_llm(create_backend: Callable[[str], BaseLLM]) -> RoutingLLM:
+    """
+    Build the router over the backends listed in LLM_ROUTER_BACKENDS.
+
+    :param create_backend: Creates a backend from its model type.
+    :return: The routing model.
+    """
+    names = [name.strip() for name in LLM_ROUTER_BACKENDS.split(",") if name.strip()]
+    if "router" in names:
+        raise ValueError("LLM_ROUTER_BACKENDS cannot contain the router itself")
+    return RoutingLLM([(name, create_backend(name)) for name in names])
@@ -0,0 +1,133 @@
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from dotenv import load_dotenv
+
+from app.configurations.guidance_loader import get_category_map
+from app.core.language_models.llm_factory import construct_prompt
+
+load_dotenv()
+
+# Context tokens allowed per category; other categories use PROMPT_CONTEXT_TOKENS.
+PROMPT_CONTEXT_TOKENS = int(os.getenv("PROMPT_CONTEXT_TOKENS", 1000))
+PROMPT_CONTEXT_TOKENS_GUIDANCE = int(os.getenv("PROMPT_CONTEXT_TOKENS_GUIDANCE", 800))
+PROMPT_CONTEXT_TOKENS_RULES = int(os.getenv("PROMPT_CONTEXT_TOKENS_RULES", 1500))
+# Tokens of the context window kept free for the answer.
+PROMPT_RESPONSE_TOKENS = int(os.getenv("PROMPT_RESPONSE_TOKENS", 512))
+# A passage is truncated into the remaining budget only if at least this much is left.
+PROMPT_MIN_PASSAGE_TOKENS = int(os.getenv("PROMPT_MIN_PASSAGE_TOKENS", 32))
+
+CONTEXT_TOKEN_BUDGETS = {
+    "guidance": PROMPT_CONTEXT_TOKENS_GUIDANCE,
+    "rules": PROMPT_CONTEXT_TOKENS_RULES,
+}
+
+PASSAGE_SEPARATOR = "\n\n"
+
+
+@dataclass
+class BuiltPrompt:
+    """
+    A prompt assembled within its token budget, with the counts it produced.
+    """
+
+    prompt: str
+    prompt_tokens: int
+    context_tokens: int
+    context_budget: int
+    passages_used: int
+    passages_truncated: int
+    passages_dropped: int
+
+
+def context_budget(category: Any, context_window: int, fixed_tokens: int) -> int:
+    """
+    Context tokens allowed for a category, capped by what the model can still fit.
+
+    :param category: The retrieved category (topic id).
+    :param context_window: Context window of the model.
+    :param fixed_tokens: Tokens of the prompt template and the query.
+    :return: The token budget for the retrieved passages.
+    """
+    name = get_category_map().get(category, "")
+    budget = CONTEXT_TOKEN_BUDGETS.get(name, PROMPT_CONTEXT_TOKENS)
+    return max(0, min(budget, context_window - fixed_tokens - PROMPT_RESPONSE_TOKENS))
+
+
+def build_prompt(
+    category: Any,
+    passages: List[str],
+    count_tokens: Callable[[str], int],
+    context_window: int,
+    query: Optional[str] = None,
+) -> BuiltPrompt:
+    """
+    Assemble the prompt from the most relevant passages that fit the budget.
+
+    Passages are taken greedily in the given order (most relevant first). The
+    first one that does not fit is cut at a word boundary if enough budget is
+    left, and the rest are dropped.
+
+    :param category: The retrieved category (topic id).
+    :param passages: Retrieved passages, most relevant first.
+    :param count_tokens: Token counter of the target model.
+    :param context_window: Context window of the target model.
+    :param query: The user query, sent alongside the prompt.
+    :return: The prompt and its token counts.
+    """
+    fixed_tokens = count_tokens(construct_prompt(category, ""))
+    if query:
+        fixed_tokens += count_tokens(query)
+    budget = context_budget(category, context_window, fixed_tokens)
+    separator_tokens = count_tokens(PASSAGE_SEPARATOR)
+
+    selected: List[str] = []
+    used = 0
+    truncated = 0
+    for passage in passages:
+        cost = count_tokens(passage) + (separator_tokens if selected else 0)
+        if used + cost <= budget:
+            selected.append(passage)
+            used += cost
+            continue
+        remaining = budget - used - (separator_tokens if selected else 0)
+        if remaining >= PROMPT_MIN_PASSAGE_TOKENS:
+            cut = truncate_to_tokens(passage, remaining, count_tokens)
+            if cut:
+                selected.append(cut)
+                used += count_tokens(cut) + (
+                    separator_tokens if len(selected) > 1 else 0
+                )
+                truncated = 1
+        break
+
+    prompt = construct_prompt(category, PASSAGE_SEPARATOR.join(selected))
+    return BuiltPrompt(
+        prompt=prompt,
+        prompt_tokens=count_tokens(prompt) + (count_tokens(query) if query else 0),
+        context_tokens=used,
+        context_budget=budget,
+        passages_used=len(selected),
+        passages_truncated=truncated,
+        passages_dropped=len(passages) - len(selected),
+    )
+
+
+def truncate_to_tokens(
+    text: str, max_tokens: int, count_tokens: Callable[[str], int]
+) -> str:
+    """
+    Longest word-boundary prefix of the text within `max_tokens`.
+
+    Binary search over the word count, so it works with any token counter.
+    """
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:middle]) + " ...") <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low]) + " ..." if low else ""
@@ -0,0 +1,96 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from logging.config import dictConfig
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from app.configurations.logging_config import LOGGING_CONFIG
+
+dictConfig(LOGGING_CONFIG)
+
+T = TypeVar("T")
+
+
+@dataclass
+class LoadedModel:
+    """
+    A model held by the registry with the cost of loading it.
+    """
+
+    key: str
+    model: Any
+    load_seconds: float
+    resident_bytes: Optional[int]
+
+
+_models: Dict[str, LoadedModel] = {}
+_registry_lock = threading.Lock()
+_key_locks: Dict[str, threading.Lock] = {}
+
+
+def _resident_set_size() -> Optional[int]:
+    """
+    Current resident set size of the process in bytes, None if unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def get_or_load(key: str, loader: Callable[[], T]) -> T:
+    """
+    Return the model registered under `key`, loading it with `loader` on first use.
+
+    Every embedding model and NLP pipeline goes through here so seeding, ingestion
+    and chat share one copy per process. Concurrent callers of the same key wait
+    for the first load instead of loading their own.
+
+    Args:
+        key (str): Identifies the model, e.g. "sentence_transformer:<name>".
+        loader (Callable[[], T]): Builds the model when it is not loaded yet.
+
+    Returns:
+        T: The shared model instance.
+    """
+    loaded = _models.get(key)
+    if loaded is not None:
+        return loaded.model
+
+    with _registry_lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        loaded = _models.get(key)
+        if loaded is not None:
+            return loaded.model
+
+        rss_before = _resident_set_size()
+        started = time.perf_counter()
+        model = loader()
+        load_seconds = time.perf_counter() - started
+        rss_after = _resident_set_size()
+        resident_bytes = (
+            max(rss_after - rss_before, 0)
+            if rss_before is not None and rss_after is not None
+            else None
+        )
+
+        _models[key] = LoadedModel(key, model, load_seconds, resident_bytes)
+        size = (
+            f"{resident_bytes / (1024 * 1024):.1f} MiB"
+            if resident_bytes is not None
+            else "unknown size"
+        )
+        logging.info(f"Loaded model {key} in {load_seconds:.2f}s ({size} resident).")
+        return model
+
+
+def loaded_models() -> Dict[str, LoadedModel]:
+    """
+    Snapshot of the models loaded so far, keyed by registry key.
+    """
+    return dict(_models)
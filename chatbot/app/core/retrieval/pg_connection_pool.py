@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from logging.config import dictConfig
+from typing import Any, Dict, Iterator
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_UNKNOWN
+from psycopg2.extensions import connection as Connection
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+from app.configurations.logging_config import LOGGING_CONFIG
+
+dictConfig(LOGGING_CONFIG)
+
+# Errors after which a connection can no longer be trusted and must be replaced.
+BROKEN_CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class PGConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool with blocking checkout and health checks.
+
+    Every operation checks out its own connection, so concurrent requests and the
+    ingestion consumer no longer share one connection, and a failed transaction is
+    rolled back on the connection that caused it instead of poisoning later calls.
+    """
+
+    def __init__(
+        self,
+        min_size: int,
+        max_size: int,
+        checkout_timeout: float = 10.0,
+        health_check_interval: float = 30.0,
+        **connect_kwargs: Any,
+    ) -> None:
+        """
+        Args:
+            min_size (int): Connections opened eagerly and kept around.
+            max_size (int): Upper bound of simultaneously checked out connections.
+            checkout_timeout (float): Seconds to wait for a free connection.
+            health_check_interval (float): Idle seconds after which a connection
+                                           is pinged before being handed out.
+            connect_kwargs: Arguments forwarded to `psycopg2.connect`.
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self._pool = ThreadedConnectionPool(min_size, max_size, **connect_kwargs)
+        # ThreadedConnectionPool raises instead of waiting when exhausted.
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._last_used: Dict[int, float] = {}
+        self._in_use = 0
+        self._reconnects = 0
+
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        """
+        Check out a healthy connection for the duration of one operation.
+
+        The transaction is committed when the block exits normally and rolled back
+        otherwise. Connections that turn out to be broken are closed and replaced.
+        """
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise PoolError(
+                f"Timed out after {self.checkout_timeout}s waiting for a database connection"
+            )
+        conn = None
+        broken = False
+        try:
+            conn = self._checkout()
+            yield conn
+            conn.commit()
+        except Exception as e:
+            broken = isinstance(e, BROKEN_CONNECTION_ERRORS) or not self._rollback(conn)
+            raise
+        finally:
+            if conn is not None:
+                self._release(conn, broken or conn.closed != 0)
+            self._slots.release()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Current pool usage.
+        """
+        with self._lock:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "reconnects": self._reconnects,
+            }
+
+    def close(self) -> None:
+        self._pool.closeall()
+
+    def _checkout(self) -> Connection:
+        # A single retry is enough: a discarded connection is replaced by a fresh one.
+        for _ in range(2):
+            conn = self._pool.getconn()
+            if self._is_healthy(conn):
+                with self._lock:
+                    self._in_use += 1
+                return conn
+            logging.warning("Discarding broken database connection and reconnecting.")
+            self._discard(conn)
+        raise psycopg2.OperationalError(
+            "Could not obtain a healthy database connection"
+        )
+
+    def _is_healthy(self, conn: Connection) -> bool:
+        if (
+            conn.closed != 0
+            or conn.get_transaction_status() == TRANSACTION_STATUS_UNKNOWN
+        ):
+            return False
+        last_used = self._last_used.get(id(conn))
+        if (
+            last_used is not None
+            and time.monotonic() - last_used < self.health_check_interval
+        ):
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except BROKEN_CONNECTION_ERRORS:
+            return False
+
+    def _rollback(self, conn) -> bool:
+        if conn is None or conn.closed != 0:
+            return False
+        try:
+            conn.rollback()
+            return True
+        except BROKEN_CONNECTION_ERRORS:
+            return False
+
+    def _release(self, conn: Connection, broken: bool) -> None:
+        with self._lock:
+            self._in_use -= 1
+        if broken:
+            self._discard(conn)
+        else:
+            self._last_used[id(conn)] = time.monotonic()
+            self._pool.putconn(conn)
+
+    def _discard(self, conn: Connection) -> None:
+        self._last_used.pop(id(conn), None)
+        with self._lock:
+            self._reconnects += 1
+        self._pool.putconn(conn, close=True)
@@ -1,14 +1,87 @@
+import logging
 from abc import ABC, abstractmethod
-from typing import Any, List
+from dataclasses import dataclass
+from typing import Any, List, Optional
 
 import numpy as np
 
 
+@dataclass
+class SearchResult:
+    """
+    One record returned by a vector search, most similar first.
+    """
+
+    id: int
+    topic: int
+    info: str
+    similarity: float
+    # Game a rules chunk belongs to; None for guidance and legacy records.
+    game_name: Optional[str] = None
+
+
+@dataclass
+class VectorRecord:
+    """
+    One record to store: the text that was embedded, the information returned as
+    context, its embedding, topic and, for rules chunks, the game it belongs to.
+    """
+
+    text_to_embed: str
+    info: str
+    embeddings: np.ndarray
+    topic: int
+    game_name: Optional[str] = None
+
+
+class VectorSearchListener:
+    """
+    Receives notifications about changes to the stored records.
+    """
+
+    def on_data_changed(self, record_ids: Optional[List[int]]) -> None:
+        """
+        Called after records were inserted, updated or deleted.
+
+        :param record_ids: Ids of the changed records, or None if any record may have changed.
+        """
+        pass
+
+    def on_game_name_added(self, game_name: str) -> None:
+        """
+        Called after a new game name was stored.
+        """
+        pass
+
+
 class VectorSearch(ABC):
     """
     Abstract base class for vector search operations.
     """
 
+    # Minimum cosine similarity for the closest record to count as a known category.
+    similarity_threshold: float = 0.3
+
+    def __init__(self) -> None:
+        self._listeners: List[VectorSearchListener] = []
+
+    def add_listener(self, listener: VectorSearchListener) -> None:
+        self._listeners.append(listener)
+
+    def notify_data_changed(self, record_ids: Optional[List[int]] = None) -> None:
+        for listener in self._listeners:
+            try:
+                listener.on_data_changed(record_ids)
+            except Exception as e:
+                logging.error(f"Error notifying listener about data change: {e}")
+
+    def notify_game_name_added(self, game_name: str) -> None:
+        for listener in self._listeners:
+            try:
+                listener.on_game_name_added(game_name)
+            except Exception as e:
+                logging.error(f"Error notifying listener about new game name: {e}")
+
     @abstractmethod
     def connect(self) -> Any:
         pass
@@ -18,26 +91,114 @@ class VectorSearch(ABC):
         pass
 
     @abstractmethod
+    def upload_records(self, records: List[VectorRecord]) -> List[int]:
+        """
+        Upsert many records at once, keyed by their embedded text.
+
+        A record whose text is already stored replaces it when its info differs.
+
+        :param records: Records to store.
+        :return: Ids of the inserted or updated records.
+        :raises Exception: If the records could not be stored.
+        """
+        pass
+
+    @abstractmethod
+    def replace_game_records(
+        self, game_name: str, records: List[VectorRecord]
+    ) -> List[int]:
+        """
+        Upsert the records of a game and delete its records that are not among them.
+
+        An empty list changes nothing rather than deleting every record of the game.
+
+        :param game_name: The game the records belong to.
+        :param records: Every current record (chunk) of the game.
+        :return: Ids of the inserted, updated or deleted records.
+        :raises Exception: If the records could not be stored; nothing is changed then.
+        """
+        pass
+
+    @abstractmethod
+    def upload_game_names(self, game_names: List[str]) -> List[str]:
+        """
+        Store many game names at once, skipping known ones.
+
+        :param game_names: Game names to store.
+        :return: The game names that were not stored before.
+        :raises Exception: If the names could not be stored.
+        """
+        pass
+
     def upload_data(
         self, text_to_embed: str, info: str, embeddings: np.ndarray, topic: int
     ) -> None:
         """
         Upload 1 record in vector database.
         """
-        pass
+        self.upload_records([VectorRecord(text_to_embed, info, embeddings, topic)])
 
-    @abstractmethod
     def upload_game_name(self, game_name: str) -> None:
-        pass
+        self.upload_game_names([game_name])
 
     @abstractmethod
-    def find_closest_text(self, query_embedding: np.ndarray) -> str:
+    def search(
+        self, query_embedding: np.ndarray, k: int = 1, **kwargs
+    ) -> List[SearchResult]:
+        """
+        Retrieve the k records closest to the query in a single round-trip.
+
+        :param query_embedding: Embedding of the query, shape (dim,) or (1, dim).
+        :param k: Number of records to return.
+        :param kwargs: Backend-specific tuning (e.g. ef_search, probes for pgvector).
+        :return: Up to k results ordered by descending similarity.
+        """
         pass
 
     @abstractmethod
-    def get_category(self, query_embedding: np.ndarray) -> str:
+    def search_game_chunks(
+        self, query_embedding: np.ndarray, game_names: List[str], k: int = 1
+    ) -> List[SearchResult]:
+        """
+        Retrieve the k records of the given games closest to the query.
+
+        :param query_embedding: Embedding of the query, shape (dim,) or (1, dim).
+        :param game_names: Games whose records are searched.
+        :param k: Number of records to return.
+        :return: Up to k results ordered by descending similarity.
+        """
         pass
 
     @abstractmethod
     def get_all_board_game_names(self) -> List[str]:
         pass
+
+    def search_batch(
+        self, query_embeddings: np.ndarray, k: int = 1, **kwargs
+    ) -> List[List[SearchResult]]:
+        """
+        Retrieve the k closest records for each query.
+
+        The default implementation runs one search per query; backends override it
+        to answer the whole batch in one round-trip.
+
+        :param query_embeddings: Query embeddings, shape (n, dim).
+        :param k: Number of records to return per query.
+        :return: One result list per query, in input order.
+        """
+        return [self.search(embedding, k, **kwargs) for embedding in query_embeddings]
+
+    def get_category(self, query_embedding: np.ndarray) -> str:
+        return self.category_of(self.search(query_embedding, k=1))
+
+    def find_closest_text(self, query_embedding: np.ndarray) -> str:
+        results = self.search(query_embedding, k=1)
+        return results[0].info if results else ""
+
+    def category_of(self, results: List[SearchResult]) -> Any:
+        """
+        Category (topic) of the closest result, or "unknown" if nothing is similar enough.
+        """
+        if results and results[0].similarity > self.similarity_threshold:
+            return results[0].topic
+        return "unknown"
@@ -1,9 +1,18 @@
+from typing import Optional
+
+from app.core.embedding.embeddings_generator_abstract import EmbeddingGenerator
 from app.core.retrieval.vector_search_abstract import VectorSearch
+from app.core.retrieval.vs_in_memory import InMemoryVectorSearch
 from app.core.retrieval.vs_postgres_vector import PGVectorSearch
 
 
-def get_solution(solution_type: str = "pgvector") -> VectorSearch:
+def get_solution(
+    solution_type: str = "pgvector",
+    embedding_generator: Optional[EmbeddingGenerator] = None,
+) -> VectorSearch:
     if solution_type == "pgvector":
-        return PGVectorSearch()
+        return PGVectorSearch(embedding_generator)
+    if solution_type == "memory":
+        return InMemoryVectorSearch(embedding_generator)
     else:
         raise ValueError(f"Unknown vector search solution: {solution_type}")
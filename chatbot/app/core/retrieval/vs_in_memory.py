@@ -0,0 +1,476 @@
+import json
+import logging
+import os
+import threading
+from logging.config import dictConfig
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.configurations import guidance_loader
+from app.configurations.logging_config import LOGGING_CONFIG
+from app.core.embedding.embeddings_generator_abstract import EmbeddingGenerator
+from app.core.retrieval.vector_search_abstract import (
+    SearchResult,
+    VectorRecord,
+    VectorSearch,
+)
+
+dictConfig(LOGGING_CONFIG)
+
+load_dotenv()
+
+EMBEDDING_DIMENSION = 768
+# float16 halves memory at a small precision cost; scores are computed in float32.
+MEMORY_VECTOR_DTYPE = os.getenv("MEMORY_VECTOR_DTYPE", "float32")
+# Optional .npz snapshot the index is loaded from and persisted to after every change.
+MEMORY_VECTOR_STORE_PATH = os.getenv("MEMORY_VECTOR_STORE_PATH")
+# Load vector_data/game_names from Postgres at startup when no snapshot exists.
+MEMORY_VECTOR_HYDRATE_FROM_DB = (
+    os.getenv("MEMORY_VECTOR_HYDRATE_FROM_DB", "false").lower() == "true"
+)
+
+
+class InMemoryVectorSearch(VectorSearch):
+    """
+    Vector search over a contiguous NumPy matrix of L2-normalized embeddings.
+
+    Metadata lives in arrays parallel to the matrix rows, so top-k is one
+    matrix-vector product plus `argpartition`, without a network round-trip.
+    """
+
+    def __init__(
+        self, embedding_generator: Optional[EmbeddingGenerator] = None
+    ) -> None:
+        """
+        Args:
+            embedding_generator (Optional[EmbeddingGenerator]): Encodes the guidance
+                data at startup; without one the guidance data is not seeded.
+        """
+        super().__init__()
+        self.embedding_generator = embedding_generator
+        self.similarity_threshold: float = 0.3
+        self._lock = threading.Lock()
+        self._dtype = np.dtype(MEMORY_VECTOR_DTYPE)
+        self._matrix = np.empty((0, EMBEDDING_DIMENSION), dtype=self._dtype)
+        self._size = 0
+        self._ids: List[int] = []
+        self._topics: List[int] = []
+        self._texts: List[str] = []
+        self._infos: List[str] = []
+        # Content hash of seeded guidance rows, "" for any other row.
+        self._content_hashes: List[str] = []
+        # Game of each rules chunk, "" for any other row.
+        self._row_games: List[str] = []
+        # File hash and model name of the last guidance seeding.
+        self._seed_state: Dict[str, str] = {}
+        self._row_by_text: Dict[str, int] = {}
+        self._game_names: Dict[str, None] = {}
+        self._next_id = 1
+        try:
+            self.connect()
+            self.upload_guidance_data()
+        except Exception as e:
+            logging.error(f"Error during initialization: {e}")
+
+    def connect(self) -> "InMemoryVectorSearch":
+        if MEMORY_VECTOR_STORE_PATH and os.path.exists(MEMORY_VECTOR_STORE_PATH):
+            self.load(MEMORY_VECTOR_STORE_PATH)
+        elif MEMORY_VECTOR_HYDRATE_FROM_DB:
+            self.hydrate_from_postgres()
+        return self
+
+    def close(self) -> None:
+        self._persist()
+
+    def upload_records(self, records: List[VectorRecord]) -> List[int]:
+        with self._lock:
+            changed_ids = self._upsert_records(records)
+        logging.info(
+            f"Uploaded {len(records)} records, {len(changed_ids)} inserted or updated."
+        )
+        if changed_ids:
+            self._persist()
+            self.notify_data_changed(changed_ids)
+        return changed_ids
+
+    def replace_game_records(
+        self, game_name: str, records: List[VectorRecord]
+    ) -> List[int]:
+        if not records:
+            logging.warning(
+                f"No records of '{game_name}' given. Keeping the stored ones."
+            )
+            return []
+        texts = {record.text_to_embed for record in records}
+        with self._lock:
+            changed_ids = self._upsert_records(records)
+            kept = [
+                row
+                for row in range(self._size)
+                if self._row_games[row] != game_name or self._texts[row] in texts
+            ]
+            deleted_ids = [
+                self._ids[row]
+                for row in range(self._size)
+                if self._row_games[row] == game_name and self._texts[row] not in texts
+            ]
+            if deleted_ids:
+                self._compact(kept)
+        logging.info(
+            f"Stored {len(records)} records of '{game_name}': "
+            f"{len(changed_ids)} inserted or updated, {len(deleted_ids)} deleted."
+        )
+        if changed_ids or deleted_ids:
+            self._persist()
+            self.notify_data_changed(changed_ids + deleted_ids)
+        return changed_ids + deleted_ids
+
+    def upload_game_names(self, game_names: List[str]) -> List[str]:
+        with self._lock:
+            added_names = [
+                game_name
+                for game_name in dict.fromkeys(game_names)
+                if game_name not in self._game_names
+            ]
+            self._game_names.update(dict.fromkeys(added_names))
+        if added_names:
+            self._persist()
+        for game_name in added_names:
+            logging.info(f"New game '{game_name}' added successfully.")
+            self.notify_game_name_added(game_name)
+        return added_names
+
+    def search(
+        self, query_embedding: np.ndarray, k: int = 1, **kwargs
+    ) -> List[SearchResult]:
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query = query / norm
+
+        with self._lock:
+            if self._size == 0 or k <= 0:
+                return []
+            scores = self._matrix[: self._size].dot(query)
+            k = min(k, self._size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [self._to_search_result(row, scores[row]) for row in top]
+
+    def search_game_chunks(
+        self, query_embedding: np.ndarray, game_names: List[str], k: int = 1
+    ) -> List[SearchResult]:
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        if norm == 0 or k <= 0:
+            return []
+        query = query / norm
+
+        games = set(game_names)
+        with self._lock:
+            rows = np.array(
+                [row for row in range(self._size) if self._row_games[row] in games],
+                dtype=np.int64,
+            )
+            if len(rows) == 0:
+                return []
+            scores = self._matrix[rows].dot(query)
+            order = np.argsort(-scores)[:k]
+            return [self._to_search_result(rows[i], scores[i]) for i in order]
+
+    def search_batch(
+        self, query_embeddings: np.ndarray, k: int = 1, **kwargs
+    ) -> List[List[SearchResult]]:
+        queries: np.ndarray = np.asarray(query_embeddings, dtype=np.float32)
+        queries = queries.reshape(len(queries), -1)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            if self._size == 0 or k <= 0:
+                return [[] for _ in range(len(queries))]
+            # One matrix-matrix product for the whole batch: (rows, dim) x (dim, n).
+            scores = self._matrix[: self._size].dot(queries.T)
+            k = min(k, self._size)
+            top = np.argpartition(-scores, k - 1, axis=0)[:k]
+            batch = []
+            for column in range(len(queries)):
+                rows = top[:, column]
+                rows = rows[np.argsort(-scores[rows, column])]
+                batch.append(
+                    [
+                        self._to_search_result(row, scores[row, column])
+                        for row in rows
+                        if norms[column, 0] != 0
+                    ]
+                )
+            return batch
+
+    def get_all_board_game_names(self) -> List[str]:
+        with self._lock:
+            return list(self._game_names)
+
+    def upload_guidance_data(self) -> None:
+        """
+        Bring the guidance records (topic 1) in line with the guidance file.
+
+        Only entries whose content hash changed are embedded, and nothing is done
+        when the file and model match the state of the last seeding.
+        """
+        if self.embedding_generator is None:
+            logging.error(
+                "No embedding generator provided. Cannot upload guidance data."
+            )
+            return
+        try:
+            model_name = self.embedding_generator.model_name
+            seed_state = {
+                "file_hash": guidance_loader.guidance_file_hash(),
+                "model_name": model_name,
+            }
+            if self._seed_state == seed_state:
+                logging.info("Guidance data is up to date. Skipping seeding.")
+                return
+
+            informations, texts_to_embed = guidance_loader.seed_data()
+            entries = {
+                guidance_loader.content_hash(model_name, text, info): (text, info)
+                for info, text in zip(informations, texts_to_embed)
+            }
+            with self._lock:
+                stored_hashes = {
+                    self._content_hashes[row]
+                    for row in range(self._size)
+                    if self._topics[row] == 1
+                }
+            added = [
+                (digest, text, info)
+                for digest, (text, info) in entries.items()
+                if digest not in stored_hashes
+            ]
+            embeddings: Any = (
+                self.embedding_generator.generate_embeddings(
+                    [text for _, text, _ in added]
+                )
+                if added
+                else []
+            )
+
+            with self._lock:
+                kept = [
+                    row
+                    for row in range(self._size)
+                    if self._topics[row] != 1 or self._content_hashes[row] in entries
+                ]
+                removed = self._size - len(kept)
+                self._compact(kept)
+                for (digest, text, info), embedding in zip(added, embeddings):
+                    self._append(self._next_id, 1, text, info, embedding, digest)
+                    self._next_id += 1
+                self._seed_state = seed_state
+            self._persist()
+            logging.info(
+                f"Guidance seeding: {len(added)} records embedded, "
+                f"{removed} removed, {len(entries) - len(added)} unchanged."
+            )
+            if added or removed:
+                self.notify_data_changed()
+        except Exception as e:
+            logging.error(f"Error uploading guidance data: {e}")
+
+    def hydrate_from_postgres(self) -> None:
+        """
+        Load every record and game name from the pgvector tables.
+        """
+        # Imported lazily so the in-memory backend runs without a database driver.
+        import psycopg2
+
+        conn = psycopg2.connect(
+            dbname=os.getenv("DB_NAME"),
+            user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"),
+            host=os.getenv("DB_HOST"),
+            port=os.getenv("DB_PORT"),
+        )
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, topic, text, info, embeddings::text, content_hash, game_name
+                    FROM vector_data ORDER BY id;
+                    """)
+                rows = cursor.fetchall()
+                cursor.execute("SELECT name FROM game_names;")
+                game_names = [row[0] for row in cursor.fetchall()]
+                cursor.execute(
+                    "SELECT file_hash, model_name FROM seed_state WHERE name = %s;",
+                    (guidance_loader.GUIDANCE_SEED_NAME,),
+                )
+                seed_row = cursor.fetchone()
+        finally:
+            conn.close()
+
+        with self._lock:
+            self._compact([])
+            for record_id, topic, text, info, embeddings, digest, game_name in rows:
+                self._append(
+                    record_id,
+                    topic,
+                    text,
+                    info,
+                    np.array(json.loads(embeddings)),
+                    digest or "",
+                    game_name or "",
+                )
+            self._next_id = max([record_id for record_id, *_ in rows], default=0) + 1
+            self._game_names = dict.fromkeys(game_names)
+            self._seed_state = (
+                {"file_hash": seed_row[0], "model_name": seed_row[1]}
+                if seed_row
+                else {}
+            )
+        logging.info(f"Hydrated {len(rows)} records from PostgreSQL.")
+
+    def save(self, path: str) -> None:
+        """
+        Persist the index atomically to a .npz snapshot.
+        """
+        with self._lock:
+            arrays: Dict[str, Any] = {
+                "embeddings": self._matrix[: self._size],
+                "ids": np.array(self._ids, dtype=np.int64),
+                "topics": np.array(self._topics, dtype=np.int64),
+                "texts": np.array(self._texts, dtype=np.str_),
+                "infos": np.array(self._infos, dtype=np.str_),
+                "content_hashes": np.array(self._content_hashes, dtype=np.str_),
+                "row_games": np.array(self._row_games, dtype=np.str_),
+                "seed_state": np.array(json.dumps(self._seed_state)),
+                "game_names": np.array(list(self._game_names), dtype=np.str_),
+                "next_id": np.array(self._next_id, dtype=np.int64),
+            }
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> None:
+        with np.load(path) as data:
+            embeddings = data["embeddings"]
+            with self._lock:
+                self._matrix = np.ascontiguousarray(embeddings, dtype=self._dtype)
+                self._size = len(embeddings)
+                self._ids = data["ids"].tolist()
+                self._topics = data["topics"].tolist()
+                self._texts = data["texts"].tolist()
+                self._infos = data["infos"].tolist()
+                # Snapshots written before content hashing lack these entries;
+                # their guidance rows are then re-seeded once.
+                self._content_hashes = (
+                    data["content_hashes"].tolist()
+                    if "content_hashes" in data.files
+                    else [""] * self._size
+                )
+                self._row_games = (
+                    data["row_games"].tolist()
+                    if "row_games" in data.files
+                    else [""] * self._size
+                )
+                self._seed_state = (
+                    json.loads(str(data["seed_state"]))
+                    if "seed_state" in data.files
+                    else {}
+                )
+                self._row_by_text = {text: row for row, text in enumerate(self._texts)}
+                self._game_names = dict.fromkeys(data["game_names"].tolist())
+                self._next_id = int(data["next_id"])
+        logging.info(f"Loaded {self._size} records from {path}.")
+
+    def _persist(self) -> None:
+        if MEMORY_VECTOR_STORE_PATH:
+            try:
+                self.save(MEMORY_VECTOR_STORE_PATH)
+            except Exception as e:
+                logging.error(f"Error persisting in-memory vector data: {e}")
+
+    def _normalize(self, embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).astype(self._dtype)
+
+    def _append(
+        self,
+        record_id: int,
+        topic: int,
+        text: str,
+        info: str,
+        embedding: np.ndarray,
+        content_hash: str = "",
+        game_name: str = "",
+    ) -> None:
+        # Caller holds the lock. Capacity doubles so appends stay amortized O(dim).
+        if self._size == len(self._matrix):
+            grown = np.empty(
+                (max(16, 2 * self._size), EMBEDDING_DIMENSION), self._dtype
+            )
+            grown[: self._size] = self._matrix[: self._size]
+            self._matrix = grown
+        self._matrix[self._size] = self._normalize(embedding)
+        self._ids.append(record_id)
+        self._topics.append(topic)
+        self._texts.append(text)
+        self._infos.append(info)
+        self._content_hashes.append(content_hash)
+        self._row_games.append(game_name)
+        self._row_by_text[text] = self._size
+        self._size += 1
+
+    def _upsert_records(self, records: List[VectorRecord]) -> List[int]:
+        # Caller holds the lock. Returns the ids of inserted or updated rows.
+        changed_ids: List[int] = []
+        for record in records:
+            game_name = record.game_name or ""
+            row = self._row_by_text.get(record.text_to_embed)
+            if row is None:
+                record_id = self._next_id
+                self._append(
+                    record_id,
+                    record.topic,
+                    record.text_to_embed,
+                    record.info,
+                    record.embeddings,
+                    game_name=game_name,
+                )
+                self._next_id += 1
+            elif self._infos[row] != record.info or self._row_games[row] != game_name:
+                record_id = self._ids[row]
+                self._topics[row] = record.topic
+                self._infos[row] = record.info
+                self._row_games[row] = game_name
+                self._matrix[row] = self._normalize(record.embeddings)
+            else:
+                continue
+            if record_id not in changed_ids:
+                changed_ids.append(record_id)
+        return changed_ids
+
+    def _to_search_result(self, row: int, score: float) -> SearchResult:
+        return SearchResult(
+            id=self._ids[row],
+            topic=self._topics[row],
+            info=self._infos[row],
+            similarity=float(score),
+            game_name=self._row_games[row] or None,
+        )
+
+    def _compact(self, rows: List[int]) -> None:
+        # Caller holds the lock. Keeps only the given rows, in order.
+        self._matrix = np.ascontiguousarray(self._matrix[rows], dtype=self._dtype)
+        self._size = len(rows)
+        self._ids = [self._ids[row] for row in rows]
+        self._topics = [self._topics[row] for row in rows]
+        self._texts = [self._texts[row] for row in rows]
+        self._infos = [self._infos[row] for row in rows]
+        self._content_hashes = [self._content_hashes[row] for row in rows]
+        self._row_games = [self._row_games[row] for row in rows]
+        self._row_by_text = {text: row for row, text in enumerate(self._texts)}
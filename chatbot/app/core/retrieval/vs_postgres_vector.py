@@ -1,42 +1,92 @@
 import logging
 import os
 from logging.config import dictConfig
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
-import psycopg2
 from dotenv import load_dotenv
-from psycopg2.extensions import connection
-from psycopg2.extras import RealDictCursor, execute_batch
+from psycopg2.extras import RealDictCursor, execute_batch, execute_values
 
 from app.configurations import guidance_loader
 from app.configurations.logging_config import LOGGING_CONFIG
 from app.core.embedding.embeddings_generator_abstract import EmbeddingGenerator
-from app.core.embedding.embeddings_generator_factory import get_generator
-from app.core.retrieval.vector_search_abstract import VectorSearch
+from app.core.retrieval.pg_connection_pool import PGConnectionPool
+from app.core.retrieval.vector_search_abstract import (
+    SearchResult,
+    VectorRecord,
+    VectorSearch,
+)
 
 dictConfig(LOGGING_CONFIG)
 
 load_dotenv()
 
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", 10))
+DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", 30))
+
+# Approximate nearest neighbour index on vector_data.embeddings: hnsw, ivfflat or none.
+PGVECTOR_INDEX_TYPE = os.getenv("PGVECTOR_INDEX_TYPE", "hnsw").lower()
+PGVECTOR_HNSW_M = int(os.getenv("PGVECTOR_HNSW_M", 16))
+PGVECTOR_HNSW_EF_CONSTRUCTION = int(os.getenv("PGVECTOR_HNSW_EF_CONSTRUCTION", 64))
+# 0 derives the list count from the table size (rows / 1000, as pgvector recommends).
+PGVECTOR_IVFFLAT_LISTS = int(os.getenv("PGVECTOR_IVFFLAT_LISTS", 0))
+# IVFFlat centroids are computed from existing rows, so building it on a nearly
+# empty table gives poor recall.
+PGVECTOR_IVFFLAT_MIN_ROWS = int(os.getenv("PGVECTOR_IVFFLAT_MIN_ROWS", 1000))
+# Per-query recall/latency trade-off; unset keeps the server defaults.
+PGVECTOR_EF_SEARCH = os.getenv("PGVECTOR_EF_SEARCH")
+PGVECTOR_IVFFLAT_PROBES = os.getenv("PGVECTOR_IVFFLAT_PROBES")
+
+VECTOR_DATA_TEXT_INDEX_NAME = "vector_data_text_md5_key"
+
+VECTOR_INDEX_NAMES = {
+    "hnsw": "vector_data_embeddings_hnsw_idx",
+    "ivfflat": "vector_data_embeddings_ivfflat_idx",
+}
+
+
+def to_vector_literal(embedding: np.ndarray) -> str:
+    """
+    Serialize an embedding once into pgvector's text format ('[x1,x2,...]').
+    """
+    values = np.asarray(embedding, dtype=np.float32).ravel().tolist()
+    return "[" + ",".join(map(str, values)) + "]"
+
 
 class PGVectorSearch(VectorSearch):
-    def __init__(self) -> None:
-        self.connection: Optional[connection] = None  # Initialize as None
+    def __init__(
+        self, embedding_generator: Optional[EmbeddingGenerator] = None
+    ) -> None:
+        """
+        Args:
+            embedding_generator (Optional[EmbeddingGenerator]): Encodes the guidance
+                data at startup; without one the guidance data is not seeded.
+        """
+        super().__init__()
+        self.embedding_generator = embedding_generator
+        self.pool: Optional[PGConnectionPool] = None  # Initialize as None
         self.similarity_threshold: float = 0.3
-        self.generator_type: str = "sentence_transformer"
         try:
-            self.connection = self.connect()
-            if self.connection:  # Proceed only if connection is successful
+            self.pool = self.connect()
+            if self.pool:  # Proceed only if connection is successful
                 self.create_table()
                 self.create_game_names_table()
                 self.upload_guidance_data()
+                self.create_vector_index()
         except Exception as e:
             logging.error(f"Error during initialization: {e}")
 
-    def connect(self) -> connection:
+    def connect(self) -> PGConnectionPool:
+        if self.pool is not None:
+            return self.pool
         try:
-            conn = psycopg2.connect(
+            return PGConnectionPool(
+                min_size=DB_POOL_MIN_SIZE,
+                max_size=DB_POOL_MAX_SIZE,
+                checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT,
+                health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL,
                 dbname=os.getenv("DB_NAME"),
                 user=os.getenv("DB_USER"),
                 password=os.getenv("DB_PASSWORD"),
@@ -44,18 +94,15 @@ class PGVectorSearch(VectorSearch):
                 port=os.getenv("DB_PORT"),
             )
 
-            return conn
-
         except Exception as e:
             logging.error(f"Error connecting to PostgreSQL database: {e}")
             raise e
 
     def create_table(self) -> None:
-        if self.connection:
+        if self.pool:
             try:
-                with self.connection.cursor() as cursor:
-                    cursor.execute(
-                        """
+                with self.pool.connection() as conn, conn.cursor() as cursor:
+                    cursor.execute("""
                         CREATE EXTENSION IF NOT EXISTS vector;
                         CREATE TABLE IF NOT EXISTS vector_data (
                             id SERIAL PRIMARY KEY,
@@ -64,103 +111,392 @@ class PGVectorSearch(VectorSearch):
                             info TEXT,
                             embeddings VECTOR(768)
                         );
-                    """
-                    )
-                    self.connection.commit()
+                        ALTER TABLE vector_data
+                            ADD COLUMN IF NOT EXISTS content_hash TEXT;
+                        ALTER TABLE vector_data
+                            ADD COLUMN IF NOT EXISTS game_name TEXT;
+                        CREATE INDEX IF NOT EXISTS vector_data_game_name_idx
+                            ON vector_data (game_name);
+                        CREATE TABLE IF NOT EXISTS seed_state (
+                            name TEXT PRIMARY KEY,
+                            file_hash TEXT NOT NULL,
+                            model_name TEXT NOT NULL,
+                            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                        );
+                    """)
                     logging.info("Table create process")
+                self.create_text_unique_index()
             except Exception as e:
                 logging.error(f"Error creating table: {e}")
 
-    def upload_data(
-        self, text_to_embed: str, info: str, embeddings: np.ndarray, topic: int
-    ) -> None:
-        if self.connection:
-            try:
-                with self.connection.cursor() as cursor:
-                    # Check if the text already exists in the database
-                    check_sql = """
-                        SELECT COUNT(*)
-                        FROM vector_data
-                        WHERE text = %s;
+    def create_text_unique_index(self) -> None:
+        """
+        Make the embedded text the upsert key of vector_data, removing duplicates
+        left by the former check-then-insert uploads first.
+
+        The index is on md5(text) because rule texts can exceed the btree row limit.
+        """
+        if self.pool is None:
+            logging.error("Connection is not established. Cannot create text index.")
+            return
+        try:
+            with self.pool.connection() as conn, conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_advisory_xact_lock(hashtext(%(name)s));",
+                    {"name": VECTOR_DATA_TEXT_INDEX_NAME},
+                )
+                cursor.execute(
+                    "SELECT to_regclass(%(name)s);",
+                    {"name": VECTOR_DATA_TEXT_INDEX_NAME},
+                )
+                existing = cursor.fetchone()
+                if existing is not None and existing[0] is not None:
+                    return
+                cursor.execute("""
+                    DELETE FROM vector_data duplicate
+                    USING vector_data original
+                    WHERE md5(duplicate.text) = md5(original.text)
+                      AND duplicate.id > original.id;
+                    """)
+                logging.info(f"Removed {cursor.rowcount} duplicate vector_data rows.")
+                cursor.execute(f"""
+                    CREATE UNIQUE INDEX {VECTOR_DATA_TEXT_INDEX_NAME}
+                    ON vector_data (md5(text));
+                    """)
+        except Exception as e:
+            logging.error(f"Error creating unique text index: {e}")
+
+    def upload_records(self, records: List[VectorRecord]) -> List[int]:
+        if self.pool is None:
+            raise RuntimeError("Connection is not established. Cannot upload data.")
+
+        if not records:
+            return []
+        try:
+            with self.pool.connection() as conn, conn.cursor() as cursor:
+                changed_ids = self._upsert_records(cursor, records)
+            logging.info(
+                f"Uploaded {len(records)} records, {len(changed_ids)} inserted or updated."
+            )
+            if changed_ids:
+                self.notify_data_changed(changed_ids)
+            return changed_ids
+        except Exception as e:
+            logging.error(f"Error uploading data: {e}")
+            raise
+
+    def replace_game_records(
+        self, game_name: str, records: List[VectorRecord]
+    ) -> List[int]:
+        if not records:
+            # `text <> ALL('{}')` holds for every row, which would delete the game.
+            logging.warning(
+                f"No records of '{game_name}' given. Keeping the stored ones."
+            )
+            return []
+        if self.pool is None:
+            raise RuntimeError("Connection is not established. Cannot upload data.")
+
+        try:
+            with self.pool.connection() as conn, conn.cursor() as cursor:
+                changed_ids = self._upsert_records(cursor, records)
+                cursor.execute(
                     """
-                    cursor.execute(check_sql, (text_to_embed,))
-                    exists = cursor.fetchone()[0] > 0
-
-                    if exists:
-                        logging.info("Text already exists in the database. No action taken.")
-                    else:
-                        # Insert the data if the text does not exist
-                        sql = """
-                            INSERT INTO vector_data (topic, text, info, embeddings)
-                            VALUES (%s, %s, %s, %s);
-                        """
-                        data = [(topic, text_to_embed, info, embeddings.tolist())]
-                        execute_batch(cursor, sql, data)
-                        self.connection.commit()
-                        logging.info("Data uploaded successfully.")
-            except Exception as e:
-                logging.error(f"Error uploading data: {e}")
+                    DELETE FROM vector_data
+                    WHERE game_name = %(game_name)s AND text <> ALL(%(texts)s)
+                    RETURNING id;
+                    """,
+                    {
+                        "game_name": game_name,
+                        "texts": [record.text_to_embed for record in records],
+                    },
+                )
+                deleted_ids = [row[0] for row in cursor.fetchall()]
+            logging.info(
+                f"Stored {len(records)} records of '{game_name}': "
+                f"{len(changed_ids)} inserted or updated, {len(deleted_ids)} deleted."
+            )
+            if changed_ids or deleted_ids:
+                self.notify_data_changed(changed_ids + deleted_ids)
+            return changed_ids + deleted_ids
+        except Exception as e:
+            logging.error(f"Error uploading records of '{game_name}': {e}")
+            raise
+
+    @staticmethod
+    def _upsert_records(cursor, records: List[VectorRecord]) -> List[int]:
+        # One row per text: a statement may not update the same row twice.
+        rows = {
+            record.text_to_embed: (
+                record.topic,
+                record.text_to_embed,
+                record.info,
+                to_vector_literal(record.embeddings),
+                record.game_name,
+            )
+            for record in records
+        }
+        if not rows:
+            return []
+        changed = execute_values(
+            cursor,
+            """
+            INSERT INTO vector_data (topic, text, info, embeddings, game_name)
+            VALUES %s
+            ON CONFLICT ((md5(text))) DO UPDATE
+            SET topic = EXCLUDED.topic,
+                info = EXCLUDED.info,
+                embeddings = EXCLUDED.embeddings,
+                game_name = EXCLUDED.game_name
+            WHERE vector_data.info IS DISTINCT FROM EXCLUDED.info
+               OR vector_data.game_name IS DISTINCT FROM EXCLUDED.game_name
+            RETURNING id;
+            """,
+            list(rows.values()),
+            template="(%s, %s, %s, %s::vector, %s)",
+            page_size=len(rows),
+            fetch=True,
+        )
+        return [row[0] for row in changed]
+
+    def create_vector_index(self) -> None:
+        """
+        Create the configured ANN index on vector_data.embeddings and drop the other kind.
+        """
+        if self.pool is None:
+            logging.error("Connection is not established. Cannot create vector index.")
+            return
+        if (
+            PGVECTOR_INDEX_TYPE not in VECTOR_INDEX_NAMES
+            and PGVECTOR_INDEX_TYPE != "none"
+        ):
+            logging.error(f"Unknown vector index type: {PGVECTOR_INDEX_TYPE}")
+            return
 
-    def find_closest_text(self, query_embedding: np.ndarray) -> str:
-        if self.connection:
-            try:
-                with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
+        try:
+            with self.pool.connection() as conn, conn.cursor() as cursor:
+                for index_type, index_name in VECTOR_INDEX_NAMES.items():
+                    if index_type != PGVECTOR_INDEX_TYPE:
+                        cursor.execute(f"DROP INDEX IF EXISTS {index_name};")
+
+                if PGVECTOR_INDEX_TYPE == "hnsw":
                     cursor.execute(
-                        """
-                        SELECT id, topic, text, info, 1 - (embeddings <=> %s::vector) AS similarity
-                        FROM vector_data
-                        ORDER BY similarity DESC
-                        LIMIT 1;
-                    """,
-                        (query_embedding.tolist()),
+                        f"""
+                        CREATE INDEX IF NOT EXISTS {VECTOR_INDEX_NAMES["hnsw"]}
+                        ON vector_data USING hnsw (embeddings vector_cosine_ops)
+                        WITH (m = %s, ef_construction = %s);
+                        """,
+                        (PGVECTOR_HNSW_M, PGVECTOR_HNSW_EF_CONSTRUCTION),
                     )
-                    results = cursor.fetchall()
-                    return results[0]["info"]
-            except Exception as e:
-                print(f"Error finding closest text: {e}")
-        return ""
+                elif PGVECTOR_INDEX_TYPE == "ivfflat":
+                    cursor.execute("SELECT COUNT(*) FROM vector_data;")
+                    count = cursor.fetchone()
+                    rows = count[0] if count is not None else 0
+                    if rows < PGVECTOR_IVFFLAT_MIN_ROWS:
+                        logging.info(
+                            f"Skipping IVFFlat index: {rows} rows is below {PGVECTOR_IVFFLAT_MIN_ROWS}."
+                        )
+                        return
+                    lists = PGVECTOR_IVFFLAT_LISTS or max(1, rows // 1000)
+                    cursor.execute(
+                        f"""
+                        CREATE INDEX IF NOT EXISTS {VECTOR_INDEX_NAMES["ivfflat"]}
+                        ON vector_data USING ivfflat (embeddings vector_cosine_ops)
+                        WITH (lists = %s);
+                        """,
+                        (lists,),
+                    )
+                logging.info(f"Vector index '{PGVECTOR_INDEX_TYPE}' is in place.")
+        except Exception as e:
+            logging.error(f"Error creating vector index: {e}")
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        k: int = 1,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        **kwargs,
+    ) -> List[SearchResult]:
+        """
+        Top-k cosine search that orders by the raw distance operator so the ANN index is used.
+
+        Args:
+            query_embedding (np.ndarray): Embedding of the query.
+            k (int): Number of records to return.
+            ef_search (Optional[int]): HNSW candidate list size for this query.
+            probes (Optional[int]): IVFFlat lists probed for this query.
+        """
+        if self.pool is None:
+            logging.error("Connection is not established. Cannot search vector data.")
+            return []
 
-    def get_category(self, query_embedding: np.ndarray) -> str:
-        if self.connection is None:
-            logging.error("Connection is not established. Cannot create table.")
-            return "unknown"
+        try:
+            with self.pool.connection() as conn, conn.cursor(
+                cursor_factory=RealDictCursor
+            ) as cursor:
+                self._apply_search_settings(cursor, k, ef_search, probes)
+                cursor.execute(
+                    """
+                    SELECT id, topic, info, game_name,
+                           1 - (embeddings <=> %(query)s::vector) AS similarity
+                    FROM vector_data
+                    ORDER BY embeddings <=> %(query)s::vector
+                    LIMIT %(k)s;
+                """,
+                    {"query": to_vector_literal(query_embedding), "k": k},
+                )
+                results = [
+                    self._to_search_result(row)
+                    for row in cursor.fetchall()
+                    if row["similarity"] is not None
+                ]
+                if results:
+                    logging.debug(
+                        f"The cosine similarity to closest record: {results[0].similarity}"
+                    )
+                return results
+        except Exception as e:
+            logging.warning(f"Error searching vector data: {e}")
+            return []
 
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        k: int = 1,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        **kwargs,
+    ) -> List[List[SearchResult]]:
+        """
+        Top-k search for many queries in one statement, one index scan per query.
+        """
+        query_embeddings = np.asarray(query_embeddings)
+        batch: List[List[SearchResult]] = [[] for _ in range(len(query_embeddings))]
+        if self.pool is None:
+            logging.error("Connection is not established. Cannot search vector data.")
+            return batch
+        if not batch:
+            return batch
+
+        # Array literal of vectors, parsed element-wise by pgvector's input function.
+        queries = (
+            "{"
+            + ",".join(
+                f'"{to_vector_literal(embedding)}"' for embedding in query_embeddings
+            )
+            + "}"
+        )
         try:
-            query_embedding = np.array(query_embedding).ravel()
+            with self.pool.connection() as conn, conn.cursor(
+                cursor_factory=RealDictCursor
+            ) as cursor:
+                self._apply_search_settings(cursor, k, ef_search, probes)
+                cursor.execute(
+                    """
+                    SELECT query.ord, hit.id, hit.topic, hit.info, hit.game_name, hit.similarity
+                    FROM unnest(%(queries)s::vector[]) WITH ORDINALITY AS query(embedding, ord)
+                    CROSS JOIN LATERAL (
+                        SELECT id, topic, info, game_name,
+                               1 - (embeddings <=> query.embedding) AS similarity
+                        FROM vector_data
+                        ORDER BY embeddings <=> query.embedding
+                        LIMIT %(k)s
+                    ) AS hit
+                    ORDER BY query.ord, hit.similarity DESC;
+                """,
+                    {"queries": queries, "k": k},
+                )
+                for row in cursor.fetchall():
+                    if row["similarity"] is not None:
+                        batch[row["ord"] - 1].append(self._to_search_result(row))
+                return batch
+        except Exception as e:
+            logging.warning(f"Error searching vector data in batch: {e}")
+            return batch
+
+    def search_game_chunks(
+        self, query_embedding: np.ndarray, game_names: List[str], k: int = 1
+    ) -> List[SearchResult]:
+        """
+        Exact top-k search over the records of the given games.
+
+        A game has few chunks, so the game_name index narrows the scan and ordering
+        by the similarity expression (not the bare operator) keeps the ANN index,
+        which would filter after its candidate list, out of the plan.
+        """
+        if self.pool is None:
+            logging.error("Connection is not established. Cannot search vector data.")
+            return []
+        if not game_names:
+            return []
 
-            with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
+        try:
+            with self.pool.connection() as conn, conn.cursor(
+                cursor_factory=RealDictCursor
+            ) as cursor:
                 cursor.execute(
                     """
-                    SELECT topic, 1 - (embeddings <=> %s::vector) AS similarity
+                    SELECT id, topic, info, game_name,
+                           1 - (embeddings <=> %(query)s::vector) AS similarity
                     FROM vector_data
+                    WHERE game_name = ANY(%(game_names)s)
                     ORDER BY similarity DESC
-                    LIMIT 1;
+                    LIMIT %(k)s;
                 """,
-                    (query_embedding.tolist(),),
+                    {
+                        "query": to_vector_literal(query_embedding),
+                        "game_names": list(game_names),
+                        "k": k,
+                    },
                 )
+                return [
+                    self._to_search_result(row)
+                    for row in cursor.fetchall()
+                    if row["similarity"] is not None
+                ]
+        except Exception as e:
+            logging.warning(f"Error searching game chunks: {e}")
+            return []
 
-                result = cursor.fetchone()
-                category = "unknown"
+    def _apply_search_settings(
+        self, cursor, k: int, ef_search: Optional[int], probes: Optional[int]
+    ) -> None:
+        if ef_search is None and PGVECTOR_EF_SEARCH:
+            ef_search = int(PGVECTOR_EF_SEARCH)
+        if probes is None and PGVECTOR_IVFFLAT_PROBES:
+            probes = int(PGVECTOR_IVFFLAT_PROBES)
+
+        # Transaction-local settings, reset when the connection goes back to the pool.
+        if ef_search is not None:
+            # HNSW never returns more rows than its candidate list.
+            cursor.execute(
+                "SELECT set_config('hnsw.ef_search', %s, true);",
+                (str(max(ef_search, k)),),
+            )
+        if probes is not None:
+            cursor.execute(
+                "SELECT set_config('ivfflat.probes', %s, true);", (str(probes),)
+            )
 
-                if result and result["similarity"] is not None:
-                    print(
-                        f"The cosine similarity to closest category: {result['similarity']}"
-                    )
-                    if result["similarity"] > self.similarity_threshold:
-                        category = result["topic"]
-                return category
-        except Exception as e:
-            logging.warning(f"Error identifying category: {e}")
-            return "unknown"
+    @staticmethod
+    def _to_search_result(row) -> SearchResult:
+        return SearchResult(
+            id=row["id"],
+            topic=row["topic"],
+            info=row["info"],
+            similarity=row["similarity"],
+            game_name=row.get("game_name"),
+        )
 
     def contains_guidance_data(self) -> bool:
-        if self.connection is None:
+        if self.pool is None:
             logging.error(
                 "Connection is not established. Cannot identify guidance data presence."
             )
             return False
         try:
-            with self.connection.cursor() as cursor:
+            with self.pool.connection() as conn, conn.cursor() as cursor:
                 cursor.execute(
                     "SELECT COUNT(*) FROM vector_data WHERE topic = %s;", (1,)
                 )
@@ -174,112 +510,194 @@ class PGVectorSearch(VectorSearch):
             return False
 
     def upload_guidance_data(self) -> None:
-        if self.connection is None:
+        """
+        Bring the guidance records (topic 1) in line with the guidance file.
+
+        Only entries whose content hash changed are embedded and written, and the
+        whole step is skipped when the file and model match the stored seed state
+        and guidance rows exist. The embeddings are computed before a
+        transaction-scoped advisory lock is taken, so one replica writes while the
+        others wait briefly and then find nothing to do.
+        """
+        if self.pool is None:
             logging.error("Connection is not established. Cannot upload guidance data.")
             return
+        generator = self.embedding_generator
+        if generator is None:
+            logging.error(
+                "No embedding generator provided. Cannot upload guidance data."
+            )
+            return
 
         try:
-            embedding_generator: EmbeddingGenerator = get_generator(self.generator_type)
+            model_name = generator.model_name
+            file_hash = guidance_loader.guidance_file_hash()
+            if self._is_guidance_seeded(file_hash, model_name):
+                logging.info("Guidance data is up to date. Skipping seeding.")
+                return
+
             informations, texts_to_embed = guidance_loader.seed_data()
-            topics = [1] * len(informations)
-            embeddings = embedding_generator.generate_embeddings(texts_to_embed)
+            entries = {
+                guidance_loader.content_hash(model_name, text, info): (text, info)
+                for info, text in zip(informations, texts_to_embed)
+            }
+
+            # Embed before locking: encoding can take long and would stall the
+            # other replicas on the lock.
+            with self.pool.connection() as conn, conn.cursor() as cursor:
+                stored_before = {digest for _, digest in self._guidance_rows(cursor)}
+            embeddings = self._embed_guidance(
+                generator,
+                {
+                    digest: entry
+                    for digest, entry in entries.items()
+                    if digest not in stored_before
+                },
+            )
 
-            with self.connection.cursor() as cursor:
-                # Step 1: Create a temporary staging table
+            with self.pool.connection() as conn, conn.cursor() as cursor:
                 cursor.execute(
-                    """
-                    CREATE TEMP TABLE staging_vector_data (
-                        topic INT,
-                        text TEXT,
-                        info TEXT,
-                        embeddings VECTOR(768)
-                    );
-                    """
+                    "SELECT pg_advisory_xact_lock(hashtext(%(name)s));",
+                    {"name": f"seed:{guidance_loader.GUIDANCE_SEED_NAME}"},
                 )
-
-                # Step 2: Insert new guidance data into the staging table
-                staging_data = [
-                    (topic, text, info, embedding.tolist())
-                    for topic, text, info, embedding in zip(
-                        topics, texts_to_embed, informations, embeddings
-                    )
+                # Another replica may have finished seeding while this one waited.
+                if self._is_guidance_seeded(file_hash, model_name, cursor):
+                    logging.info("Guidance data was seeded concurrently. Skipping.")
+                    return
+
+                stored = self._guidance_rows(cursor)
+                stale_ids = [
+                    record_id for record_id, digest in stored if digest not in entries
+                ]
+                stored_hashes = {digest for _, digest in stored}
+                added = [
+                    (digest, text, info)
+                    for digest, (text, info) in entries.items()
+                    if digest not in stored_hashes
                 ]
-                execute_batch(
-                    cursor,
-                    """
-                    INSERT INTO staging_vector_data (topic, text, info, embeddings)
-                    VALUES (%s, %s, %s, %s);
-                    """,
-                    staging_data,
-                )
-
-                # Step 3: Delete records in `vector_data` that are not in the staging table
-                cursor.execute(
-                    """
-                    DELETE FROM vector_data
-                    WHERE info NOT IN (SELECT info FROM staging_vector_data) AND topic = 1;
-                    """
-                )
 
-                # Step 4: Update existing records in `vector_data`
-                cursor.execute(
-                    """
-                    UPDATE vector_data
-                    SET text = staging.text,
-                        embeddings = staging.embeddings
-                    FROM staging_vector_data staging
-                    WHERE vector_data.info = staging.info;
-                    """
+                if stale_ids:
+                    cursor.execute(
+                        "DELETE FROM vector_data WHERE id = ANY(%(ids)s);",
+                        {"ids": stale_ids},
+                    )
+                # Rows deleted by another writer since the first read are rare
+                # enough to embed under the lock.
+                embeddings.update(
+                    self._embed_guidance(
+                        generator,
+                        {
+                            digest: (text, info)
+                            for digest, text, info in added
+                            if digest not in embeddings
+                        },
+                    )
                 )
-
-                # Step 5: Insert new records from the staging table into `vector_data`
+                if added:
+                    execute_batch(
+                        cursor,
+                        """
+                        INSERT INTO vector_data (topic, text, info, embeddings, content_hash)
+                        VALUES (1, %s, %s, %s::vector, %s)
+                        ON CONFLICT ((md5(text))) DO UPDATE
+                        SET topic = EXCLUDED.topic,
+                            info = EXCLUDED.info,
+                            embeddings = EXCLUDED.embeddings,
+                            content_hash = EXCLUDED.content_hash;
+                        """,
+                        [
+                            (text, info, to_vector_literal(embeddings[digest]), digest)
+                            for digest, text, info in added
+                        ],
+                    )
                 cursor.execute(
                     """
-                    INSERT INTO vector_data (topic, text, info, embeddings)
-                    SELECT staging.topic, staging.text, staging.info, staging.embeddings
-                    FROM staging_vector_data staging
-                    LEFT JOIN vector_data ON vector_data.text = staging.text
-                    WHERE vector_data.text IS NULL;
-                    """
+                    INSERT INTO seed_state (name, file_hash, model_name, updated_at)
+                    VALUES (%(name)s, %(file_hash)s, %(model_name)s, now())
+                    ON CONFLICT (name) DO UPDATE
+                    SET file_hash = EXCLUDED.file_hash,
+                        model_name = EXCLUDED.model_name,
+                        updated_at = EXCLUDED.updated_at;
+                    """,
+                    {
+                        "name": guidance_loader.GUIDANCE_SEED_NAME,
+                        "file_hash": file_hash,
+                        "model_name": model_name,
+                    },
                 )
 
-                self.connection.commit()
-                logging.info(
-                    f"Uploaded {len(staging_data)} guidance records to the database."
-                )
+            logging.info(
+                f"Guidance seeding: {len(added)} records embedded, "
+                f"{len(stale_ids)} removed, {len(entries) - len(added)} unchanged."
+            )
+            if added or stale_ids:
+                self.notify_data_changed()
         except Exception as e:
             logging.error(f"Error uploading guidance data: {e}")
 
+    @staticmethod
+    def _guidance_rows(cursor) -> List[Tuple[int, str]]:
+        cursor.execute("SELECT id, content_hash FROM vector_data WHERE topic = 1;")
+        return cursor.fetchall()
+
+    @staticmethod
+    def _embed_guidance(
+        generator: EmbeddingGenerator, entries: Dict[str, Tuple[str, str]]
+    ) -> Dict[str, np.ndarray]:
+        if not entries:
+            return {}
+        embeddings = generator.generate_embeddings(
+            [text for text, _ in entries.values()]
+        )
+        return dict(zip(entries, embeddings))
+
+    def _is_guidance_seeded(self, file_hash: str, model_name: str, cursor=None) -> bool:
+        # The seed state alone is not trusted: the guidance rows may have been
+        # truncated or lost since it was written.
+        query = """
+            SELECT file_hash, model_name FROM seed_state
+            WHERE name = %(name)s
+              AND EXISTS (SELECT 1 FROM vector_data WHERE topic = 1 LIMIT 1);
+        """
+        params = {"name": guidance_loader.GUIDANCE_SEED_NAME}
+        if cursor is None:
+            if self.pool is None:
+                return False
+            with self.pool.connection() as conn, conn.cursor() as own_cursor:
+                own_cursor.execute(query, params)
+                row = own_cursor.fetchone()
+        else:
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+        return row is not None and tuple(row) == (file_hash, model_name)
+
     def create_game_names_table(self) -> None:
-        if self.connection is None:
+        if self.pool is None:
             logging.error(
                 "Connection is not established. Cannot create table game_names."
             )
             return
         try:
-            with self.connection.cursor() as cursor:
-                cursor.execute(
-                    """
+            with self.pool.connection() as conn, conn.cursor() as cursor:
+                cursor.execute("""
                     CREATE TABLE IF NOT EXISTS game_names (
                         id SERIAL PRIMARY KEY,
                         name TEXT NOT NULL UNIQUE
                     );
-                """
-                )
-                self.connection.commit()
+                """)
                 logging.info("Table 'game_names' created successfully.")
         except Exception as e:
             logging.error(f"Error creating game_names table: {e}")
 
     def get_all_board_game_names(self) -> List[str]:
-        if self.connection is None:
+        if self.pool is None:
             logging.error(
                 "Connection is not established. Cannot retrieve board game names."
             )
             return []
 
         try:
-            with self.connection.cursor() as cursor:
+            with self.pool.connection() as conn, conn.cursor() as cursor:
                 cursor.execute("SELECT name FROM game_names;")
                 rows = cursor.fetchall()
                 return [row[0] for row in rows]
@@ -288,39 +706,42 @@ class PGVectorSearch(VectorSearch):
             return []
 
     def close(self) -> None:
-        if self.connection is None:
+        if self.pool is None:
             logging.error(
                 "Connection was not established. Cannot close inexistent connection."
             )
             return
-        self.connection.close()
+        self.pool.close()
+        self.pool = None
 
-    def upload_game_name(self, game_name: str) -> None:
-        if self.connection is None:
-            logging.error("Connection is not established. Cannot upload game name.")
-            return
+    def upload_game_names(self, game_names: List[str]) -> List[str]:
+        if self.pool is None:
+            raise RuntimeError(
+                "Connection is not established. Cannot upload game name."
+            )
 
+        names = list(dict.fromkeys(game_names))
+        if not names:
+            return []
         try:
-            with self.connection.cursor() as cursor:
-                # Check if the game_name already exists
-                check_sql = """
-                    SELECT COUNT(*)
-                    FROM game_names
-                    WHERE name = %s;
-                """
-                cursor.execute(check_sql, (game_name,))
-                exists = cursor.fetchone()[0] > 0
-
-                if exists:
-                    logging.info(f"Game name '{game_name}' already exists. No action taken.")
-                else:
-                    # Insert the game_name if it doesn't exist
-                    insert_sql = """
-                        INSERT INTO game_names(name)
-                        VALUES (%s);
+            with self.pool.connection() as conn, conn.cursor() as cursor:
+                added = execute_values(
+                    cursor,
                     """
-                    cursor.execute(insert_sql, (game_name,))
-                    self.connection.commit()
-                    logging.info(f"New game '{game_name}' added successfully.")
+                    INSERT INTO game_names (name)
+                    VALUES %s
+                    ON CONFLICT (name) DO NOTHING
+                    RETURNING name;
+                    """,
+                    [(name,) for name in names],
+                    page_size=len(names),
+                    fetch=True,
+                )
+            added_names = [row[0] for row in added]
+            for game_name in added_names:
+                logging.info(f"New game '{game_name}' added successfully.")
+                self.notify_game_name_added(game_name)
+            return added_names
         except Exception as e:
             logging.error(f"Error uploading game name: {e}")
+            raise
@@ -1,22 +1,43 @@
 from fastapi import FastAPI
 
-from app.core.embedding.embeddings_generator_factory import get_generator
+from app.core.embedding.eg_batching import BatchingEmbeddingGenerator
+from app.core.embedding.eg_cached import CachedEmbeddingGenerator
+from app.core.embedding.eg_persistent import PersistentEmbeddingGenerator
+from app.core.embedding.embeddings_generator_factory import (
+    get_generator,
+    get_ingestion_generator,
+)
+from app.core.entity_extraction.entity_extractor_factory import (
+    get_entity_extractor as create_entity_extractor,
+)
 from app.core.language_models.llm_factory import get_llm_instance
 from app.core.retrieval.vector_search_factory import get_solution
+from app.services.game_index import GameNameIndex
+from app.services.response_cache import create_response_cache
 from app.services.secrets.retriever_factory import get_retriever_instance
+from app.services.single_flight import create_single_flight
+from app.util.concurrency import run_io_bound, shutdown_executors
+from app.util.metrics import clear_stats, register_stats
 
 # Global variables for dependencies
 vector_search = None
 embedding_generator = None
+ingestion_embedding_generator = None
 model = None
 secrets_retriever = None
+response_cache = None
+game_index = None
+entity_extractor = None
+single_flight = None
 
 
 async def init_dependencies(app: FastAPI, args):
     """
     Initialize dependencies with command-line arguments.
     """
-    global vector_search, embedding_generator, model, secrets_retriever
+    global vector_search, embedding_generator, ingestion_embedding_generator
+    global model, secrets_retriever, response_cache, game_index, entity_extractor
+    global single_flight
 
     # Use the parsed arguments to initialize dependencies
     search_type = args.search_type
@@ -24,40 +45,119 @@ async def init_dependencies(app: FastAPI, args):
     model_type = args.model_type
     secrets_type = args.secret_type
 
-    # Initialize Vector Search
-    vector_search = get_solution(search_type)
-    vector_search.connect()
-
     # Initialize Embedding Generator
     embedding_generator = get_generator(generator_type)
-    
+
+    # Separate micro-batcher over the same model for queue ingestion and seeding
+    ingestion_embedding_generator = get_ingestion_generator(generator_type)
+
+    # Initialize Vector Search
+    vector_search = get_solution(search_type, ingestion_embedding_generator)
+
     # Initialize secrets retriever
     secrets_retriever = get_retriever_instance(secrets_type)
 
     # Initialize Language Model
     model = get_llm_instance(model_type, secrets_retriever=secrets_retriever)
-    
-    
+
+    # Initialize response cache, invalidated whenever the vector data changes
+    response_cache = create_response_cache()
+    if response_cache is not None:
+        vector_search.add_listener(response_cache)
+
+    # Initialize known game index, updated whenever a game name is uploaded
+    game_index = GameNameIndex()
+    game_index.refresh(vector_search.get_all_board_game_names)
+    vector_search.add_listener(game_index)
+
+    # Initialize game name extractor, backed by the game index
+    entity_extractor = create_entity_extractor(args.entity_extractor, game_index)
+
+    # Initialize request coalescer, sharing one generation between identical questions
+    single_flight = create_single_flight()
+
+    _register_metrics()
+
     # Store in app state for centralized access
     app.state.vector_search = vector_search
     app.state.embedding_generator = embedding_generator
+    app.state.ingestion_embedding_generator = ingestion_embedding_generator
     app.state.model = model
     app.state.secrets_retriever = secrets_retriever
+    app.state.response_cache = response_cache
+    app.state.game_index = game_index
+    app.state.entity_extractor = entity_extractor
+    app.state.single_flight = single_flight
 
 
 async def shutdown_dependencies(app: FastAPI):
     """
     Shutdown dependencies and release resources.
     """
-    global vector_search, embedding_generator, model, secrets_retriever
+    global vector_search, embedding_generator, ingestion_embedding_generator
+    global model, secrets_retriever, response_cache, game_index, entity_extractor
+    global single_flight
 
     if vector_search:
         vector_search.close()
         vector_search = None
 
+    # Closing joins the batching workers, which finish their current batch first.
+    for generator in (embedding_generator, ingestion_embedding_generator):
+        await run_io_bound(_close_batchers, generator)
+
+    if model:
+        await model.aclose()
+
     embedding_generator = None
+    ingestion_embedding_generator = None
     model = None
     secrets_retriever = None
+    response_cache = None
+    game_index = None
+    entity_extractor = None
+    single_flight = None
+
+    clear_stats()
+    shutdown_executors()
+
+
+def _close_batchers(generator):
+    """
+    Stop the batching workers in the wrapper chain of an embedding generator.
+    """
+    while generator is not None:
+        if isinstance(generator, BatchingEmbeddingGenerator):
+            generator.close()
+        generator = getattr(generator, "generator", None)
+
+
+def _register_metrics():
+    """
+    Expose the counters of the initialized components on /metrics.
+    """
+    for prefix, generator in (
+        ("embedding", embedding_generator),
+        ("ingestion_embedding", ingestion_embedding_generator),
+    ):
+        # Walk the wrapper chain built by the embedding generator factory.
+        while generator is not None:
+            if isinstance(generator, CachedEmbeddingGenerator):
+                register_stats(f"{prefix}_cache", generator.stats)
+            elif isinstance(generator, BatchingEmbeddingGenerator):
+                register_stats(f"{prefix}_batcher", generator.stats)
+            elif isinstance(generator, PersistentEmbeddingGenerator):
+                register_stats(f"{prefix}_store", generator.stats)
+            generator = getattr(generator, "generator", None)
+
+    pool = getattr(vector_search, "pool", None)
+    if pool is not None:
+        register_stats("db_pool", pool.stats)
+    register_stats("llm", model.stats)
+    if response_cache is not None:
+        register_stats("response_cache", response_cache.stats)
+    if single_flight is not None:
+        register_stats("single_flight", single_flight.stats)
 
 
 def get_vector_search():
@@ -93,4 +193,27 @@ def get_secrets_retriever():
     """
     if not secrets_retriever:
         raise RuntimeError("Secrets retriever not initialized")
-    return secrets_retriever
\ No newline at end of file
+    return secrets_retriever
+
+
+def get_response_cache():
+    """
+    Dependency for the semantic response cache (None when disabled).
+    """
+    return response_cache
+
+
+def get_entity_extractor():
+    """
+    Dependency for the game name extractor.
+    """
+    if entity_extractor is None:
+        raise RuntimeError("Entity extractor not initialized")
+    return entity_extractor
+
+
+def get_single_flight():
+    """
+    Dependency for the request coalescer (None when disabled).
+    """
+    return single_flight
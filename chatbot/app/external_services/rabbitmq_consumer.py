@@ -1,18 +1,24 @@
 import asyncio
 import json
-from logging.config import dictConfig
-import os
 import logging
+import os
+import time
+from logging.config import dictConfig
+from typing import Awaitable, Callable, Dict
 
 from aio_pika import connect
+from aio_pika.abc import AbstractIncomingMessage
 from dotenv import load_dotenv
+from pydantic import ValidationError
 
 from app.configurations.guidance_loader import get_rules_category
+from app.configurations.logging_config import LOGGING_CONFIG
 from app.core.embedding.embeddings_generator_abstract import EmbeddingGenerator
-from app.core.retrieval.vector_search_abstract import VectorSearch
+from app.core.retrieval.vector_search_abstract import VectorRecord, VectorSearch
 from app.external_services.event_model import GameAddedEvent
-from app.services.game_query_generator import generate_example_queries
-from app.configurations.logging_config import LOGGING_CONFIG
+from app.services.rules_chunking import chunk_rules
+from app.util.concurrency import run_io_bound
+from app.util.metrics import INGESTION_MESSAGE_SECONDS, stage_timer
 
 dictConfig(LOGGING_CONFIG)
 
@@ -24,9 +30,13 @@ RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "localhost")
 RABBITMQ_PORT = int(os.getenv("RABBITMQ_PORT", 5672))
 RABBITMQ_USER = os.getenv("RABBITMQ_USER", "guest")
 RABBITMQ_PASSWORD = os.getenv("RABBITMQ_PASSWORD", "guest")
+# Unacknowledged messages the broker delivers ahead of processing.
+RABBITMQ_PREFETCH_COUNT = int(os.getenv("RABBITMQ_PREFETCH_COUNT", 16))
+# Messages of one queue handled at the same time; their embeddings share batches.
+RABBITMQ_HANDLER_CONCURRENCY = int(os.getenv("RABBITMQ_HANDLER_CONCURRENCY", 8))
 
 # Dictionary to store queue handlers
-queue_handlers = {}
+queue_handlers: Dict[str, Callable[..., Awaitable[None]]] = {}
 
 
 async def register_queue_listener(queue_name, handler):
@@ -40,16 +50,54 @@ async def register_queue_listener(queue_name, handler):
     )
     async with connection:
         channel = await connection.channel()
+        await channel.set_qos(prefetch_count=RABBITMQ_PREFETCH_COUNT)
         queue = await channel.declare_queue(queue_name, durable=True)
 
-        async with queue.iterator() as queue_iter:
-            async for message in queue_iter:
-                async with message.process():
-                    try:
-                        event_data = json.loads(message.body)
-                        await handler(event_data)
-                    except Exception as e:
-                        print(f"Error processing message from {queue_name}: {e}")
+        # Up to RABBITMQ_HANDLER_CONCURRENCY messages are handled at once; each
+        # is acknowledged on its own once its handler has committed.
+        slots = asyncio.Semaphore(RABBITMQ_HANDLER_CONCURRENCY)
+        in_flight = set()
+        try:
+            async with queue.iterator() as queue_iter:
+                async for message in queue_iter:
+                    await slots.acquire()
+                    task = asyncio.create_task(
+                        _handle_message(queue_name, message, handler)
+                    )
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+                    task.add_done_callback(lambda _: slots.release())
+        finally:
+            # Unacknowledged messages are redelivered once the channel closes.
+            for task in in_flight:
+                task.cancel()
+
+
+async def _handle_message(queue_name, message: AbstractIncomingMessage, handler):
+    """
+    Run the handler for one message, acking on success.
+
+    Malformed messages are acknowledged and dropped; a failed handler rejects the
+    message, requeueing it once for a retry.
+    """
+    started = time.monotonic()
+    outcome = "processed"
+    try:
+        async with message.process(requeue=not message.redelivered):
+            try:
+                event_data = json.loads(message.body)
+            except json.JSONDecodeError as e:
+                logging.error(f"Dropping malformed message from {queue_name}: {e}")
+                outcome = "malformed"
+                return
+            await handler(event_data)
+    except Exception as e:
+        outcome = "failed"
+        logging.error(f"Error processing message from {queue_name}: {e}")
+    finally:
+        INGESTION_MESSAGE_SECONDS.labels(queue=queue_name, outcome=outcome).observe(
+            time.monotonic() - started
+        )
 
 
 def add_queue_handler(queue_name, handler):
@@ -77,26 +125,41 @@ async def process_game_added_event(
 ):
     """
     Process the GameAddedEvent and extract the game name and rules.
+
+    The embedding and database writes run off the event loop. Concurrent events
+    share a forward pass through the generator's micro-batcher. Returns once the
+    rules are stored, so the message is only acknowledged after the commit.
     """
     try:
         event = GameAddedEvent(**event_data)
-        rules = event.rules
+    except ValidationError as e:
+        logging.error(f"Error parsing GameAddedEvent: {e}")
+        return
 
-        text = f"Rules for {event.gameName}: {' '.join([' '.join([rule.rule, rule.description]) for rule in rules])}"
-        text_to_embed = " ".join(
-            [query for query in generate_example_queries(event.gameName)]
-        )
-
-        embedding = embedding_generator.generate_embeddings([text_to_embed])
+    chunks = chunk_rules(event)
 
-        vector_search.upload_data(
-            text_to_embed=text_to_embed,
-            info=text,
-            embeddings=embedding[0],
-            topic=get_rules_category(),
+    # The batcher encodes on its own thread; the event awaits its batch without
+    # occupying an executor thread.
+    with stage_timer("ingestion_embedding"):
+        embeddings = await embedding_generator.agenerate_embeddings(
+            [chunk.text_to_embed for chunk in chunks]
         )
-        vector_search.upload_game_name(event.gameName)
-        logging.info(f"New game {event.gameName} rules have been added")
 
-    except Exception as e:
-        print(f"Error parsing GameAddedEvent: {e}")
+    # Chunks of rules removed since the last publication are deleted.
+    with stage_timer("ingestion_store"):
+        await run_io_bound(
+            vector_search.replace_game_records,
+            event.gameName,
+            [
+                VectorRecord(
+                    text_to_embed=chunk.text_to_embed,
+                    info=chunk.info,
+                    embeddings=embedding,
+                    topic=get_rules_category(),
+                    game_name=event.gameName,
+                )
+                for chunk, embedding in zip(chunks, embeddings)
+            ],
+        )
+        await run_io_bound(vector_search.upload_game_name, event.gameName)
+    logging.info(f"New game {event.gameName} rules have been added")
@@ -1,12 +1,13 @@
 import argparse
 import asyncio
-from contextlib import asynccontextmanager
-from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
 import os
+import time
+from contextlib import asynccontextmanager
 
 import uvicorn
-from fastapi import FastAPI
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
 
 from app.dependencies import init_dependencies, shutdown_dependencies
 from app.external_services.rabbitmq_consumer import (
@@ -14,7 +15,12 @@ from app.external_services.rabbitmq_consumer import (
     process_game_added_event,
     start_all_queue_listeners,
 )
+from app.routers.admin import admin_router
 from app.routers.chat import chat_router
+from app.routers.metrics import metrics_router
+from app.util.admin import ADMIN_TOKEN_HEADER, is_admin_token
+from app.util.metrics import HTTP_REQUEST_SECONDS
+from app.util.profiling import server_timing_header, start_request_timing
 
 load_dotenv()
 
@@ -23,13 +29,14 @@ GAMEPLATFORM_URL = os.getenv("GAMEPLATFORM_URL")
 if not GAMEPLATFORM_URL:
     raise ValueError("GAMEPLATFORM_URL environment variable is not set or empty.")
 
+
 def parse_args():
     parser = argparse.ArgumentParser(description="RAG Chatbot Microservice")
     parser.add_argument(
         "--search_type",
         type=str,
         required=True,
-        help="Type of vector search (e.g., pgvector)",
+        help="Type of vector search (e.g., pgvector, memory)",
     )
     parser.add_argument(
         "--generator_type",
@@ -41,7 +48,7 @@ def parse_args():
         "--model_type",
         type=str,
         required=True,
-        help="Type of model for RAG (e.g., ollama)",
+        help="Type of model for RAG (e.g., ollama, openai, router)",
     )
     parser.add_argument(
         "--secret_type",
@@ -49,6 +56,12 @@ def parse_args():
         required=True,
         help="Type of secrets retriever (e.g., local, gcloud)",
     )
+    parser.add_argument(
+        "--entity_extractor",
+        type=str,
+        default="gazetteer",
+        help="Game name extractor (e.g., gazetteer, stanza, gazetteer+stanza)",
+    )
     return parser.parse_args()
 
 
@@ -61,11 +74,13 @@ async def lifespan(app: FastAPI):
     await init_dependencies(app, args)
 
     vector_search = app.state.vector_search
-    embedding_generator = app.state.embedding_generator
+    ingestion_embedding_generator = app.state.ingestion_embedding_generator
     secrets_retriever = app.state.secrets_retriever
     add_queue_handler(
         "new_rules_queue",
-        lambda data: process_game_added_event(data, vector_search, embedding_generator),
+        lambda data: process_game_added_event(
+            data, vector_search, ingestion_embedding_generator
+        ),
     )
     rabbitmq_task = asyncio.create_task(start_all_queue_listeners())
 
@@ -82,14 +97,57 @@ app = FastAPI(lifespan=lifespan, strict_slashes=False)
 # Add CORS Middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[GAMEPLATFORM_URL],  
+    allow_origins=[GAMEPLATFORM_URL],
     allow_credentials=True,
-    allow_methods=["POST"], 
-    allow_headers=["*"],  
+    allow_methods=["POST"],
+    allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def observe_request_latency(request: Request, call_next):
+    """
+    Record the latency of every request, labelled by the endpoint that served it.
+    """
+    started = time.monotonic()
+    response = await call_next(request)
+    # Endpoint names keep the label set bounded, unlike raw request paths.
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.labels(
+        endpoint=route.name if route is not None else "unmatched",
+        status=response.status_code,
+    ).observe(time.monotonic() - started)
+    return response
+
+
+@app.middleware("http")
+async def add_server_timing(request: Request, call_next):
+    """
+    Return a per-stage `Server-Timing` breakdown to admins who ask for it with a
+    `Server-Timing` request header or a `server_timing` query flag.
+
+    Other requests only pay for the header checks. Streams report the stages
+    run before the first byte.
+    """
+    wanted = (
+        "server-timing" in request.headers or "server_timing" in request.query_params
+    )
+    if not wanted or not is_admin_token(request.headers.get(ADMIN_TOKEN_HEADER)):
+        return await call_next(request)
+
+    started = time.monotonic()
+    timings = start_request_timing()
+    response = await call_next(request)
+    response.headers["Server-Timing"] = server_timing_header(
+        timings, time.monotonic() - started
+    )
+    return response
+
+
 # Include routers
 app.include_router(chat_router, prefix="/chat", tags=["Chat"])
+app.include_router(metrics_router, prefix="/metrics", tags=["Metrics"])
+app.include_router(admin_router, prefix="/admin", tags=["Admin"])
 
 # If running the app directly
 if __name__ == "__main__":
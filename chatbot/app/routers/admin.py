@@ -0,0 +1,44 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.util.admin import ADMIN_TOKEN, is_admin_token
+from app.util.profiling import PROFILER_MAX_SECONDS, SamplingProfiler
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Dependency rejecting requests without the admin token.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+admin_router = APIRouter(dependencies=[Depends(require_admin)])
+
+profiler = SamplingProfiler()
+
+
+@admin_router.post("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10, gt=0, le=PROFILER_MAX_SECONDS),
+    format: str = Query("summary", pattern="^(summary|collapsed)$"),
+):
+    """
+    Sample the stacks of all threads for `seconds` while traffic is served.
+
+    Returns the functions with the most samples, or with `format=collapsed` the
+    stacks in the input format of flamegraph.pl and speedscope.
+    """
+    # Sampled on a thread of its own: the loop keeps serving the traffic being
+    # profiled, and the app's I/O workers stay free.
+    report = await asyncio.to_thread(profiler.run, seconds)
+    if report is None:
+        raise HTTPException(
+            status_code=409, detail="A profiling session is already running"
+        )
+    return report.collapsed() if format == "collapsed" else report.summary()
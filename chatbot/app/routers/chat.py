@@ -1,8 +1,30 @@
+import json
+import logging
+import os
+from typing import List, Optional
+
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.dependencies import (
+    get_embedding_generator,
+    get_entity_extractor,
+    get_model,
+    get_response_cache,
+    get_secrets_retriever,
+    get_single_flight,
+    get_vector_search,
+)
+from app.services.rag_pipeline import (
+    prepare_answer,
+    rag_pipeline,
+    rag_pipeline_batch,
+    stream_answer,
+)
 
-from app.dependencies import get_embedding_generator, get_model, get_secrets_retriever, get_vector_search
-from app.services.rag_pipeline import rag_pipeline
+# Maximum number of questions accepted by one /chat/batch request.
+CHAT_BATCH_MAX_SIZE = int(os.getenv("CHAT_BATCH_MAX_SIZE", 64))
 
 
 class QueryRequest(BaseModel):
@@ -13,6 +35,19 @@ class QueryResponse(BaseModel):
     response: str
 
 
+class BatchQueryRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=CHAT_BATCH_MAX_SIZE)
+
+
+class BatchQueryResult(BaseModel):
+    response: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchQueryResponse(BaseModel):
+    results: List[BatchQueryResult]
+
+
 chat_router = APIRouter()
 
 
@@ -22,6 +57,9 @@ async def chat(
     vector_search=Depends(get_vector_search),
     embedding_generator=Depends(get_embedding_generator),
     model=Depends(get_model),
+    response_cache=Depends(get_response_cache),
+    entity_extractor=Depends(get_entity_extractor),
+    single_flight=Depends(get_single_flight),
 ):
     """
     Chat endpoint using the RAG pipeline with injected dependencies.
@@ -29,13 +67,114 @@ async def chat(
     try:
         user_query = query_request.query
 
-        chatbot_response = rag_pipeline(
-            [user_query], vector_search, embedding_generator, model
+        chatbot_response = await rag_pipeline(
+            [user_query],
+            vector_search,
+            embedding_generator,
+            model,
+            response_cache,
+            entity_extractor,
+            single_flight=single_flight,
         )
 
         return QueryResponse(response=chatbot_response)
     except Exception as e:
+        logging.exception("Error processing chat request")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing the request: {str(e)}",
+        )
+
+
+@chat_router.post("/batch", response_model=BatchQueryResponse)
+async def chat_batch(
+    batch_request: BatchQueryRequest,
+    vector_search=Depends(get_vector_search),
+    embedding_generator=Depends(get_embedding_generator),
+    model=Depends(get_model),
+    response_cache=Depends(get_response_cache),
+    entity_extractor=Depends(get_entity_extractor),
+    single_flight=Depends(get_single_flight),
+):
+    """
+    Answer a list of questions in one call; results keep the order of the questions.
+
+    A question that fails gets an `error` instead of a `response` without failing the batch.
+    """
+    try:
+        answers = await rag_pipeline_batch(
+            batch_request.queries,
+            vector_search,
+            embedding_generator,
+            model,
+            response_cache,
+            entity_extractor,
+            single_flight=single_flight,
+        )
+    except Exception as e:
+        logging.exception("Error processing chat request")
         raise HTTPException(
             status_code=500,
-            detail=f"Error processing the request: {str(e)} {str(e.with_traceback)}",
+            detail=f"Error processing the request: {str(e)}",
         )
+
+    return BatchQueryResponse(
+        results=[
+            (
+                BatchQueryResult(error=f"Error processing the query: {str(answer)}")
+                if isinstance(answer, BaseException)
+                else BatchQueryResult(response=answer)
+            )
+            for answer in answers
+        ]
+    )
+
+
+@chat_router.post("/stream")
+async def chat_stream(
+    query_request: QueryRequest,
+    vector_search=Depends(get_vector_search),
+    embedding_generator=Depends(get_embedding_generator),
+    model=Depends(get_model),
+    response_cache=Depends(get_response_cache),
+    entity_extractor=Depends(get_entity_extractor),
+    single_flight=Depends(get_single_flight),
+):
+    """
+    Chat endpoint streaming the answer as server-sent events while it is generated.
+
+    Each chunk is sent as `data: {"token": ...}`; the stream ends with an `end` event,
+    or an `error` event if generation fails midway.
+    """
+    try:
+        prepared = await prepare_answer(
+            [query_request.query],
+            vector_search,
+            embedding_generator,
+            response_cache,
+            entity_extractor,
+            model,
+        )
+    except Exception as e:
+        logging.exception("Error processing chat request")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing the request: {str(e)}",
+        )
+
+    async def events():
+        try:
+            async for chunk in stream_answer(
+                prepared, model, response_cache, single_flight
+            ):
+                yield f"data: {json.dumps({'token': chunk})}\n\n"
+            yield "event: end\ndata: {}\n\n"
+        except Exception as e:
+            logging.exception("Error streaming chat response")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
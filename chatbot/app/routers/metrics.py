@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from app.util.concurrency import run_io_bound
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("")
+async def metrics():
+    """
+    Prometheus scrape endpoint: pipeline stage histograms and component counters.
+    """
+    # Collecting reads component stats under their locks and the embedding store index.
+    content = await run_io_bound(generate_latest)
+    return Response(content=content, media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,172 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from logging.config import dictConfig
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from app.configurations.logging_config import LOGGING_CONFIG
+from app.core.retrieval.vector_search_abstract import VectorSearchListener
+
+dictConfig(LOGGING_CONFIG)
+
+load_dotenv()
+
+# Seconds after which the index is reloaded from the database, picking up games
+# ingested by other replicas (each replica only consumes part of the queue).
+GAME_INDEX_REFRESH_SECONDS = float(os.getenv("GAME_INDEX_REFRESH_SECONDS", 300))
+
+_TOKEN_PATTERN = re.compile(r"\w+(?:'\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into case-folded word tokens, ignoring punctuation.
+    """
+    return _TOKEN_PATTERN.findall(text.casefold())
+
+
+class _TokenAutomaton:
+    """
+    Aho-Corasick automaton over word tokens.
+
+    Finds every pattern occurring as a contiguous token sequence in one pass over
+    the text, independent of the number of patterns.
+    """
+
+    def __init__(self, patterns: Dict[Tuple[str, ...], str]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+
+        for tokens, name in patterns.items():
+            state = 0
+            for token in tokens:
+                next_state = self._goto[state].get(token)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][token] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(name)
+
+        # Breadth-first failure links; outputs of suffix states are merged in.
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for token, next_state in self._goto[state].items():
+                pending.append(next_state)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(token, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find(self, tokens: Iterable[str]) -> Set[str]:
+        found: Set[str] = set()
+        state = 0
+        for token in tokens:
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            found.update(self._output[state])
+        return found
+
+
+class GameNameIndex(VectorSearchListener):
+    """
+    In-memory index of known game names.
+
+    Kept up to date incrementally from `upload_game_name` notifications and
+    periodically reloaded from the database. Membership checks are a set lookup
+    and multi-word names are found in a query with one pass over its tokens.
+    """
+
+    def __init__(self, refresh_seconds: float = GAME_INDEX_REFRESH_SECONDS) -> None:
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._names: Dict[Tuple[str, ...], str] = {}
+        self._automaton: Optional[_TokenAutomaton] = _TokenAutomaton({})
+        self._refreshed_at = float("-inf")
+        self._refreshing = False
+
+    def add(self, game_name: str) -> None:
+        tokens = tuple(tokenize(game_name))
+        if not tokens:
+            return
+        with self._lock:
+            if tokens not in self._names:
+                self._names[tokens] = game_name
+                # Rebuilt lazily on the next lookup.
+                self._automaton = None
+
+    def replace(self, game_names: Iterable[str]) -> None:
+        names = {
+            tokens: name for name in game_names if (tokens := tuple(tokenize(name)))
+        }
+        with self._lock:
+            self._names = names
+            self._automaton = None
+            self._refreshed_at = time.monotonic()
+
+    def refresh(self, loader: Callable[[], List[str]]) -> None:
+        """
+        Reload every name from `loader` (e.g. `VectorSearch.get_all_board_game_names`).
+        """
+        self.replace(loader())
+        logging.info(f"Game name index refreshed with {len(self)} games.")
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._refreshed_at > self.refresh_seconds
+
+    def refresh_if_stale(self, loader: Callable[[], List[str]]) -> None:
+        """
+        Refresh unless the index is fresh or another caller is already refreshing it.
+        """
+        with self._lock:
+            if self._refreshing or not self.is_stale():
+                return
+            self._refreshing = True
+        try:
+            self.refresh(loader)
+        except Exception as e:
+            logging.error(f"Error refreshing game name index: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def lookup(self, game_name: str) -> Optional[str]:
+        """
+        Stored name of a known game, ignoring case and punctuation.
+        """
+        return self._names.get(tuple(tokenize(game_name)))
+
+    def is_known(self, game_name: str) -> bool:
+        return self.lookup(game_name) is not None
+
+    def find_games(self, text: str) -> Set[str]:
+        """
+        Names of all known games mentioned in the text.
+        """
+        return self._get_automaton().find(tokenize(text))
+
+    def on_game_name_added(self, game_name: str) -> None:
+        self.add(game_name)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _get_automaton(self) -> _TokenAutomaton:
+        automaton = self._automaton
+        if automaton is None:
+            with self._lock:
+                if self._automaton is None:
+                    self._automaton = _TokenAutomaton(dict(self._names))
+                automaton = self._automaton
+        return automaton
@@ -1,34 +1,407 @@
-from typing import List
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, List, Optional, Set, Union
+
+import numpy as np
+from dotenv import load_dotenv
 
-from app.core.embedding.embeddings_generator_abstract import EmbeddingGenerator
-from app.core.language_models.llm_abstract import BaseLLM
-from app.core.language_models.llm_factory import construct_prompt
-from app.core.retrieval.vector_search_abstract import VectorSearch
-from app.services.entity_extraction import get_game_entities, is_game_not_known
 from app.configurations.guidance_loader import get_rules_category
+from app.core.embedding.embeddings_generator_abstract import EmbeddingGenerator
+from app.core.entity_extraction.ee_gazetteer import GazetteerEntityExtractor
+from app.core.entity_extraction.entity_extractor_abstract import EntityExtractor
+from app.core.language_models.llm_abstract import BaseLLM, estimate_tokens
+from app.core.language_models.prompt_builder import build_prompt
+from app.core.retrieval.vector_search_abstract import SearchResult, VectorSearch
+from app.services.game_index import GameNameIndex
+from app.services.response_cache import (
+    DocumentKey,
+    SemanticResponseCache,
+    document_key,
+)
+from app.services.single_flight import SingleFlight, flight_key
+from app.util.concurrency import run_cpu_bound, run_io_bound
+from app.util.metrics import (
+    ANSWERS,
+    PROMPT_TOKENS,
+    RESPONSE_TOKENS,
+    observe_stage,
+    stage_timer,
+)
+
+load_dotenv()
+
+# Number of records retrieved per query; hits of the winning category form the context.
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", 1))
+# LLM generations running at once for a single batch request.
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", 4))
+# Rule chunks of the mentioned game used as context for a rules question.
+RULES_CONTEXT_TOP_K = int(os.getenv("RULES_CONTEXT_TOP_K", 3))
+
+# Background refresh of the shared game index; one at a time, referenced so it
+# is not garbage collected while pending.
+_game_index_refresh: Optional["asyncio.Task[None]"] = None
+
+UNSUPPORTED_TOPIC_RESPONSE = "Sorry, I can only answer questions about games on this platform or platform guidance."
+UNKNOWN_GAME_RESPONSE = "Sorry, I do not know anything about this game. I am a chatbot that can only utilize the information from my knowledge base."
+
+
+def select_context(
+    results: List[SearchResult], category: Any, similarity_threshold: float
+) -> List[SearchResult]:
+    """
+    Keep the retrieved records of the query's category that are similar enough.
+    """
+    return [
+        result
+        for result in results
+        if result.topic == category
+        and result.similarity > similarity_threshold
+        and result.info
+    ]
+
+
+@dataclass
+class PreparedAnswer:
+    """
+    Outcome of every pipeline stage before generation.
+
+    `response` is set when the answer is already known (early exit or cache hit);
+    otherwise `prompt` is ready to be sent to the LLM.
+    """
+
+    query: str
+    query_embedding: np.ndarray
+    response: Optional[str] = None
+    prompt: str = ""
+    cache_key: Optional[DocumentKey] = None
+    prompt_tokens: int = 0
+
+
+async def _ensure_entity_extractor(
+    search: VectorSearch, entity_extractor: Optional[EntityExtractor]
+) -> EntityExtractor:
+    """
+    Return the shared extractor, refreshing its game index in the background once stale.
+
+    Without a shared extractor the known names are fetched for this call only.
+    """
+    if entity_extractor is None:
+        game_index = GameNameIndex()
+        with stage_timer("game_names"):
+            await run_io_bound(game_index.refresh, search.get_all_board_game_names)
+        return GazetteerEntityExtractor(game_index)
+    global _game_index_refresh
+    if entity_extractor.game_index.is_stale() and (
+        _game_index_refresh is None or _game_index_refresh.done()
+    ):
+        _game_index_refresh = asyncio.ensure_future(
+            _refresh_game_index(entity_extractor.game_index, search)
+        )
+        _game_index_refresh.add_done_callback(_log_refresh_error)
+    return entity_extractor
+
 
+async def _refresh_game_index(game_index: GameNameIndex, search: VectorSearch) -> None:
+    with stage_timer("game_names"):
+        await run_io_bound(game_index.refresh_if_stale, search.get_all_board_game_names)
 
-def rag_pipeline(
+
+def _log_refresh_error(task: "asyncio.Task[None]") -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logging.error(f"Error refreshing the game index: {task.exception()}")
+
+
+async def _known_games(query: str, entity_extractor: EntityExtractor) -> Set[str]:
+    # Off the event loop: the configured extractor may fall back to a NER model.
+    with stage_timer("entity_extraction"):
+        result = await run_cpu_bound(entity_extractor.extract_games, query)
+    return result.games
+
+
+async def _prepare_from_results(
+    query: str,
+    query_embedding: np.ndarray,
+    results: List[SearchResult],
+    search: VectorSearch,
+    entity_extractor: EntityExtractor,
+    response_cache: Optional[SemanticResponseCache],
+    model: Optional[BaseLLM],
+) -> PreparedAnswer:
+    category = search.category_of(results)
+
+    context = select_context(results, category, search.similarity_threshold)
+
+    if not context or category == "unknown":
+        ANSWERS.labels(source="unsupported_topic").inc()
+        return PreparedAnswer(
+            query, query_embedding, response=UNSUPPORTED_TOPIC_RESPONSE
+        )
+
+    if int(category) == get_rules_category():
+        games = await _known_games(query, entity_extractor)
+        if not games:
+            ANSWERS.labels(source="unknown_game").inc()
+            return PreparedAnswer(
+                query, query_embedding, response=UNKNOWN_GAME_RESPONSE
+            )
+        # Only the rule chunks of the mentioned game closest to the question; games
+        # stored before chunking have none and keep the retrieved record.
+        with stage_timer("rule_chunks"):
+            chunks = await run_io_bound(
+                search.search_game_chunks,
+                query_embedding,
+                sorted(games),
+                RULES_CONTEXT_TOP_K,
+            )
+        if chunks:
+            context = chunks
+
+    cache_key = document_key(context)
+    if response_cache is not None:
+        with stage_timer("response_cache"):
+            cached_response = response_cache.get(cache_key, query_embedding)
+        if cached_response is not None:
+            ANSWERS.labels(source="response_cache").inc()
+            return PreparedAnswer(query, query_embedding, response=cached_response)
+
+    # Context is cut to the category's token budget for the target model, keeping
+    # the most relevant passages.
+    with stage_timer("prompt"):
+        built = build_prompt(
+            category,
+            [result.info for result in context],
+            model.count_tokens if model is not None else estimate_tokens,
+            model.context_window if model is not None else BaseLLM.context_window,
+            query=query,
+        )
+    logging.debug(
+        f"Prompt: {built.prompt_tokens} tokens, context {built.context_tokens}/"
+        f"{built.context_budget}, {built.passages_used} passages used, "
+        f"{built.passages_truncated} truncated, {built.passages_dropped} dropped."
+    )
+    return PreparedAnswer(
+        query,
+        query_embedding,
+        prompt=built.prompt,
+        cache_key=cache_key,
+        prompt_tokens=built.prompt_tokens,
+    )
+
+
+async def prepare_answer(
     query: List[str],
     search: VectorSearch,
     embedding_generator: EmbeddingGenerator,
+    response_cache: Optional[SemanticResponseCache] = None,
+    entity_extractor: Optional[EntityExtractor] = None,
+    model: Optional[BaseLLM] = None,
+) -> PreparedAnswer:
+    """
+    Run embedding, retrieval, entity checks, the cache lookup and prompt assembly
+    for a query. `model` sets the token counter and window the prompt is sized for.
+    """
+    with stage_timer("embedding"):
+        query_embedding = await embedding_generator.agenerate_embeddings(query)
+
+    # Category and context both come from one top-k retrieval round-trip.
+    with stage_timer("retrieval"):
+        results = await run_io_bound(search.search, query_embedding, RETRIEVAL_TOP_K)
+
+    entity_extractor = await _ensure_entity_extractor(search, entity_extractor)
+    return await _prepare_from_results(
+        query[0],
+        query_embedding,
+        results,
+        search,
+        entity_extractor,
+        response_cache,
+        model,
+    )
+
+
+async def prepare_answers(
+    queries: List[str],
+    search: VectorSearch,
+    embedding_generator: EmbeddingGenerator,
+    response_cache: Optional[SemanticResponseCache] = None,
+    entity_extractor: Optional[EntityExtractor] = None,
+    model: Optional[BaseLLM] = None,
+) -> List[Union[PreparedAnswer, BaseException]]:
+    """
+    Batch form of `prepare_answer`: one embedding pass and one retrieval query for all.
+
+    Failures of individual queries are returned in place of their PreparedAnswer.
+    """
+    with stage_timer("batch_embedding"):
+        query_embeddings = await embedding_generator.agenerate_embeddings(queries)
+    with stage_timer("batch_retrieval"):
+        results = await run_io_bound(
+            search.search_batch, query_embeddings, RETRIEVAL_TOP_K
+        )
+
+    entity_extractor = await _ensure_entity_extractor(search, entity_extractor)
+    return await asyncio.gather(
+        *[
+            _prepare_from_results(
+                query,
+                query_embedding[np.newaxis, :],
+                query_results,
+                search,
+                entity_extractor,
+                response_cache,
+                model,
+            )
+            for query, query_embedding, query_results in zip(
+                queries, query_embeddings, results
+            )
+        ],
+        return_exceptions=True,
+    )
+
+
+async def rag_pipeline(
+    query: List[str],
+    search: VectorSearch,
+    embedding_generator: EmbeddingGenerator,
+    model: BaseLLM,
+    response_cache: Optional[SemanticResponseCache] = None,
+    entity_extractor: Optional[EntityExtractor] = None,
+    single_flight: Optional[SingleFlight] = None,
+) -> str:
+    """
+    Answer a query without blocking the event loop.
+
+    CPU-bound stages (embedding, NER) run on the bounded CPU executor, blocking
+    database calls on the I/O executor, and the LLM call is awaited. When a
+    response cache is given, near-duplicate questions about the same retrieved
+    documents are answered from it instead of the LLM. With `single_flight`,
+    identical questions arriving while one is being generated wait for it and
+    share its answer.
+    """
+    prepared = await prepare_answer(
+        query, search, embedding_generator, response_cache, entity_extractor, model
+    )
+    if prepared.response is not None:
+        return prepared.response
+
+    return await _generate(prepared, model, response_cache, single_flight)
+
+
+async def rag_pipeline_batch(
+    queries: List[str],
+    search: VectorSearch,
+    embedding_generator: EmbeddingGenerator,
+    model: BaseLLM,
+    response_cache: Optional[SemanticResponseCache] = None,
+    entity_extractor: Optional[EntityExtractor] = None,
+    max_concurrency: int = BATCH_LLM_CONCURRENCY,
+    single_flight: Optional[SingleFlight] = None,
+) -> List[Union[str, BaseException]]:
+    """
+    Answer many queries, sharing the embedding pass and the retrieval query.
+
+    LLM calls fan out with at most `max_concurrency` in flight. Results keep the
+    input order; a failed query yields its exception instead of an answer.
+    Duplicates within the batch, or of requests already being generated, are
+    generated once when `single_flight` is given.
+    """
+    prepared_answers = await prepare_answers(
+        queries, search, embedding_generator, response_cache, entity_extractor, model
+    )
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def answer(prepared: Union[PreparedAnswer, BaseException]) -> str:
+        if isinstance(prepared, BaseException):
+            raise prepared
+        if prepared.response is not None:
+            return prepared.response
+        async with semaphore:
+            return await _generate(prepared, model, response_cache, single_flight)
+
+    return await asyncio.gather(
+        *[answer(prepared) for prepared in prepared_answers], return_exceptions=True
+    )
+
+
+async def stream_answer(
+    prepared: PreparedAnswer,
     model: BaseLLM,
+    response_cache: Optional[SemanticResponseCache] = None,
+    single_flight: Optional[SingleFlight] = None,
+) -> AsyncIterator[str]:
+    """
+    Yield the answer for a prepared query chunk by chunk as the LLM produces it.
+
+    Answers known before generation are yielded at once as a single chunk. With
+    `single_flight`, a question already being generated is not generated again:
+    the chunks produced so far are replayed, then followed as they arrive.
+    """
+    if prepared.response is not None:
+        yield prepared.response
+        return
+
+    async def generate() -> AsyncIterator[str]:
+        chunks: List[str] = []
+        started = time.monotonic()
+        async for chunk in model.astream(prompt=prepared.prompt, query=prepared.query):
+            if not chunks:
+                observe_stage("llm_first_chunk", time.monotonic() - started)
+            chunks.append(chunk)
+            yield chunk
+        observe_stage("llm_stream", time.monotonic() - started)
+        _generated(prepared, model, "".join(chunks), response_cache)
+
+    if single_flight is None or prepared.cache_key is None:
+        chunks = generate()
+    else:
+        chunks = single_flight.stream(
+            flight_key(prepared.query, prepared.cache_key), generate
+        )
+    async for chunk in chunks:
+        yield chunk
+
+
+async def _generate(
+    prepared: PreparedAnswer,
+    model: BaseLLM,
+    response_cache: Optional[SemanticResponseCache],
+    single_flight: Optional[SingleFlight],
 ) -> str:
-    query_embedding = embedding_generator.generate_embeddings(query)
+    async def generate() -> str:
+        with stage_timer("llm_generate"):
+            response = await model.agenerate(
+                prompt=prepared.prompt, query=prepared.query
+            )
+        _generated(prepared, model, response, response_cache)
+        return response
 
-    category = search.get_category(query_embedding)
+    if single_flight is None or prepared.cache_key is None:
+        return await generate()
+    return await single_flight.run(
+        flight_key(prepared.query, prepared.cache_key), generate
+    )
 
-    retrieved_text: str = search.find_closest_text(query_embedding)
 
-    if not retrieved_text or category == "unknown":
-        return "Sorry, I can only answer questions about games on this platform or platform guidance."
+def _generated(
+    prepared: PreparedAnswer,
+    model: BaseLLM,
+    response: str,
+    response_cache: Optional[SemanticResponseCache],
+) -> None:
+    # Once per generation: requests coalesced onto it are not counted again.
+    ANSWERS.labels(source="llm").inc()
+    PROMPT_TOKENS.observe(prepared.prompt_tokens)
+    RESPONSE_TOKENS.observe(model.count_tokens(response))
+    _cache_response(prepared, response, response_cache)
+
 
-    findings = get_game_entities(query[0])
-    known_games = search.get_all_board_game_names()
-    is_game_unknown = is_game_not_known(findings, known_games)
-    if int(category) == get_rules_category() and is_game_unknown:
-        return "Sorry, I do not know anything about this game. I am a chatbot that can only utilize the information from my knowledge base."
-    
-    base_prompt = construct_prompt(category, retrieved_text)
-    response = model.generate(prompt=base_prompt, query=query[0])
-    return response
+def _cache_response(
+    prepared: PreparedAnswer,
+    response: str,
+    response_cache: Optional[SemanticResponseCache],
+) -> None:
+    if response_cache is not None and prepared.cache_key is not None and response:
+        response_cache.put(prepared.cache_key, prepared.query_embedding, response)
@@ -0,0 +1,176 @@
+import hashlib
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.core.retrieval.vector_search_abstract import SearchResult, VectorSearchListener
+
+load_dotenv()
+
+# Number of cached answers; 0 disables the cache.
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1024))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 3600))
+# Minimum cosine similarity between two questions for them to share an answer.
+RESPONSE_CACHE_SIMILARITY_THRESHOLD = float(
+    os.getenv("RESPONSE_CACHE_SIMILARITY_THRESHOLD", 0.95)
+)
+
+# (ids of the records in the context, hash of the context text)
+DocumentKey = Tuple[Tuple[int, ...], str]
+
+
+@dataclass
+class _CachedResponse:
+    document_key: DocumentKey
+    embedding: np.ndarray
+    response: str
+    created_at: float
+
+
+def document_key(context: List[SearchResult]) -> DocumentKey:
+    """
+    Identify the retrieved documents by id and content version.
+
+    The content hash makes answers computed against an older version of a record
+    unreachable even before the invalidation notification arrives.
+    """
+    digest = hashlib.sha1(
+        "\x1f".join(result.info for result in context).encode("utf-8")
+    )
+    return tuple(result.id for result in context), digest.hexdigest()
+
+
+class SemanticResponseCache(VectorSearchListener):
+    """
+    Answer cache matching new questions to earlier ones by embedding similarity.
+
+    Entries are scoped to the retrieved documents, expire after a TTL, are evicted
+    least recently used first and are dropped when their documents change.
+    """
+
+    def __init__(
+        self,
+        max_size: int = RESPONSE_CACHE_SIZE,
+        ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS,
+        similarity_threshold: float = RESPONSE_CACHE_SIMILARITY_THRESHOLD,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, _CachedResponse]" = OrderedDict()
+        self._by_document_key: Dict[DocumentKey, Set[int]] = {}
+        self._by_record: Dict[int, Set[int]] = {}
+        self._entry_ids = itertools.count()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: DocumentKey, query_embedding: np.ndarray) -> Optional[str]:
+        """
+        Return the cached answer for the closest earlier question about the same documents.
+        """
+        query = self._normalize(query_embedding)
+        now = time.monotonic()
+        with self._lock:
+            best_id, best_similarity = None, self.similarity_threshold
+            for entry_id in list(self._by_document_key.get(key, ())):
+                entry = self._entries[entry_id]
+                if now - entry.created_at > self.ttl_seconds:
+                    self._remove(entry_id)
+                    continue
+                similarity = float(entry.embedding.dot(query))
+                if similarity >= best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+
+            if best_id is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best_id)
+            return self._entries[best_id].response
+
+    def put(self, key: DocumentKey, query_embedding: np.ndarray, response: str) -> None:
+        entry = _CachedResponse(
+            document_key=key,
+            embedding=self._normalize(query_embedding),
+            response=response,
+            created_at=time.monotonic(),
+        )
+        with self._lock:
+            entry_id = next(self._entry_ids)
+            self._entries[entry_id] = entry
+            self._by_document_key.setdefault(key, set()).add(entry_id)
+            for record_id in key[0]:
+                self._by_record.setdefault(record_id, set()).add(entry_id)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, record_ids: Optional[List[int]] = None) -> None:
+        """
+        Drop answers built on the given records, or every answer if None.
+        """
+        with self._lock:
+            if record_ids is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                self._by_document_key.clear()
+                self._by_record.clear()
+                return
+            for record_id in record_ids:
+                for entry_id in list(self._by_record.get(record_id, ())):
+                    self._remove(entry_id)
+                    self.invalidations += 1
+
+    def on_data_changed(self, record_ids: Optional[List[int]]) -> None:
+        self.invalidate(record_ids)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, entry_id: int) -> None:
+        # Caller holds the lock.
+        entry = self._entries.pop(entry_id)
+        entry_ids = self._by_document_key.get(entry.document_key)
+        if entry_ids is not None:
+            entry_ids.discard(entry_id)
+            if not entry_ids:
+                del self._by_document_key[entry.document_key]
+        for record_id in entry.document_key[0]:
+            record_entries = self._by_record.get(record_id)
+            if record_entries is not None:
+                record_entries.discard(entry_id)
+                if not record_entries:
+                    del self._by_record[record_id]
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def create_response_cache() -> Optional[SemanticResponseCache]:
+    """
+    Build the response cache from the environment, or None when disabled.
+    """
+    if RESPONSE_CACHE_SIZE <= 0:
+        return None
+    return SemanticResponseCache()
@@ -0,0 +1,94 @@
+import os
+import re
+from dataclasses import dataclass
+from typing import List
+
+from dotenv import load_dotenv
+
+from app.external_services.event_model import GameAddedEvent, GameRule
+from app.services.game_query_generator import generate_example_queries
+
+load_dotenv()
+
+# Longest rule description stored as one chunk; longer ones are split at sentences.
+RULE_CHUNK_MAX_CHARS = int(os.getenv("RULE_CHUNK_MAX_CHARS", 1200))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class RuleChunk:
+    """
+    One retrievable piece of a game's rules.
+    """
+
+    text_to_embed: str
+    info: str
+
+
+def chunk_rules(event: GameAddedEvent) -> List[RuleChunk]:
+    """
+    Split the rules of a game into an overview chunk and one chunk per rule.
+
+    The overview is matched by general questions about the game; each rule chunk
+    embeds the rule itself, so a question retrieves only the rules it is about.
+
+    :param event: The published game.
+    :return: The chunks, overview first.
+    """
+    chunks = [_overview_chunk(event)]
+    for rule in event.rules:
+        chunks.extend(_rule_chunks(event.gameName, rule))
+    return chunks
+
+
+def _overview_chunk(event: GameAddedEvent) -> RuleChunk:
+    # Same embedded text as the former single rules record, so it is upserted in place.
+    text_to_embed = " ".join(generate_example_queries(event.gameName))
+    parts = [f"Rules for {event.gameName}:"]
+    if event.description:
+        parts.append(event.description)
+    if event.rules:
+        parts.append(
+            "The rules cover: " + ", ".join(rule.rule for rule in event.rules) + "."
+        )
+    return RuleChunk(text_to_embed=text_to_embed, info=" ".join(parts))
+
+
+def _rule_chunks(game_name: str, rule: GameRule) -> List[RuleChunk]:
+    parts = _split_text(rule.description, RULE_CHUNK_MAX_CHARS)
+    chunks = []
+    for index, part in enumerate(parts):
+        label = rule.rule
+        if len(parts) > 1:
+            label = f"{rule.rule} ({index + 1}/{len(parts)})"
+        chunks.append(
+            RuleChunk(
+                text_to_embed=f"{game_name} - {label}: {part}",
+                info=f"{game_name} rule '{label}': {part}",
+            )
+        )
+    return chunks
+
+
+def _split_text(text: str, max_chars: int) -> List[str]:
+    """
+    Split text into parts of at most `max_chars`, preferring sentence boundaries.
+    """
+    parts: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        while len(sentence) > max_chars:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            parts.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        parts.append(current)
+    return parts or [""]
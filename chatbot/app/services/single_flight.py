@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from dotenv import load_dotenv
+
+from app.core.embedding.eg_cached import CachedEmbeddingGenerator
+from app.services.response_cache import DocumentKey
+
+load_dotenv()
+
+# Whether concurrent identical chat requests share one LLM generation.
+CHAT_SINGLE_FLIGHT = os.getenv("CHAT_SINGLE_FLIGHT", "true").lower() == "true"
+
+
+def flight_key(query: str, key: DocumentKey) -> Hashable:
+    """
+    Identify a generation by the normalized question and the retrieved documents,
+    which together determine the prompt.
+    """
+    return (CachedEmbeddingGenerator.normalize(query), key)
+
+
+class _Flight:
+    """
+    Output of one in-flight computation, replayable by any number of subscribers.
+    """
+
+    def __init__(self) -> None:
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Future] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+        self._wake()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.error = error
+        self.done = True
+        self._wake()
+
+    async def replay(self) -> AsyncIterator[str]:
+        """
+        Yield every chunk from the start, then new ones as they are published.
+        """
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+    def _wake(self) -> None:
+        # Waiters hold the old event; later waiters get a fresh one.
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical computations into one.
+
+    The first caller for a key starts the computation as its own task; callers
+    arriving while it runs subscribe to its output instead of starting another.
+    Streaming subscribers replay the chunks produced so far and then follow live.
+    The computation completes even if the caller that started it goes away, and
+    the key is released as soon as it finishes.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def run(self, key: Hashable, generate: Callable[[], Awaitable[str]]) -> str:
+        """
+        Result of `generate()`, shared with concurrent callers of the same key.
+        """
+
+        async def source() -> AsyncIterator[str]:
+            yield await generate()
+
+        flight = self._join(key, source)
+        return "".join([chunk async for chunk in flight.replay()])
+
+    async def stream(
+        self, key: Hashable, source: Callable[[], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """
+        Chunks of `source()`, shared with concurrent callers of the same key.
+        """
+        flight = self._join(key, source)
+        async for chunk in flight.replay():
+            yield chunk
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters for monitoring; `followers` is the number of coalesced requests.
+        """
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
+
+    def _join(self, key: Hashable, source: Callable[[], AsyncIterator[str]]) -> _Flight:
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.followers += 1
+            return flight
+
+        flight = _Flight()
+        self._flights[key] = flight
+        self.leaders += 1
+        flight.task = asyncio.ensure_future(self._produce(key, flight, source))
+        return flight
+
+    async def _produce(
+        self, key: Hashable, flight: _Flight, source: Callable[[], AsyncIterator[str]]
+    ) -> None:
+        error: Optional[BaseException] = None
+        try:
+            async for chunk in source():
+                flight.publish(chunk)
+        except BaseException as e:
+            error = e
+            if not isinstance(e, asyncio.CancelledError):
+                logging.debug(f"Shared computation failed: {e}")
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.finish(error)
+        if isinstance(error, asyncio.CancelledError):
+            raise error
+
+
+def create_single_flight() -> Optional[SingleFlight]:
+    """
+    Build the request coalescer from the environment, or None when disabled.
+    """
+    if not CHAT_SINGLE_FLIGHT:
+        return None
+    return SingleFlight()
@@ -0,0 +1,21 @@
+import hmac
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Token expected in the X-Admin-Token header of admin requests; unset disables them.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """
+    Whether the token grants admin access; always False when ADMIN_TOKEN is unset.
+    """
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8"))
@@ -0,0 +1,217 @@
+import asyncio
+import functools
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    TypeVar,
+)
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# CPU-bound stages (embedding, NER) release the GIL inside torch/numpy, so a small
+# thread pool sized to the cores is enough. Blocking I/O (psycopg2, LLM clients)
+# gets its own, larger pool so slow generations never starve the CPU stages.
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", os.cpu_count() or 4))
+IO_EXECUTOR_WORKERS = int(os.getenv("IO_EXECUTOR_WORKERS", 32))
+
+_cpu_executor: Optional[ThreadPoolExecutor] = None
+_io_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    """
+    Return the bounded executor used for CPU-bound pipeline stages.
+    """
+    global _cpu_executor
+    if _cpu_executor is None:
+        _cpu_executor = ThreadPoolExecutor(
+            max_workers=CPU_EXECUTOR_WORKERS, thread_name_prefix="cpu-stage"
+        )
+    return _cpu_executor
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """
+    Return the bounded executor used for blocking I/O (database, LLM clients).
+    """
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(
+            max_workers=IO_EXECUTOR_WORKERS, thread_name_prefix="io-stage"
+        )
+    return _io_executor
+
+
+async def run_cpu_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a CPU-bound callable on the CPU executor without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_cpu_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+async def run_io_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking I/O callable on the I/O executor without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_io_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+async def iterate_io_bound(
+    func: Callable[..., Iterable[T]], *args: Any, **kwargs: Any
+) -> AsyncIterator[T]:
+    """
+    Consume a blocking iterator on the I/O executor and yield its items as they arrive.
+
+    Iteration stops early, on the next item, once the consumer stops listening.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+    stopped = threading.Event()
+
+    def produce() -> None:
+        try:
+            for item in func(*args, **kwargs):
+                if stopped.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (finished, e))
+            return
+        loop.call_soon_threadsafe(queue.put_nowait, (finished, None))
+
+    loop.run_in_executor(get_io_executor(), produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is finished:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
+
+
+class InFlightLimiter:
+    """
+    Caps how many async operations run at once and measures the wait for a slot.
+
+    Used in front of model servers, which degrade for everyone when sent more
+    parallel requests than they can serve.
+    """
+
+    def __init__(self, max_in_flight: int) -> None:
+        self.max_in_flight = max_in_flight
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.queue_wait_seconds = 0.0
+        self.max_queue_wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - started
+        self.acquired += 1
+        self.queue_wait_seconds += waited
+        self.max_queue_wait_seconds = max(self.max_queue_wait_seconds, waited)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Counters for monitoring.
+        """
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "queue_wait_seconds": self.queue_wait_seconds,
+            "mean_queue_wait_seconds": (
+                self.queue_wait_seconds / self.acquired if self.acquired else 0.0
+            ),
+            "max_queue_wait_seconds": self.max_queue_wait_seconds,
+        }
+
+
+async def retry_with_backoff(
+    func: Callable[[], Awaitable[T]],
+    retries: int,
+    backoff_seconds: float,
+    is_transient: Callable[[BaseException], bool],
+) -> T:
+    """
+    Await `func()`, retrying transient failures with exponential backoff and jitter.
+
+    Args:
+        func (Callable[[], Awaitable[T]]): Starts one attempt.
+        retries (int): Attempts after the first one.
+        backoff_seconds (float): Delay before the first retry; doubles per retry.
+        is_transient (Callable[[BaseException], bool]): Whether an error is retried.
+
+    Returns:
+        T: The result of the first successful attempt.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await func()
+        except Exception as e:
+            if attempt >= retries or not is_transient(e):
+                raise
+            delay = backoff_seconds * (2**attempt) * (0.5 + random.random() / 2)
+            attempt += 1
+            logging.warning(
+                f"Transient error, retrying in {delay:.2f}s ({attempt}/{retries}): {e}"
+            )
+            await asyncio.sleep(delay)
+
+
+def shutdown_executors() -> None:
+    """
+    Shut down both executors without blocking the caller.
+
+    Queued stages are cancelled; running ones finish on their threads, which
+    exit afterwards. Called from the event loop, so it must not wait for them.
+    """
+    global _cpu_executor, _io_executor
+    if _cpu_executor is not None:
+        _cpu_executor.shutdown(wait=False, cancel_futures=True)
+        _cpu_executor = None
+    if _io_executor is not None:
+        _io_executor.shutdown(wait=False, cancel_futures=True)
+        _io_executor = None
@@ -0,0 +1,164 @@
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from logging.config import dictConfig
+from typing import Callable, Dict, Iterator, List, Mapping
+
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import REGISTRY, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from app.configurations.logging_config import LOGGING_CONFIG
+from app.core.model_registry import loaded_models
+from app.util.profiling import record_request_timing
+
+dictConfig(LOGGING_CONFIG)
+
+# Stage latencies range from sub-millisecond cache lookups to minute-long generations.
+_SECONDS_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5]
+_SECONDS_BUCKETS += [1, 2.5, 5, 10, 30, 60, 120]
+_TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+STAGE_SECONDS = Histogram(
+    "chatbot_rag_stage_seconds",
+    "Time spent in each stage of the RAG pipeline.",
+    ["stage"],
+    buckets=_SECONDS_BUCKETS,
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "chatbot_http_request_seconds",
+    "Time to the response of each HTTP endpoint (to the first byte for streams).",
+    ["endpoint", "status"],
+    buckets=_SECONDS_BUCKETS,
+)
+INGESTION_MESSAGE_SECONDS = Histogram(
+    "chatbot_ingestion_message_seconds",
+    "Time to handle one queue message, from delivery to acknowledgement.",
+    ["queue", "outcome"],
+    buckets=_SECONDS_BUCKETS,
+)
+PROMPT_TOKENS = Histogram(
+    "chatbot_llm_prompt_tokens",
+    "Tokens of the prompts sent to the LLM, query included.",
+    buckets=_TOKEN_BUCKETS,
+)
+RESPONSE_TOKENS = Histogram(
+    "chatbot_llm_response_tokens",
+    "Tokens of the answers generated by the LLM.",
+    buckets=_TOKEN_BUCKETS,
+)
+ANSWERS = Counter(
+    "chatbot_answers_total",
+    "Answers by where they came from (llm, response_cache, coalesced or an early exit).",
+    ["source"],
+)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """
+    Context manager observing the duration of its block as a pipeline stage.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """
+    Record a stage duration measured by the caller, e.g. across yields of a stream.
+
+    The duration also goes to the Server-Timing breakdown when the current request
+    asked for one.
+    """
+    STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    record_request_timing(stage, seconds)
+
+
+class _StatsCollector(Collector):
+    """
+    Exposes the `stats()` counters of the running components as gauges.
+
+    Components register a callable returning their current stats; it is called
+    on every scrape, so the values are always current and nothing is updated on
+    the request path.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sources: Dict[str, Callable[[], Mapping[str, float]]] = {}
+
+    def register(
+        self, component: str, stats: Callable[[], Mapping[str, float]]
+    ) -> None:
+        with self._lock:
+            self._sources[component] = stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sources.clear()
+
+    def describe(self) -> List[GaugeMetricFamily]:
+        # The metric names depend on what is registered, so none are declared
+        # upfront and the registry does not collect at registration time.
+        return []
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        with self._lock:
+            sources = dict(self._sources)
+        for component, stats in sources.items():
+            try:
+                values = stats()
+            except Exception as e:
+                logging.warning(f"Could not collect stats of {component}: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, (int, float)):
+                    yield GaugeMetricFamily(
+                        re.sub(r"\W", "_", f"chatbot_{component}_{key}"),
+                        f"{key} reported by {component}.",
+                        value=float(value),
+                    )
+
+        load_seconds = GaugeMetricFamily(
+            "chatbot_model_load_seconds",
+            "Time it took to load each shared model.",
+            labels=["model"],
+        )
+        resident_bytes = GaugeMetricFamily(
+            "chatbot_model_resident_bytes",
+            "Growth of the resident set size while loading each shared model.",
+            labels=["model"],
+        )
+        for key, model in loaded_models().items():
+            load_seconds.add_metric([key], model.load_seconds)
+            if model.resident_bytes is not None:
+                resident_bytes.add_metric([key], model.resident_bytes)
+        yield load_seconds
+        yield resident_bytes
+
+
+_stats_collector = _StatsCollector()
+REGISTRY.register(_stats_collector)
+
+
+def register_stats(component: str, stats: Callable[[], Mapping[str, float]]) -> None:
+    """
+    Expose the counters returned by `stats` as `chatbot_<component>_<key>` gauges.
+
+    Args:
+        component (str): Metric name prefix; registering it again replaces the source.
+        stats (Callable[[], Mapping[str, float]]): Returns the current counters.
+    """
+    _stats_collector.register(component, stats)
+
+
+def clear_stats() -> None:
+    """
+    Forget every registered stats source, e.g. when the components are shut down.
+    """
+    _stats_collector.clear()
@@ -0,0 +1,172 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+from types import FrameType
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Longest sampling run one /admin/profile request may ask for.
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", 60))
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", 10))
+
+# Stage timings of the current request; None unless the request asked for them.
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def start_request_timing() -> List[Tuple[str, float]]:
+    """
+    Collect the stage timings of the current request (and the tasks it starts).
+    """
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+
+def record_request_timing(stage: str, seconds: float) -> None:
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total_seconds: float) -> str:
+    """
+    Format the timings as a `Server-Timing` header value, stages in first-seen order.
+
+    Stages run several times (e.g. per question of a batch) are summed, with the
+    count in the description.
+    """
+    totals: Dict[str, float] = {}
+    counts: Counter = Counter()
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+        counts[stage] += 1
+    entries = [
+        f"{stage};dur={seconds * 1000:.1f}"
+        + (f';desc="x{counts[stage]}"' if counts[stage] > 1 else "")
+        for stage, seconds in totals.items()
+    ]
+    entries.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(entries)
+
+
+@dataclass
+class ProfileReport:
+    """
+    Aggregated stacks of a sampling session, keyed by (thread, outermost, ..., innermost).
+    """
+
+    stacks: Counter
+    samples: int
+    seconds: float
+    interval_ms: float
+
+    def collapsed(self) -> str:
+        """
+        One `thread;outer;...;inner count` line per distinct stack, the input
+        format of flamegraph.pl and speedscope.
+        """
+        return "\n".join(
+            f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()
+        )
+
+    def summary(self, limit: int = 30) -> str:
+        """
+        Functions with the most samples on top of the stack (self) and anywhere
+        on the stack (inclusive), as plain text.
+        """
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        # Every sample holds one stack per thread; idle threads are counted too.
+        thread_samples = max(sum(self.stacks.values()), 1)
+        for stack, count in self.stacks.items():
+            # The first entry is the thread name, not a frame.
+            own[stack[-1]] += count
+            for function in set(stack[1:]):
+                inclusive[function] += count
+
+        lines = [
+            f"{self.samples} samples of all threads every {self.interval_ms:g} ms "
+            f"over {self.seconds:.1f} s; percentages are of all thread stacks",
+        ]
+        for title, counter in (("Self", own), ("Inclusive", inclusive)):
+            lines += ["", f"{title} samples:"]
+            lines += [
+                f"{count:8d}  {count * 100 / thread_samples:6.1f}%  {function}"
+                for function, count in counter.most_common(limit)
+            ]
+        return "\n".join(lines)
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the stacks of every thread at a fixed interval.
+
+    Nothing runs until `run` is called, so there is no overhead outside of a
+    profiling session. Only one session runs at a time.
+    """
+
+    def __init__(self, interval_ms: float = PROFILER_INTERVAL_MS):
+        """
+        Args:
+            interval_ms (float): Time between two samples.
+        """
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()
+
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def run(self, seconds: float) -> Optional[ProfileReport]:
+        """
+        Sample all threads for `seconds`, blocking the calling thread.
+
+        Args:
+            seconds (float): Duration of the session.
+
+        Returns:
+            Optional[ProfileReport]: The report, None if a session is already running.
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            return self._sample(seconds)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float) -> ProfileReport:
+        own_thread = threading.get_ident()
+        interval = self.interval_ms / 1000
+        stacks: Counter = Counter()
+        samples = 0
+        started = time.monotonic()
+        deadline = started + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, top in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack = []
+                frame: Optional[FrameType] = top
+                while frame is not None:
+                    code = frame.f_code
+                    location = (
+                        f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}"
+                    )
+                    stack.append(f"{code.co_name} ({location})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                stacks[tuple(reversed(stack))] += 1
+            samples += 1
+            time.sleep(interval)
+        return ProfileReport(
+            stacks, samples, time.monotonic() - started, self.interval_ms
+        )
@@ -0,0 +1,70 @@
+import asyncio
+import hashlib
+import random
+import time
+from typing import AsyncIterator, Iterator
+
+from app.core.language_models.llm_abstract import BaseLLM
+
+
+class FakeLLM(BaseLLM):
+    """
+    Deterministic stand-in for a model server with configurable latency.
+
+    The answer and the latency of a request only depend on its prompt, query and
+    the seed, so two runs over the same queries send the same load.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 200.0,
+        jitter_ms: float = 50.0,
+        response_tokens: int = 64,
+        seed: int = 0,
+    ):
+        """
+        :param latency_ms: Mean time to the complete answer.
+        :param jitter_ms: Largest deviation from the mean, drawn per request.
+        :param response_tokens: Words in every answer; streams yield one per chunk.
+        :param seed: Seed mixed into the per-request randomness.
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.response_tokens = response_tokens
+        self.seed = seed
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        time.sleep(self._latency_seconds(prompt, kwargs.get("query")))
+        return self._answer(prompt, kwargs.get("query"))
+
+    def stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        words = self._answer(prompt, kwargs.get("query")).split(" ")
+        delay = self._latency_seconds(prompt, kwargs.get("query")) / len(words)
+        for word in words:
+            time.sleep(delay)
+            yield word + " "
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        await asyncio.sleep(self._latency_seconds(prompt, kwargs.get("query")))
+        return self._answer(prompt, kwargs.get("query"))
+
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        words = self._answer(prompt, kwargs.get("query")).split(" ")
+        delay = self._latency_seconds(prompt, kwargs.get("query")) / len(words)
+        for word in words:
+            await asyncio.sleep(delay)
+            yield word + " "
+
+    def _random(self, prompt: str, query) -> random.Random:
+        digest = hashlib.sha1(f"{self.seed}\x1f{prompt}\x1f{query}".encode("utf-8"))
+        return random.Random(digest.digest())
+
+    def _latency_seconds(self, prompt: str, query) -> float:
+        jitter = self._random(prompt, query).uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def _answer(self, prompt: str, query) -> str:
+        rng = self._random(prompt, query)
+        return " ".join(
+            f"word{rng.randrange(1000)}" for _ in range(self.response_tokens)
+        )
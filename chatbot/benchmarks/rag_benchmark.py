@@ -0,0 +1,464 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.configurations.guidance_loader import (
+    PLATFORM_GUIDANCE_JSON,
+    get_rules_category,
+)
+from app.core.embedding.embeddings_generator_abstract import EmbeddingGenerator
+from app.core.embedding.embeddings_generator_factory import (
+    get_generator,
+    get_ingestion_generator,
+)
+from app.core.entity_extraction.entity_extractor_factory import get_entity_extractor
+from app.core.retrieval.vector_search_abstract import VectorRecord, VectorSearch
+from app.core.retrieval.vector_search_factory import get_solution
+from app.external_services.event_model import GameAddedEvent
+from app.services.game_index import GameNameIndex
+from app.services.rag_pipeline import rag_pipeline
+from app.services.response_cache import SemanticResponseCache
+from app.services.rules_chunking import chunk_rules
+from app.services.single_flight import SingleFlight
+from app.util.concurrency import shutdown_executors
+from app.util.json_loader import load_from_file
+from app.util.profiling import start_request_timing
+from benchmarks.fake_llm import FakeLLM
+
+# Format version of the results file; baselines of another version are not compared.
+RESULTS_VERSION = 1
+PERCENTILES = (50, 95, 99)
+
+# Synthetic games ingested before the run so rules questions reach the entity
+# extraction and rule chunk stages.
+BENCHMARK_GAMES: List[Dict[str, Any]] = [
+    {
+        "gameName": "Castle Siege",
+        "description": "Two armies fight over a castle.",
+        "rules": [
+            {
+                "rule": "Setup",
+                "description": "Each player places ten soldiers on their side of the board. The defender also places the castle walls.",
+            },
+            {
+                "rule": "Winning",
+                "description": "The attacker wins by capturing the keep. The defender wins by holding the keep for twenty turns.",
+            },
+            {
+                "rule": "Movement",
+                "description": "Soldiers move one square per turn. Knights move up to three squares in a straight line.",
+            },
+        ],
+    },
+    {
+        "gameName": "Dragon Dice",
+        "description": "A dice game about taming dragons.",
+        "rules": [
+            {
+                "rule": "Turns",
+                "description": "On your turn roll five dice. You may reroll any of them twice.",
+            },
+            {
+                "rule": "Scoring",
+                "description": "Three dragons score ten points. A full set of elements scores twenty points.",
+            },
+            {
+                "rule": "Winning",
+                "description": "The first player to reach one hundred points wins the game.",
+            },
+        ],
+    },
+    {
+        "gameName": "Space Traders",
+        "description": "Trade goods between planets.",
+        "rules": [
+            {
+                "rule": "Trading",
+                "description": "Buy goods on one planet and sell them on another. Prices change after every sale.",
+            },
+            {
+                "rule": "Pirates",
+                "description": "When you travel through an asteroid field roll a die. On a one, pirates steal half of your cargo.",
+            },
+            {
+                "rule": "Winning",
+                "description": "The richest player after fifteen rounds wins.",
+            },
+        ],
+    },
+]
+
+RULES_QUESTIONS = [
+    "How do I win in {game}?",
+    "What are the rules of {game}?",
+    "How does a turn work in {game}?",
+]
+UNSUPPORTED_QUESTIONS = [
+    "What is the weather like tomorrow?",
+    "Can you recommend a good pizza place?",
+]
+
+
+def build_queries() -> List[str]:
+    """
+    Guidance, rules and off-topic questions, interleaved so every concurrency
+    level sees the same mix.
+    """
+    guidance_file = os.path.join(
+        os.path.dirname(__file__), "..", "app", "configurations", PLATFORM_GUIDANCE_JSON
+    )
+    guidance = [
+        query
+        for entry in load_from_file(guidance_file)["guidance"]
+        for query in entry["example_queries"]
+    ]
+    rules = [
+        question.format(game=game["gameName"])
+        for game in BENCHMARK_GAMES
+        for question in RULES_QUESTIONS
+    ]
+    queries: List[str] = []
+    for group in itertools.zip_longest(guidance, rules, UNSUPPORTED_QUESTIONS):
+        queries.extend(query for query in group if query is not None)
+    return queries
+
+
+def seed_games(search: VectorSearch, embedding_generator: EmbeddingGenerator) -> None:
+    """
+    Store the benchmark games the way the ingestion consumer does.
+    """
+    for game in BENCHMARK_GAMES:
+        event = GameAddedEvent(**game)
+        chunks = chunk_rules(event)
+        embeddings = embedding_generator.generate_embeddings(
+            [chunk.text_to_embed for chunk in chunks]
+        )
+        search.replace_game_records(
+            event.gameName,
+            [
+                VectorRecord(
+                    text_to_embed=chunk.text_to_embed,
+                    info=chunk.info,
+                    embeddings=embedding,
+                    topic=get_rules_category(),
+                    game_name=event.gameName,
+                )
+                for chunk, embedding in zip(chunks, embeddings)
+            ],
+        )
+        search.upload_game_name(event.gameName)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """
+    Count and percentiles of durations in seconds, reported in milliseconds.
+    """
+    summary: Dict[str, float] = {"count": len(values)}
+    for percent in PERCENTILES:
+        summary[f"p{percent}_ms"] = (
+            float(np.percentile(values, percent)) * 1000 if values else 0.0
+        )
+    return summary
+
+
+async def run_level(
+    concurrency: int, queries: List[str], requests: int, pipeline_args: Tuple
+) -> Dict[str, Any]:
+    """
+    Send `requests` queries through the pipeline with `concurrency` in flight.
+
+    Args:
+        concurrency (int): Requests in flight at once.
+        queries (List[str]): Queries sent in round-robin order.
+        requests (int): Requests in this level.
+        pipeline_args (Tuple): Arguments of `rag_pipeline` after the query.
+
+    Returns:
+        Dict[str, Any]: Throughput and per-stage latency percentiles.
+    """
+    request_numbers = itertools.count()
+    stage_samples: Dict[str, List[float]] = {}
+    totals: List[float] = []
+    errors = 0
+
+    async def client() -> None:
+        nonlocal errors
+        while True:
+            number = next(request_numbers)
+            if number >= requests:
+                return
+            # Stage timers of the pipeline record into this list.
+            timings = start_request_timing()
+            started = time.perf_counter()
+            try:
+                await rag_pipeline([queries[number % len(queries)]], *pipeline_args)
+            except Exception:
+                errors += 1
+                continue
+            totals.append(time.perf_counter() - started)
+            per_stage: Dict[str, float] = {}
+            for stage, seconds in timings:
+                per_stage[stage] = per_stage.get(stage, 0.0) + seconds
+            for stage, seconds in per_stage.items():
+                stage_samples.setdefault(stage, []).append(seconds)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    wall_seconds = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "wall_seconds": wall_seconds,
+        "throughput_rps": len(totals) / wall_seconds if wall_seconds else 0.0,
+        "total": summarize(totals),
+        "stages": {
+            stage: summarize(values) for stage, values in sorted(stage_samples.items())
+        },
+    }
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> Tuple[List[str], List[str]]:
+    """
+    Compare results against a baseline run.
+
+    Throughput and end-to-end percentiles are checked against `tolerance`; stage
+    percentiles are reported for diagnosis only, as they move with each other.
+
+    Returns:
+        Tuple[List[str], List[str]]: The comparison lines and the regressions.
+    """
+    lines: List[str] = []
+    regressions: List[str] = []
+    if baseline.get("version") != results["version"]:
+        return [f"Baseline format {baseline.get('version')} is not comparable."], []
+    if baseline["config"] != results["config"]:
+        lines.append(
+            "Warning: the baseline was recorded with a different configuration."
+        )
+
+    def change(new: float, old: float) -> float:
+        return (new - old) / old if old else 0.0
+
+    baseline_levels = {level["concurrency"]: level for level in baseline["levels"]}
+    for level in results["levels"]:
+        old_level = baseline_levels.get(level["concurrency"])
+        if old_level is None:
+            lines.append(f"c={level['concurrency']}: not in the baseline")
+            continue
+
+        delta = change(level["throughput_rps"], old_level["throughput_rps"])
+        lines.append(
+            f"c={level['concurrency']}: throughput {old_level['throughput_rps']:.2f} -> "
+            f"{level['throughput_rps']:.2f} rps ({delta:+.1%})"
+        )
+        if delta < -tolerance:
+            regressions.append(f"c={level['concurrency']} throughput {delta:+.1%}")
+
+        stages = [("total", level["total"], old_level["total"])] + [
+            (stage, summary, old_level["stages"][stage])
+            for stage, summary in level["stages"].items()
+            if stage in old_level["stages"]
+        ]
+        for stage, summary, old_summary in stages:
+            parts = []
+            for percent in PERCENTILES:
+                key = f"p{percent}_ms"
+                delta = change(summary[key], old_summary[key])
+                parts.append(
+                    f"{key} {old_summary[key]:.1f} -> {summary[key]:.1f} ({delta:+.1%})"
+                )
+                if stage == "total" and delta > tolerance:
+                    regressions.append(
+                        f"c={level['concurrency']} total {key} {delta:+.1%}"
+                    )
+            lines.append(f"  {stage}: " + ", ".join(parts))
+    return lines, regressions
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    lines = []
+    for level in results["levels"]:
+        lines.append(
+            f"concurrency {level['concurrency']}: {level['throughput_rps']:.2f} rps, "
+            f"{level['errors']} errors"
+        )
+        rows = [("total", level["total"])] + list(level["stages"].items())
+        for stage, summary in rows:
+            lines.append(
+                f"  {stage:<20} n={summary['count']:<6} "
+                + "  ".join(f"p{p}={summary[f'p{p}_ms']:9.2f} ms" for p in PERCENTILES)
+            )
+    return "\n".join(lines)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Offline benchmark of the RAG pipeline"
+    )
+    parser.add_argument(
+        "--search_type", type=str, default="memory", help="memory or pgvector"
+    )
+    parser.add_argument(
+        "--allow_db_writes",
+        action="store_true",
+        help="Allow pgvector runs to write the benchmark games into the configured database",
+    )
+    parser.add_argument("--generator_type", type=str, default="sentence_transformer")
+    parser.add_argument("--entity_extractor", type=str, default="gazetteer")
+    parser.add_argument(
+        "--concurrency",
+        type=str,
+        default="1,4,16",
+        help="Comma-separated concurrency levels",
+    )
+    parser.add_argument("--requests", type=int, default=200, help="Requests per level")
+    parser.add_argument(
+        "--warmup", type=int, default=10, help="Unmeasured requests first"
+    )
+    parser.add_argument("--llm_latency_ms", type=float, default=200.0)
+    parser.add_argument("--llm_jitter_ms", type=float, default=50.0)
+    parser.add_argument("--llm_response_tokens", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--embedding_cache_size",
+        type=int,
+        default=0,
+        help="Query embedding cache; off by default so repeated queries are embedded",
+    )
+    parser.add_argument("--response_cache", action="store_true")
+    parser.add_argument("--single_flight", action="store_true")
+    parser.add_argument("--output", type=str, help="Write the results as JSON")
+    parser.add_argument(
+        "--baseline", type=str, help="Compare against this results file"
+    )
+    parser.add_argument(
+        "--save_baseline", action="store_true", help="Write the results to --baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="Relative change in throughput or end-to-end latency counted as a regression",
+    )
+    args = parser.parse_args()
+    # The benchmark games are upserted into whatever database DB_* points at.
+    if args.search_type == "pgvector" and not args.allow_db_writes:
+        parser.error(
+            "--search_type pgvector writes the benchmark games into the configured "
+            "database; point DB_* at a scratch database and pass --allow_db_writes"
+        )
+    return args
+
+
+async def run(args) -> Dict[str, Any]:
+    embedding_generator = get_generator(
+        args.generator_type, cache_size=args.embedding_cache_size
+    )
+    ingestion_embedding_generator = get_ingestion_generator(args.generator_type)
+    search = get_solution(args.search_type, ingestion_embedding_generator)
+    seed_games(search, ingestion_embedding_generator)
+
+    game_index = GameNameIndex()
+    game_index.refresh(search.get_all_board_game_names)
+    search.add_listener(game_index)
+    entity_extractor = get_entity_extractor(args.entity_extractor, game_index)
+
+    response_cache: Optional[SemanticResponseCache] = None
+    if args.response_cache:
+        response_cache = SemanticResponseCache()
+        search.add_listener(response_cache)
+
+    model = FakeLLM(
+        latency_ms=args.llm_latency_ms,
+        jitter_ms=args.llm_jitter_ms,
+        response_tokens=args.llm_response_tokens,
+        seed=args.seed,
+    )
+    pipeline_args = (
+        search,
+        embedding_generator,
+        model,
+        response_cache,
+        entity_extractor,
+        SingleFlight() if args.single_flight else None,
+    )
+    queries = build_queries()
+
+    try:
+        # Loads the models and fills the connection pool outside the measurements.
+        for query in queries[: args.warmup]:
+            await rag_pipeline([query], *pipeline_args)
+
+        levels = []
+        for concurrency in [int(level) for level in args.concurrency.split(",")]:
+            levels.append(
+                await run_level(concurrency, queries, args.requests, pipeline_args)
+            )
+    finally:
+        search.close()
+        shutdown_executors()
+
+    return {
+        "version": RESULTS_VERSION,
+        "config": {
+            "search_type": args.search_type,
+            "generator_type": args.generator_type,
+            "model_name": embedding_generator.model_name,
+            "entity_extractor": args.entity_extractor,
+            "requests": args.requests,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_jitter_ms": args.llm_jitter_ms,
+            "llm_response_tokens": args.llm_response_tokens,
+            "seed": args.seed,
+            "embedding_cache_size": args.embedding_cache_size,
+            "response_cache": args.response_cache,
+            "single_flight": args.single_flight,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "levels": levels,
+    }
+
+
+def main() -> int:
+    args = parse_args()
+    results = asyncio.run(run(args))
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif args.baseline:
+        lines, regressions = compare(
+            results, load_from_file(args.baseline), args.tolerance
+        )
+        print("\n".join(["", f"Compared with {args.baseline}:"] + lines))
+        if regressions:
+            print("\nRegressions beyond tolerance:\n  " + "\n  ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
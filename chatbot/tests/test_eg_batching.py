@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.core.embedding.eg_batching import BatchingEmbeddingGenerator
+from app.core.embedding.eg_cached import CachedEmbeddingGenerator
+from app.core.embedding.embeddings_generator_abstract import EmbeddingGenerator
+
+
+class RecordingGenerator(EmbeddingGenerator):
+    """
+    Embeds each text as [len(text), call number]; the first call can be held.
+    """
+
+    model_name = "recording"
+
+    def __init__(self, hold_first=False, fail=False):
+        self.calls = []
+        self.fail = fail
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not hold_first:
+            self.release.set()
+
+    def generate_embeddings(self, texts):
+        self.calls.append(list(texts))
+        self.started.set()
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("model failed")
+        return np.array([[len(text), len(self.calls)] for text in texts], dtype=float)
+
+
+@pytest.fixture
+def make_batcher():
+    batchers = []
+
+    def make(generator, **kwargs):
+        batcher = BatchingEmbeddingGenerator(generator, **kwargs)
+        batchers.append(batcher)
+        return batcher
+
+    yield make
+    for batcher in batchers:
+        if batcher._worker.is_alive():
+            batcher.close()
+
+
+def test_lone_request_is_dispatched_without_waiting(make_batcher):
+    batcher = make_batcher(RecordingGenerator(), max_wait_ms=2000)
+
+    started = time.monotonic()
+    embeddings = batcher.generate_embeddings(["ab", "abcd"])
+
+    assert time.monotonic() - started < 1
+    assert embeddings[:, 0].tolist() == [2, 4]
+
+
+def test_requests_queued_behind_a_batch_share_the_next_forward_pass(make_batcher):
+    generator = RecordingGenerator(hold_first=True)
+    batcher = make_batcher(generator, max_batch_size=32, max_wait_ms=1000)
+    first = batcher.submit(["first"])
+    generator.started.wait(5)
+
+    waiting = [batcher.submit(["x" * size]) for size in (1, 2, 3)]
+    generator.release.set()
+
+    assert first.result(5)[0].tolist() == [5, 1]
+    # Each caller gets its own rows of the shared second pass.
+    assert [future.result(5).tolist() for future in waiting] == [
+        [[1, 2]],
+        [[2, 2]],
+        [[3, 2]],
+    ]
+    assert generator.calls == [["first"], ["x", "xx", "xxx"]]
+    assert batcher.stats()["batches"] == 2
+    assert batcher.stats()["items"] == 4
+
+
+def test_batches_are_capped_at_max_batch_size(make_batcher):
+    generator = RecordingGenerator(hold_first=True)
+    batcher = make_batcher(generator, max_batch_size=2, max_wait_ms=1000)
+    first = batcher.submit(["first"])
+    generator.started.wait(5)
+
+    waiting = [batcher.submit([f"text {index}"]) for index in range(5)]
+    generator.release.set()
+
+    for future in [first] + waiting:
+        future.result(5)
+    assert [len(call) for call in generator.calls] == [1, 2, 2, 1]
+
+
+def test_encoding_error_reaches_every_caller_of_the_batch(make_batcher):
+    generator = RecordingGenerator(hold_first=True, fail=True)
+    batcher = make_batcher(generator)
+    first = batcher.submit(["first"])
+    generator.started.wait(5)
+    waiting = [batcher.submit(["a"]), batcher.submit(["b"])]
+    generator.release.set()
+
+    for future in [first] + waiting:
+        with pytest.raises(RuntimeError, match="model failed"):
+            future.result(5)
+
+    # The worker keeps serving after a failed batch.
+    generator.fail = False
+    assert batcher.generate_embeddings(["ok"])[0, 0] == 2
+
+
+def test_close_answers_queued_requests_and_stops_the_worker(make_batcher):
+    generator = RecordingGenerator(hold_first=True)
+    batcher = make_batcher(generator)
+    first = batcher.submit(["first"])
+    generator.started.wait(5)
+    queued = batcher.submit(["queued"])
+
+    closer = threading.Thread(target=batcher.close)
+    closer.start()
+    generator.release.set()
+    closer.join(5)
+
+    assert not batcher._worker.is_alive()
+    assert first.result(0).shape == (1, 2)
+    assert queued.result(0).shape == (1, 2)
+
+
+def test_awaiting_callers_do_not_occupy_threads_while_batched(make_batcher):
+    generator = RecordingGenerator()
+    batcher = make_batcher(generator, max_wait_ms=50)
+    cached = CachedEmbeddingGenerator(batcher)
+    threads_before = threading.active_count()
+
+    async def embed_concurrently():
+        return await asyncio.gather(
+            *[cached.agenerate_embeddings([f"query {index}"]) for index in range(8)]
+        )
+
+    results = asyncio.run(embed_concurrently())
+
+    assert threading.active_count() == threads_before
+    assert [result.shape for result in results] == [(1, 2)] * 8
+    assert sum(len(call) for call in generator.calls) == 8
+    # Cache hits are answered without another forward pass.
+    asyncio.run(cached.agenerate_embeddings(["query 0"]))
+    assert sum(len(call) for call in generator.calls) == 8
@@ -0,0 +1,110 @@
+import random
+
+from app.services.game_index import GameNameIndex, tokenize
+
+
+def make_index(*names):
+    index = GameNameIndex(refresh_seconds=60)
+    index.replace(names)
+    return index
+
+
+def brute_force_find(names, text):
+    tokens = tokenize(text)
+    found = set()
+    for name in names:
+        pattern = tokenize(name)
+        for start in range(len(tokens) - len(pattern) + 1):
+            if tokens[start : start + len(pattern)] == pattern:
+                found.add(name)
+    return found
+
+
+def test_multi_word_names_are_found_ignoring_case_and_punctuation():
+    index = make_index("Ticket to Ride", "Catan", "7 Wonders")
+
+    found = index.find_games("Is TICKET-to-ride harder than catan? Or 7 wonders!")
+
+    assert found == {"Ticket to Ride", "Catan", "7 Wonders"}
+
+
+def test_names_only_match_whole_tokens():
+    index = make_index("Go", "Catan")
+
+    assert index.find_games("How do I get going in Catanese?") == set()
+    assert index.find_games("How do I play go?") == {"Go"}
+
+
+def test_overlapping_and_nested_names_are_all_reported():
+    index = make_index("Ticket to Ride", "Ticket to Ride Europe", "Ride", "To")
+
+    found = index.find_games("rules of ticket to ride europe")
+
+    assert found == {"Ticket to Ride", "Ticket to Ride Europe", "Ride", "To"}
+
+
+def test_failure_links_find_names_after_a_partial_match():
+    index = make_index("Ticket to Ride", "To Ride a Dragon")
+
+    found = index.find_games("ticket to ride a dragon")
+
+    assert found == {"Ticket to Ride", "To Ride a Dragon"}
+
+
+def test_matches_agree_with_a_brute_force_scan():
+    rng = random.Random(0)
+    vocabulary = ["war", "of", "the", "ring", "lost", "cities", "star", "realms"]
+    names = {
+        " ".join(rng.choices(vocabulary, k=rng.randint(1, 3))).title()
+        for _ in range(30)
+    }
+    index = make_index(*names)
+
+    for _ in range(100):
+        text = " ".join(rng.choices(vocabulary, k=rng.randint(1, 10)))
+        assert index.find_games(text) == brute_force_find(names, text)
+
+
+def test_added_name_is_found_by_the_next_lookup():
+    index = make_index("Catan")
+    assert index.find_games("catan or azul") == {"Catan"}
+
+    index.on_game_name_added("Azul")
+
+    assert index.find_games("catan or azul") == {"Catan", "Azul"}
+    assert index.lookup("AZUL") == "Azul"
+    assert index.is_known("catan")
+    assert not index.is_known("chess")
+
+
+def test_refresh_replaces_the_names_and_resets_staleness(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.services.game_index.time.monotonic", lambda: now[0])
+    index = GameNameIndex(refresh_seconds=60)
+    index.add("Chess")
+    assert index.is_stale()
+
+    index.refresh(lambda: ["Catan", "Azul"])
+
+    assert not index.is_stale()
+    assert index.find_games("chess, catan and azul") == {"Catan", "Azul"}
+    now[0] += 61
+    assert index.is_stale()
+
+
+def test_refresh_if_stale_skips_fresh_index_and_survives_loader_errors():
+    index = GameNameIndex(refresh_seconds=60)
+    calls = []
+
+    def failing_loader():
+        calls.append("failing")
+        raise RuntimeError("database unavailable")
+
+    index.refresh_if_stale(failing_loader)
+    assert index.is_stale()
+
+    index.refresh_if_stale(lambda: calls.append("ok") or ["Catan"])
+    index.refresh_if_stale(lambda: calls.append("skipped") or [])
+
+    assert calls == ["failing", "ok"]
+    assert len(index) == 1
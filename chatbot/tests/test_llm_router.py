@@ -0,0 +1,189 @@
+import asyncio
+
+import pytest
+
+from app.core.language_models.llm_abstract import BaseLLM
+from app.core.language_models.llm_router import RoutingLLM, percentile
+
+
+class ScriptedLLM(BaseLLM):
+    """
+    Backend answering with its name after `delay` seconds, or failing.
+    """
+
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+        self.closed_streams = 0
+
+    def generate(self, prompt, **kwargs):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed")
+        return self.name
+
+    async def agenerate(self, prompt, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed")
+        return self.name
+
+    async def astream(self, prompt, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError(f"{self.name} failed")
+            for chunk in (self.name, " chunk"):
+                yield chunk
+        finally:
+            self.closed_streams += 1
+
+
+def make_router(*backends, **kwargs):
+    kwargs.setdefault("hedge_budget", 1.0)
+    kwargs.setdefault("min_samples", 5)
+    return RoutingLLM([(backend.name, backend) for backend in backends], **kwargs)
+
+
+def run_sequentially(router, count):
+    async def scenario():
+        return [await router.agenerate("prompt") for _ in range(count)]
+
+    return asyncio.run(scenario())
+
+
+def test_percentile_uses_the_nearest_rank():
+    assert percentile([], 95) == 0.0
+    assert percentile([3.0, 1.0, 2.0], 50) == 2.0
+    assert percentile([float(value) for value in range(1, 101)], 95) == 95.0
+
+
+def test_hedge_fires_only_once_the_primary_exceeds_its_learned_p95():
+    primary = ScriptedLLM("primary", delay=0.1)
+    secondary = ScriptedLLM("secondary")
+    router = make_router(
+        primary,
+        secondary,
+        hedge_delay_seconds=10.0,
+        hedge_percentile=95,
+        hedge_min_delay_seconds=0.0,
+    )
+
+    # Until min_samples latencies are known the fixed deadline applies.
+    assert run_sequentially(router, 5) == ["primary"] * 5
+    assert router.hedge_delay("primary") == pytest.approx(0.1, abs=0.05)
+
+    # Faster than p95: answered by the primary without hedging.
+    primary.delay = 0.01
+    assert run_sequentially(router, 1) == ["primary"]
+    assert router.hedges == 0
+    assert secondary.calls == 0
+
+    # Slower than p95: the hedge wins and the primary request is cancelled.
+    primary.delay = 1.0
+    assert run_sequentially(router, 1) == ["secondary"]
+    assert router.hedges == 1
+    assert router.hedge_wins == 1
+    assert primary.cancelled == 1
+
+
+def test_hedges_are_capped_by_the_budget():
+    primary = ScriptedLLM("primary", delay=0.05)
+    secondary = ScriptedLLM("secondary", delay=0.0)
+    router = make_router(
+        primary,
+        secondary,
+        hedge_delay_seconds=0.01,
+        hedge_percentile=0,
+        hedge_budget=0.5,
+    )
+
+    answers = run_sequentially(router, 4)
+
+    # Hedged, over budget, at budget, below budget again.
+    assert answers == ["secondary", "primary", "primary", "secondary"]
+    assert router.stats()["hedges"] == 2
+    assert router.stats()["recent_hedge_rate"] == 0.5
+
+
+def test_zero_budget_never_hedges():
+    primary = ScriptedLLM("primary", delay=0.05)
+    secondary = ScriptedLLM("secondary")
+    router = make_router(
+        primary, secondary, hedge_delay_seconds=0.01, hedge_percentile=0, hedge_budget=0
+    )
+
+    assert run_sequentially(router, 2) == ["primary", "primary"]
+    assert secondary.calls == 0
+
+
+def test_failed_backend_falls_back_to_the_next():
+    primary = ScriptedLLM("primary", fail=True)
+    secondary = ScriptedLLM("secondary")
+    router = make_router(primary, secondary)
+
+    assert run_sequentially(router, 1) == ["secondary"]
+    assert router.fallbacks == 1
+    assert router.stats()["primary_errors"] == 1
+
+
+def test_first_error_is_raised_when_every_backend_fails():
+    router = make_router(
+        ScriptedLLM("primary", fail=True), ScriptedLLM("secondary", fail=True)
+    )
+
+    with pytest.raises(RuntimeError, match="primary failed"):
+        run_sequentially(router, 1)
+
+
+def test_failing_primary_is_demoted_behind_a_healthier_backend():
+    primary = ScriptedLLM("primary", fail=True)
+    secondary = ScriptedLLM("secondary")
+    router = make_router(primary, secondary, min_samples=3, max_error_rate=0.5)
+
+    run_sequentially(router, 3)
+    assert primary.calls == 3
+
+    assert run_sequentially(router, 2) == ["secondary", "secondary"]
+    assert primary.calls == 3
+
+
+def test_blocking_generate_falls_back_without_hedging():
+    primary = ScriptedLLM("primary", fail=True)
+    secondary = ScriptedLLM("secondary")
+    router = make_router(primary, secondary)
+
+    assert router.generate("prompt") == "secondary"
+    assert router.hedges == 0
+
+    primary.fail = secondary.fail = True
+    with pytest.raises(RuntimeError, match="primary failed"):
+        router.generate("prompt")
+
+
+def test_stream_hedges_on_the_first_chunk_and_closes_the_loser():
+    primary = ScriptedLLM("primary", delay=1.0)
+    secondary = ScriptedLLM("secondary")
+    router = make_router(primary, secondary, hedge_delay_seconds=0.01)
+
+    async def scenario():
+        return [chunk async for chunk in router.astream("prompt")]
+
+    assert asyncio.run(scenario()) == ["secondary", " chunk"]
+    assert router.hedge_wins == 1
+    assert primary.closed_streams == 1
+    assert secondary.closed_streams == 1
+
+
+def test_empty_backend_list_is_rejected():
+    with pytest.raises(ValueError):
+        RoutingLLM([])
@@ -0,0 +1,172 @@
+import threading
+
+import psycopg2
+import pytest
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+from psycopg2.pool import PoolError
+
+from app.core.retrieval import pg_connection_pool
+from app.core.retrieval.pg_connection_pool import PGConnectionPool
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection")
+        self.conn.queries.append(query)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.status = TRANSACTION_STATUS_IDLE
+        self.queries = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        if self.broken:
+            raise psycopg2.InterfaceError("connection already closed")
+        self.rollbacks += 1
+
+
+class FakeThreadedPool:
+    """
+    Hands out idle connections first and opens new ones on demand.
+    """
+
+    def __init__(self, min_size, max_size, **connect_kwargs):
+        self.idle = [FakeConnection() for _ in range(min_size)]
+        self.opened = min_size
+        self.closed = []
+        self.lock = threading.Lock()
+
+    def getconn(self):
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+            self.opened += 1
+            return FakeConnection()
+
+    def putconn(self, conn, close=False):
+        with self.lock:
+            if close:
+                conn.closed = 1
+                self.closed.append(conn)
+            else:
+                self.idle.append(conn)
+
+    def closeall(self):
+        self.idle.clear()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(pg_connection_pool, "ThreadedConnectionPool", FakeThreadedPool)
+    return PGConnectionPool(
+        min_size=1, max_size=2, checkout_timeout=0.1, health_check_interval=30.0
+    )
+
+
+def test_successful_block_commits_and_returns_the_connection(pool):
+    with pool.connection() as conn:
+        assert pool.stats()["in_use"] == 1
+
+    assert conn.commits == 1
+    assert pool._pool.idle == [conn]
+    assert pool.stats()["in_use"] == 0
+
+
+def test_failed_block_rolls_back_and_keeps_the_connection(pool):
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            rollbacks = conn.rollbacks
+            raise ValueError("bad query")
+
+    assert conn.commits == 0
+    assert conn.rollbacks == rollbacks + 1
+    assert pool._pool.idle == [conn]
+    assert pool.stats()["reconnects"] == 0
+
+
+def test_broken_connection_is_discarded_and_replaced(pool):
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection() as conn:
+            conn.broken = True
+            raise psycopg2.OperationalError("server closed the connection")
+
+    assert pool._pool.closed == [conn]
+    assert pool.stats()["reconnects"] == 1
+    with pool.connection() as replacement:
+        assert replacement is not conn
+
+
+def test_unhealthy_idle_connection_is_replaced_on_checkout(pool):
+    stale = pool._pool.idle[0]
+    stale.status = TRANSACTION_STATUS_UNKNOWN
+
+    with pool.connection() as conn:
+        assert conn is not stale
+
+    assert pool._pool.closed == [stale]
+    assert pool.stats()["reconnects"] == 1
+
+
+def test_idle_connection_is_pinged_after_the_health_check_interval(pool):
+    with pool.connection() as conn:
+        pass
+    pool.health_check_interval = 0.0
+    conn.broken = True
+
+    with pool.connection() as replacement:
+        assert replacement is not conn
+
+    assert pool._pool.closed == [conn]
+
+
+def test_checkout_times_out_when_every_connection_is_in_use(pool):
+    with pool.connection(), pool.connection():
+        with pytest.raises(PoolError):
+            with pool.connection():
+                pass
+
+    assert pool.stats()["in_use"] == 0
+
+
+def test_checkout_waits_for_a_released_connection(pool):
+    pool.checkout_timeout = 5.0
+    released = threading.Event()
+    acquired = []
+
+    def wait_for_connection():
+        with pool.connection():
+            acquired.append(released.is_set())
+
+    with pool.connection(), pool.connection():
+        waiter = threading.Thread(target=wait_for_connection)
+        waiter.start()
+        waiter.join(0.05)
+        assert not acquired
+        released.set()
+    waiter.join(5)
+
+    assert acquired == [True]
@@ -0,0 +1,99 @@
+import pytest
+
+from app.core.language_models import prompt_builder
+from app.core.language_models.llm_factory import construct_prompt
+from app.core.language_models.prompt_builder import (
+    PASSAGE_SEPARATOR,
+    build_prompt,
+    context_budget,
+    truncate_to_tokens,
+)
+
+GUIDANCE = 1
+RULES = 2
+LARGE_WINDOW = 100_000
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def passage(name, words):
+    return " ".join(f"{name}{index}" for index in range(words))
+
+
+@pytest.fixture
+def small_budget(monkeypatch):
+    monkeypatch.setitem(prompt_builder.CONTEXT_TOKEN_BUDGETS, "guidance", 25)
+    monkeypatch.setattr(prompt_builder, "PROMPT_MIN_PASSAGE_TOKENS", 5)
+
+
+def test_each_category_gets_its_own_budget():
+    assert context_budget(GUIDANCE, LARGE_WINDOW, 0) == (
+        prompt_builder.PROMPT_CONTEXT_TOKENS_GUIDANCE
+    )
+    assert context_budget(RULES, LARGE_WINDOW, 0) == (
+        prompt_builder.PROMPT_CONTEXT_TOKENS_RULES
+    )
+    assert context_budget("unknown", LARGE_WINDOW, 0) == (
+        prompt_builder.PROMPT_CONTEXT_TOKENS
+    )
+
+
+def test_budget_leaves_room_for_the_template_query_and_response():
+    window = prompt_builder.PROMPT_RESPONSE_TOKENS + 300
+
+    assert context_budget(RULES, window, 100) == 200
+    assert context_budget(RULES, window, 400) == 0
+
+
+def test_passages_fitting_the_budget_are_kept_in_order(small_budget):
+    passages = [passage("a", 10), passage("b", 10)]
+
+    built = build_prompt(GUIDANCE, passages, count_words, LARGE_WINDOW)
+
+    assert built.prompt == construct_prompt(GUIDANCE, PASSAGE_SEPARATOR.join(passages))
+    assert built.context_tokens == 20
+    assert (built.passages_used, built.passages_truncated) == (2, 0)
+    assert built.passages_dropped == 0
+
+
+def test_first_passage_over_the_budget_is_cut_and_the_rest_dropped(small_budget):
+    passages = [passage("a", 10), passage("b", 30), passage("c", 5)]
+
+    built = build_prompt(GUIDANCE, passages, count_words, LARGE_WINDOW)
+
+    assert built.context_tokens <= built.context_budget == 25
+    assert "b13 ..." in built.prompt
+    assert "b14" not in built.prompt
+    assert "c0" not in built.prompt
+    assert (built.passages_used, built.passages_truncated) == (2, 1)
+    assert built.passages_dropped == 1
+
+
+def test_passage_is_not_cut_into_a_remainder_below_the_minimum(small_budget):
+    passages = [passage("a", 22), passage("b", 30)]
+
+    built = build_prompt(GUIDANCE, passages, count_words, LARGE_WINDOW)
+
+    assert "b0" not in built.prompt
+    assert (built.passages_used, built.passages_truncated) == (1, 0)
+    assert built.passages_dropped == 1
+
+
+def test_query_tokens_count_against_the_window():
+    query = "how do I add friends"
+    fixed = count_words(construct_prompt(GUIDANCE, ""))
+    window = fixed + prompt_builder.PROMPT_RESPONSE_TOKENS + 100
+
+    built = build_prompt(GUIDANCE, [], count_words, window, query=query)
+
+    assert built.context_budget == 100 - count_words(query)
+    assert built.prompt_tokens == fixed + count_words(query)
+
+
+def test_truncate_to_tokens_keeps_the_longest_fitting_prefix():
+    text = passage("w", 10)
+
+    assert truncate_to_tokens(text, 4, count_words) == "w0 w1 w2 ..."
+    assert truncate_to_tokens(text, 1, count_words) == ""
@@ -0,0 +1,138 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.core.embedding.embeddings_generator_abstract import EmbeddingGenerator
+from app.core.language_models.llm_abstract import BaseLLM
+from app.core.retrieval import vs_in_memory
+from app.core.retrieval.vector_search_abstract import VectorRecord
+from app.core.retrieval.vs_in_memory import EMBEDDING_DIMENSION, InMemoryVectorSearch
+from app.services.rag_pipeline import UNSUPPORTED_TOPIC_RESPONSE, rag_pipeline_batch
+from app.services.single_flight import SingleFlight
+
+GUIDANCE_TOPIC = 1
+TOPICS = ["signing up", "payments", "friends"]
+
+
+def topic_vector(index):
+    vector = np.zeros(EMBEDDING_DIMENSION)
+    vector[index] = 1.0
+    return vector
+
+
+class TopicEmbeddingGenerator(EmbeddingGenerator):
+    """
+    Embeds a question on its topic's axis; questions off every topic get their own.
+    """
+
+    model_name = "topics"
+
+    def __init__(self):
+        self.calls = []
+
+    def generate_embeddings(self, texts):
+        self.calls.append(list(texts))
+        return np.stack([self._embed(text) for text in texts])
+
+    @staticmethod
+    def _embed(text):
+        for index, topic in enumerate(TOPICS):
+            if topic in text.casefold():
+                return topic_vector(index)
+        return topic_vector(len(TOPICS))
+
+
+class RecordingLLM(BaseLLM):
+    """
+    Answers after a short delay, failing on questions containing "fail".
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.running = 0
+        self.max_running = 0
+
+    def generate(self, prompt, **kwargs):
+        raise NotImplementedError
+
+    async def agenerate(self, prompt, **kwargs):
+        query = kwargs["query"]
+        self.queries.append(query)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.running -= 1
+        if "fail" in query:
+            raise RuntimeError("generation failed")
+        return f"answer to {query}"
+
+
+@pytest.fixture
+def search(monkeypatch):
+    monkeypatch.setattr(vs_in_memory, "MEMORY_VECTOR_STORE_PATH", None)
+    monkeypatch.setattr(vs_in_memory, "MEMORY_VECTOR_HYDRATE_FROM_DB", False)
+    search = InMemoryVectorSearch()
+    search.upload_records(
+        [
+            VectorRecord(
+                topic, f"How {topic} works.", topic_vector(index), GUIDANCE_TOPIC
+            )
+            for index, topic in enumerate(TOPICS)
+        ]
+    )
+    return search
+
+
+def run_batch(queries, search, **kwargs):
+    generator = TopicEmbeddingGenerator()
+    model = RecordingLLM()
+    results = asyncio.run(
+        rag_pipeline_batch(queries, search, generator, model, **kwargs)
+    )
+    return results, generator, model
+
+
+def test_batch_embeds_once_and_keeps_the_input_order(search):
+    queries = ["About payments?", "What is the weather?", "About signing up?"]
+
+    results, generator, model = run_batch(queries, search)
+
+    assert generator.calls == [queries]
+    assert results == [
+        "answer to About payments?",
+        UNSUPPORTED_TOPIC_RESPONSE,
+        "answer to About signing up?",
+    ]
+    assert sorted(model.queries) == ["About payments?", "About signing up?"]
+
+
+def test_failed_question_does_not_fail_the_rest_of_the_batch(search):
+    queries = ["About payments?", "About friends, please fail", "About signing up?"]
+
+    results, _, _ = run_batch(queries, search)
+
+    assert results[0] == "answer to About payments?"
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == "answer to About signing up?"
+
+
+def test_generations_are_bounded_by_max_concurrency(search):
+    queries = [f"About payments, question {index}?" for index in range(6)]
+
+    results, _, model = run_batch(queries, search, max_concurrency=2)
+
+    assert len(model.queries) == 6
+    assert model.max_running == 2
+    assert results == [f"answer to {query}" for query in queries]
+
+
+def test_duplicate_questions_are_generated_once_with_single_flight(search):
+    queries = ["About payments?", "about  PAYMENTS?", "About friends?"]
+
+    results, _, model = run_batch(queries, search, single_flight=SingleFlight())
+
+    assert len(model.queries) == 2
+    assert results[0] == results[1] == "answer to About payments?"
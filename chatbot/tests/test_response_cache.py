@@ -0,0 +1,118 @@
+import types
+
+import numpy as np
+import pytest
+
+from app.core.retrieval.vector_search_abstract import SearchResult
+from app.services import response_cache
+from app.services.response_cache import SemanticResponseCache, document_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(
+        response_cache, "time", types.SimpleNamespace(monotonic=clock.monotonic)
+    )
+    return clock
+
+
+def key(*record_ids, info="info"):
+    return document_key(
+        [
+            SearchResult(id=record_id, topic=1, info=info, similarity=1.0)
+            for record_id in record_ids
+        ]
+    )
+
+
+def vector(*values):
+    return np.array(values, dtype=np.float32)
+
+
+def test_similar_question_about_the_same_documents_hits():
+    cache = SemanticResponseCache(similarity_threshold=0.9)
+    cache.put(key(1), vector(1, 0), "answer")
+
+    assert cache.get(key(1), vector(1, 0.1)) == "answer"
+    assert cache.stats()["hits"] == 1
+
+
+def test_question_below_the_similarity_threshold_misses():
+    cache = SemanticResponseCache(similarity_threshold=0.9)
+    cache.put(key(1), vector(1, 0), "answer")
+
+    assert cache.get(key(1), vector(1, 1)) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_closest_earlier_question_wins():
+    cache = SemanticResponseCache(similarity_threshold=0.5)
+    cache.put(key(1), vector(1, 0), "first")
+    cache.put(key(1), vector(1, 1), "second")
+
+    assert cache.get(key(1), vector(1, 0.9)) == "second"
+
+
+def test_same_question_about_other_or_changed_documents_misses():
+    cache = SemanticResponseCache()
+    cache.put(key(1), vector(1, 0), "answer")
+
+    assert cache.get(key(2), vector(1, 0)) is None
+    assert cache.get(key(1, info="edited"), vector(1, 0)) is None
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = SemanticResponseCache(ttl_seconds=60)
+    cache.put(key(1), vector(1, 0), "answer")
+
+    clock.now += 59
+    assert cache.get(key(1), vector(1, 0)) == "answer"
+    clock.now += 2
+    assert cache.get(key(1), vector(1, 0)) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticResponseCache(max_size=2)
+    cache.put(key(1), vector(1, 0), "one")
+    cache.put(key(2), vector(1, 0), "two")
+    assert cache.get(key(1), vector(1, 0)) == "one"
+
+    cache.put(key(3), vector(1, 0), "three")
+
+    assert cache.get(key(2), vector(1, 0)) is None
+    assert cache.get(key(1), vector(1, 0)) == "one"
+    assert cache.get(key(3), vector(1, 0)) == "three"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_changed_record_invalidates_only_the_answers_built_on_it():
+    cache = SemanticResponseCache()
+    cache.put(key(1, 2), vector(1, 0), "about one and two")
+    cache.put(key(3), vector(1, 0), "about three")
+
+    cache.on_data_changed([2])
+
+    assert cache.get(key(1, 2), vector(1, 0)) is None
+    assert cache.get(key(3), vector(1, 0)) == "about three"
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_unspecified_change_invalidates_every_answer():
+    cache = SemanticResponseCache()
+    cache.put(key(1), vector(1, 0), "one")
+    cache.put(key(2), vector(1, 0), "two")
+
+    cache.on_data_changed(None)
+
+    assert cache.get(key(1), vector(1, 0)) is None
+    assert cache.get(key(2), vector(1, 0)) is None
@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight, flight_key
+
+
+class CountingLLM:
+    """
+    Answers after `release` is set and counts how often it was asked.
+    """
+
+    def __init__(self, chunks=("The ", "answer")):
+        self.chunks = chunks
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def generate(self):
+        self.calls += 1
+        await self.release.wait()
+        return "".join(self.chunks)
+
+    async def stream(self):
+        self.calls += 1
+        for chunk in self.chunks:
+            yield chunk
+            await self.release.wait()
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+def test_concurrent_identical_requests_share_one_llm_call():
+    async def scenario():
+        flights = SingleFlight()
+        llm = CountingLLM()
+        requests = [
+            asyncio.ensure_future(flights.run("key", llm.generate)) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        assert flights.in_flight() == 1
+        llm.release.set()
+        return llm, flights, await asyncio.gather(*requests)
+
+    llm, flights, answers = asyncio.run(scenario())
+
+    assert llm.calls == 1
+    assert answers == ["The answer", "The answer"]
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "followers": 1}
+
+
+def test_different_keys_are_not_coalesced():
+    async def scenario():
+        flights = SingleFlight()
+        llm = CountingLLM()
+        llm.release.set()
+        await asyncio.gather(
+            flights.run("first", llm.generate), flights.run("second", llm.generate)
+        )
+        return llm
+
+    assert asyncio.run(scenario()).calls == 2
+
+
+def test_key_is_released_once_the_computation_finishes():
+    async def scenario():
+        flights = SingleFlight()
+        llm = CountingLLM()
+        llm.release.set()
+        await flights.run("key", llm.generate)
+        await flights.run("key", llm.generate)
+        return llm, flights
+
+    llm, flights = asyncio.run(scenario())
+
+    assert llm.calls == 2
+    assert flights.in_flight() == 0
+
+
+def test_late_stream_subscriber_replays_earlier_chunks_then_follows_live():
+    async def scenario():
+        flights = SingleFlight()
+        llm = CountingLLM(chunks=("one ", "two ", "three"))
+        leader = flights.stream("key", llm.stream)
+        first_chunk = await leader.__anext__()
+        # The leader has seen one chunk; the follower joins mid-stream.
+        follower = asyncio.ensure_future(collect(flights.stream("key", llm.stream)))
+        await asyncio.sleep(0)
+        llm.release.set()
+        rest = await collect(leader)
+        return llm, [first_chunk] + rest, await follower
+
+    llm, leader_chunks, follower_chunks = asyncio.run(scenario())
+
+    assert llm.calls == 1
+    assert leader_chunks == ["one ", "two ", "three"]
+    assert follower_chunks == leader_chunks
+
+
+def test_error_reaches_every_subscriber():
+    async def failing_generate():
+        await asyncio.sleep(0)
+        raise RuntimeError("LLM unavailable")
+
+    async def scenario():
+        flights = SingleFlight()
+        results = await asyncio.gather(
+            flights.run("key", failing_generate),
+            flights.run("key", failing_generate),
+            return_exceptions=True,
+        )
+        return flights, results
+
+    flights, results = asyncio.run(scenario())
+
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert flights.stats()["leaders"] == 1
+    assert flights.in_flight() == 0
+
+
+def test_computation_survives_the_leader_going_away():
+    async def scenario():
+        flights = SingleFlight()
+        llm = CountingLLM()
+        leader = asyncio.ensure_future(flights.run("key", llm.generate))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.run("key", llm.generate))
+        await asyncio.sleep(0)
+        leader.cancel()
+        llm.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return llm, await follower
+
+    llm, answer = asyncio.run(scenario())
+
+    assert llm.calls == 1
+    assert answer == "The answer"
+
+
+def test_flight_key_ignores_case_and_whitespace_but_not_documents():
+    documents = ((1,), "digest")
+
+    assert flight_key("How  do I win?", documents) == flight_key(
+        "how do i win?", documents
+    )
+    assert flight_key("How do I win?", documents) != flight_key(
+        "How do I win?", ((2,), "digest")
+    )
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from app.core.retrieval import vs_in_memory
+from app.core.retrieval.vector_search_abstract import VectorRecord
+from app.core.retrieval.vs_in_memory import EMBEDDING_DIMENSION, InMemoryVectorSearch
+
+
+@pytest.fixture
+def search(monkeypatch):
+    monkeypatch.setattr(vs_in_memory, "MEMORY_VECTOR_STORE_PATH", None)
+    monkeypatch.setattr(vs_in_memory, "MEMORY_VECTOR_HYDRATE_FROM_DB", False)
+    return InMemoryVectorSearch()
+
+
+def random_records(count, seed=0, topic=1, game_name=None):
+    rng = np.random.default_rng(seed)
+    return [
+        VectorRecord(
+            text_to_embed=f"text {seed}-{index}",
+            info=f"info {seed}-{index}",
+            embeddings=rng.normal(size=EMBEDDING_DIMENSION),
+            topic=topic,
+            game_name=game_name,
+        )
+        for index in range(count)
+    ]
+
+
+def brute_force_top_k(records, query, k):
+    matrix = np.stack([record.embeddings for record in records])
+    matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    scores = matrix.dot(query / np.linalg.norm(query))
+    order = np.argsort(-scores)[:k]
+    return [records[row].info for row in order], scores[order]
+
+
+def test_search_returns_the_exact_top_k_most_similar_first(search):
+    records = random_records(200)
+    search.upload_records(records)
+    query = np.random.default_rng(1).normal(size=EMBEDDING_DIMENSION)
+
+    results = search.search(query, k=5)
+
+    infos, scores = brute_force_top_k(records, query, 5)
+    assert [result.info for result in results] == infos
+    np.testing.assert_allclose(
+        [result.similarity for result in results], scores, rtol=1e-5
+    )
+
+
+def test_search_with_k_above_the_size_returns_every_record(search):
+    search.upload_records(random_records(3))
+
+    results = search.search(np.ones(EMBEDDING_DIMENSION), k=10)
+
+    assert len(results) == 3
+    similarities = [result.similarity for result in results]
+    assert similarities == sorted(similarities, reverse=True)
+
+
+def test_search_batch_matches_search_per_query(search):
+    search.upload_records(random_records(50))
+    queries = np.random.default_rng(2).normal(size=(4, EMBEDDING_DIMENSION))
+    queries[2] = 0
+
+    batch = search.search_batch(queries, k=3)
+
+    assert batch[2] == []
+    for column in (0, 1, 3):
+        assert [result.id for result in batch[column]] == [
+            result.id for result in search.search(queries[column], k=3)
+        ]
+
+
+def test_upload_of_a_known_text_updates_the_row_in_place(search):
+    record = random_records(1)[0]
+    (record_id,) = search.upload_records([record])
+
+    assert search.upload_records([record]) == []
+    updated = VectorRecord(record.text_to_embed, "new info", -record.embeddings, 1)
+    assert search.upload_records([updated]) == [record_id]
+
+    results = search.search(-record.embeddings, k=5)
+    assert [(result.id, result.info) for result in results] == [(record_id, "new info")]
+
+
+def test_search_game_chunks_only_returns_rows_of_the_given_games(search):
+    search.upload_records(random_records(5, seed=1, topic=2, game_name="Catan"))
+    search.upload_records(random_records(5, seed=2, topic=2, game_name="Chess"))
+
+    results = search.search_game_chunks(np.ones(EMBEDDING_DIMENSION), ["Chess"], k=10)
+
+    assert len(results) == 5
+    assert {result.game_name for result in results} == {"Chess"}
+
+
+def test_snapshot_round_trip_restores_rows_names_and_ids(search, tmp_path):
+    records = random_records(20, game_name="Catan")
+    search.upload_records(records)
+    search.upload_game_names(["Catan", "Chess"])
+    query = np.random.default_rng(3).normal(size=EMBEDDING_DIMENSION)
+    expected = search.search(query, k=5)
+    path = str(tmp_path / "index.npz")
+
+    search.save(path)
+    restored = InMemoryVectorSearch()
+    restored.load(path)
+
+    assert restored.search(query, k=5) == expected
+    assert restored.get_all_board_game_names() == ["Catan", "Chess"]
+    # Ids keep counting from the snapshot instead of being reused.
+    (new_id,) = restored.upload_records(random_records(1, seed=9))
+    assert new_id == len(records) + 1